@@ -0,0 +1,246 @@
+"""
+Бинарные тела запросов и ответов: msgpack и Arrow IPC stream
+
+Тело в msgpack - тот же документ, что и в JSON. Тело в Arrow - таблица из одной строки,
+колонки которой - поля запроса (вложенные модели - struct, ряды - struct из list<double>
+значений и list<string> или list<date32> дат). Формат ответа выбирается по заголовку Accept.
+JSON ответов собирается orjson прямо из массивов numpy, без поэлементного обхода в python
+"""
+
+from contextvars import ContextVar
+from typing import Any, Callable, Optional
+
+import msgpack
+import numpy as np
+import orjson
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+from fastapi.routing import APIRoute
+from pydantic import BaseModel
+
+
+MSGPACK = 'application/msgpack'
+
+ARROW_STREAM = 'application/vnd.apache.arrow.stream'
+
+
+def _to_python(array: pa.Array) -> Any:
+    """
+    Значение единственной строки массива Arrow
+
+    Числовые списки возвращаются массивами numpy без копирования в список python.
+    Даты (date32/date64/timestamp) становятся строками dd.mm.yyyy, как в JSON запросах
+    """
+
+    if pa.types.is_struct(array.type):
+        if array.null_count:
+            return None
+
+        return {field.name: _to_python(array.field(i)) for i, field in enumerate(array.type)}
+
+    if pa.types.is_list(array.type) or pa.types.is_large_list(array.type):
+        if array.null_count:
+            return None
+
+        values = array.values.slice(array.offsets[0].as_py(), array.value_lengths()[0].as_py())
+
+        if pa.types.is_date(values.type) or pa.types.is_timestamp(values.type):
+            values = pc.strftime(values, format='%d.%m.%Y')
+
+        if pa.types.is_struct(values.type) or pa.types.is_list(values.type):
+            return [_to_python(values.slice(i, 1)) for i in range(len(values))]
+
+        if not values.null_count and (pa.types.is_integer(values.type) or pa.types.is_floating(values.type)):
+            return values.to_numpy()
+
+        return values.to_pylist()
+
+    return array[0].as_py()
+
+
+def decode_msgpack(body: bytes) -> Any:
+    return msgpack.unpackb(body)
+
+
+def decode_arrow(body: bytes) -> Any:
+    table = pa.ipc.open_stream(body).read_all()
+
+    if table.num_rows != 1:
+        raise ValueError(f'В таблице запроса должна быть одна строка, а не {table.num_rows}')
+
+    return {name: _to_python(column.combine_chunks()) for name, column in zip(table.column_names, table.columns)}
+
+
+def _tolist(value: Any) -> Any:
+    if isinstance(value, (np.ndarray, np.generic)):
+        return value.tolist()
+
+    raise TypeError(f'Нельзя сериализовать {type(value).__name__}')
+
+
+def encode_json(content: Any) -> bytes:
+    return orjson.dumps(content, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+def encode_msgpack(content: Any) -> bytes:
+    return msgpack.packb(content, default=_tolist)
+
+
+def encode_arrow(content: Any) -> bytes:
+    table = pa.Table.from_pylist([content])
+    sink = pa.BufferOutputStream()
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+DECODERS: dict[str, Callable[[bytes], Any]] = {
+    MSGPACK: decode_msgpack,
+    ARROW_STREAM: decode_arrow,
+}
+
+ENCODERS: dict[str, Callable[[Any], bytes]] = {
+    MSGPACK: encode_msgpack,
+    ARROW_STREAM: encode_arrow,
+}
+
+# формат ответа текущего запроса, None - JSON
+_response_media_type: ContextVar[Optional[str]] = ContextVar('response_media_type', default=None)
+
+
+def response_media_type() -> Optional[str]:
+    """Формат ответа на текущий запрос из заголовка Accept, None - JSON"""
+
+    return _response_media_type.get()
+
+
+def render(content: Any, media_type: Optional[str]) -> bytes:
+    """Тело ответа в формате media_type. Массивы numpy в моделях pydantic не переводятся в списки заранее"""
+
+    if isinstance(content, BaseModel):
+        content = content.model_dump()
+
+    if media_type is None:
+        return encode_json(content)
+
+    return ENCODERS[media_type](content)
+
+
+def encoded_response(body: bytes, media_type: Optional[str]) -> Response:
+    """Ответ из уже закодированного тела, например из кеша"""
+
+    return Response(body, media_type=media_type or JSONResponse.media_type)
+
+
+def _media_type(header: str) -> str:
+    return header.split(';', 1)[0].strip().lower()
+
+
+def _quality(media_range: str) -> float:
+    """Вес q диапазона из Accept. Без q - 1, неразборчивый q - 0"""
+
+    for param in media_range.split(';')[1:]:
+        name, _, value = param.partition('=')
+
+        if name.strip().lower() == 'q':
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+
+    return 1.0
+
+
+def _accepted(accept: str) -> Optional[str]:
+    """
+    Формат ответа по Accept: диапазон с наибольшим q, при равных q - первый в заголовке.
+    Диапазоны с q=0 и неизвестные форматы пропускаются. JSON, если клиент не просил бинарный формат
+    """
+
+    ranges = sorted(accept.split(','), key=lambda media_range: -_quality(media_range))
+
+    for media_range in ranges:
+        media_type = _media_type(media_range)
+
+        if _quality(media_range) <= 0:
+            break
+
+        if media_type in ENCODERS:
+            return media_type
+
+        if media_type in ('application/json', '*/*', 'application/*'):
+            return None
+
+    return None
+
+
+class DecodedRequest(Request):
+    """Запрос с бинарным телом, которое FastAPI получает как уже разобранный JSON"""
+
+    def __init__(self, request: Request, body: bytes, data: Any):
+        # без content-type FastAPI берет тело из json()
+        headers = [(k, v) for k, v in request.scope['headers'] if k != b'content-type']
+        super().__init__(dict(request.scope, headers=headers), request.receive)
+
+        self._raw_body = body
+        self._data = data
+
+    async def body(self) -> bytes:
+        return self._raw_body
+
+    async def json(self) -> Any:
+        return self._data
+
+
+class BinaryRoute(APIRoute):
+    """Маршрут, который кроме JSON принимает и отдает msgpack и Arrow IPC stream"""
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            decoder = DECODERS.get(_media_type(request.headers.get('content-type', '')))
+
+            if decoder is not None:
+                body = await request.body()
+
+                try:
+                    data = decoder(body)
+                except Exception as e:
+                    raise HTTPException(status_code=400, detail=f'Не удалось разобрать тело запроса: {e}')
+
+                request = DecodedRequest(request, body, data)
+
+            token = _response_media_type.set(_accepted(request.headers.get('accept', '')))
+
+            try:
+                return await handler(request)
+            except RequestValidationError as e:
+                if decoder is None:
+                    raise
+
+                # в ошибках есть входные значения, а ряды из Arrow - массивы numpy, которых не знает jsonable_encoder
+                errors = orjson.loads(orjson.dumps(e.errors(), option=orjson.OPT_SERIALIZE_NUMPY, default=str))
+                raise RequestValidationError(errors) from e
+            finally:
+                _response_media_type.reset(token)
+
+        return route_handler
+
+
+class EncodedResponse(JSONResponse):
+    """Ответ в формате из Accept: JSON, msgpack или Arrow IPC stream"""
+
+    def render(self, content: Any) -> bytes:
+        media_type = _response_media_type.get()
+
+        if media_type is not None:
+            # init_headers вызывается после render, поэтому content-type будет уже бинарный
+            self.media_type = media_type
+
+        return render(content, media_type)
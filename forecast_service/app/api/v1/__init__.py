@@ -1,8 +1,10 @@
 from fastapi import APIRouter
-from .handlers import forecast_router
+from .handlers import forecast_router, metrics_router, profiles_router
 
 
 router_v1 = APIRouter()
 router_v1.include_router(forecast_router)
+router_v1.include_router(metrics_router)
+router_v1.include_router(profiles_router)
 
 __all__ = ['router_v1']
\ No newline at end of file
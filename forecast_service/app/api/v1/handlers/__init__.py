@@ -1,3 +1,5 @@
 from .make_forecast import forecast_router
+from .metrics import metrics_router
+from .profiles import profiles_router
 
-__all__ = ['forecast_router']
\ No newline at end of file
+__all__ = ['forecast_router', 'metrics_router', 'profiles_router']
@@ -1,13 +1,192 @@
-from fastapi import APIRouter, HTTPException
-from fastapi_cache.decorator import cache
+from functools import partial
+from typing import TypeVar, Union
 
-from app.schemas.io.request import ORTRequestCB
-from app.service.forecast_models import IPCForecast, IPPForecast, BaseForecastService, ORTForecast
-from app.schemas import (IndexFeaturesMapper, ForecastResponse, FeaturesResponse,
-                         IPPRequestCB, BaseRequest, ReadyOnModels, IPCRequestCB)
+from fastapi import APIRouter, Depends, HTTPException, Path
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
 
+from app import config
+from app.api.encoding import BinaryRoute, EncodedResponse
+from app.cache import cache
+from app.executor import (run_forecast, run_forecast_batch, run_search, run_backtest, start_session, append_session,
+                          delete_session)
+from app.jobs import Job, QueueFull, job_queue
+from app.store import series_store
+from app.domain.forecast_interface import TunableForecast
+from app.service.forecast_models import BackendDisabled, get_model
+from app.schemas import (IndexFeaturesMapper, ForecastResponse, FeaturesResponse, Feature,
+                         IPPRequestCB, BaseRequest, ReadyOnModels, IPCRequestCB, ORTRequestCB,
+                         IPPBatchRequestCB, IPCBatchRequestCB, ORTBatchRequestCB,
+                         BatchForecastItem, BatchForecastResponse, SearchResponse, SearchSettings,
+                         BaseHyperparameters, BaseSearchRequest, IPPSearchRequestCB, IPCSearchRequestCB,
+                         ORTSearchRequestCB, CatBoostHyperparameters, AppendRequest, SessionResponse,
+                         JobResponse, BacktestSettings, BacktestResponse, BaseBacktestRequest, IPPBacktestRequestCB,
+                         IPCBacktestRequestCB, ORTBacktestRequestCB, BaseMultiRequest, MultiSeriesForecastResponse)
 
-forecast_router = APIRouter()
+from .profiles import profile_request
+
+
+RequestT = TypeVar('RequestT', bound=BaseModel)
+
+# Номер сессии - uuid4 hex, другие значения не должны попасть в путь на диске
+SessionId = Path(pattern='^[0-9a-f]{32}$')
+
+JobId = Path(pattern='^[0-9a-f]{32}$')
+
+# Маршруты принимают и отдают JSON, msgpack и Arrow IPC stream (app.api.encoding).
+# С заголовком X-Profile-Token любой маршрут прогноза выполняется под профилировщиком
+forecast_router = APIRouter(
+    route_class=BinaryRoute,
+    default_response_class=EncodedResponse,
+    dependencies=[Depends(profile_request)]
+)
+
+
+def _model(name: str) -> type[TunableForecast]:
+    """Класс модели. Модуль модели загружается при первом запросе к ней"""
+
+    try:
+        return get_model(name)
+    except BackendDisabled as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+
+def _tunable_base_model() -> type[TunableForecast]:
+    """Базовая модель для подбора гиперпараметров и бэктеста. Их поддерживает только NHITS"""
+
+    model_cls = _model('BaseForecastService')
+
+    if not issubclass(model_cls, TunableForecast):
+        raise HTTPException(
+            status_code=501,
+            detail=f'Базовая модель {config.BASE_FORECAST_MODEL} не поддерживает подбор гиперпараметров и бэктест'
+        )
+
+    return model_cls
+
+
+def _resolve_series(request: RequestT) -> RequestT:
+    """Подставляет ряды из хранилища вместо ссылок по dataset_uuid"""
+
+    try:
+        return series_store.resolve(request)
+    except KeyError as e:
+        raise HTTPException(status_code=404, detail=f'Такого набора данных нет: {e.args[0]}')
+
+
+def _ipp_series(request: IPPRequestCB) -> dict[str, Feature]:
+    return dict(
+        ipp=request.ipp,
+        rzd=request.features.rzd,
+        news=request.features.news,
+        curs=request.features.curs,
+        cb_monitor=request.features.cb_monitor,
+        interest_rate=request.features.interest_rate,
+        business_clim=request.features.business_clim,
+        consumer_price=request.features.consumer_price
+    )
+
+
+def _ipc_series(request: IPCRequestCB) -> dict[str, Feature]:
+    return dict(
+        ipc=request.ipc,
+        curs=request.features.curs,
+        interest_rate=request.features.interest_rate,
+        money_supply=request.features.money_supply,
+        agg_m0=request.features.agg_m0
+    )
+
+
+def _ort_series(request: ORTRequestCB) -> dict[str, Feature]:
+    return dict(
+        ort=request.ort,
+        salary=request.features.salary,
+        business_clim=request.features.business_clim,
+        news=request.features.news
+    )
+
+
+async def _batch_forecast(
+        model_cls: type[TunableForecast],
+        request: Union[IPPBatchRequestCB, IPCBatchRequestCB, ORTBatchRequestCB],
+        series: dict[str, Feature]
+) -> Union[BatchForecastResponse, StreamingResponse]:
+    """Прогнозы пакетного запроса целиком или потоком NDJSON по мере готовности"""
+
+    batch = run_forecast_batch(model_cls, request.hparams, **series)
+
+    if request.stream:
+        async def lines():
+            async for i, response in batch:
+                yield BatchForecastItem(hparams_index=i, response=response).model_dump_json() + '\n'
+
+        return StreamingResponse(lines(), media_type='application/x-ndjson')
+
+    responses = [None] * len(request.hparams)
+
+    async for i, response in batch:
+        responses[i] = response
+
+    return BatchForecastResponse(responses=responses)
+
+
+async def _search(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        settings: SearchSettings,
+        series: dict[str, Feature]
+) -> SearchResponse:
+    try:
+        return await run_search(model_cls, hparams, settings, **series)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _backtest(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        settings: BacktestSettings,
+        series: dict[str, Feature]
+) -> BacktestResponse:
+    try:
+        return await run_backtest(model_cls, hparams, settings, **series)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+
+async def _start_session(
+        model_cls: type[TunableForecast],
+        hparams: CatBoostHyperparameters,
+        series: dict[str, Feature]
+) -> SessionResponse:
+    try:
+        session_id, response = await start_session(model_cls, hparams, **series)
+    except RuntimeError as e:
+        raise HTTPException(status_code=503, detail=str(e))
+
+    return SessionResponse(session_id=session_id, response=response)
+
+
+def _job_response(job: Job) -> JobResponse:
+    return JobResponse(job_id=job.id, status=job.status, result=job.result, error=job.error)
+
+
+def _submit_job(
+        kind: str,
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        series: dict[str, Feature]
+) -> JobResponse:
+    try:
+        job = job_queue.submit(kind, partial(run_forecast, model_cls, hparams, **series))
+    except QueueFull:
+        raise HTTPException(
+            status_code=429,
+            detail='Очередь задач заполнена, повторите запрос позже',
+            headers={'Retry-After': '30'}
+        )
+
+    return _job_response(job)
 
 
 @forecast_router.get("/{index}/features_list")
@@ -25,11 +204,31 @@ async def features_list(index: ReadyOnModels) -> FeaturesResponse:
 async def base_forecast(request: BaseRequest) -> ForecastResponse:
     """# Базовая модель для прогноза"""
 
-    return (BaseForecastService(request.hparams)
-            .set_data(request.target)
-            .preprocess_features()
-            .train()
-            .predict())
+    request = _resolve_series(request)
+
+    return await run_forecast(_model('BaseForecastService'), request.hparams, target_data=request.target)
+
+
+@forecast_router.post("/base/multi")
+@cache(namespace="make_forecast", expire=3600)
+async def base_forecast_multi(request: BaseMultiRequest) -> MultiSeriesForecastResponse:
+    """
+    # Базовая модель для прогноза нескольких рядов
+
+    Одна модель NHiTS обучается сразу на всех рядах targets, вместо отдельного обучения на каждый ряд.
+    Ряды должны быть одной длины, иначе вернется 422
+
+    ## Возвращает:
+    MultiSeriesForecastResponse - прогнозы в порядке рядов targets
+    """
+
+    request = _resolve_series(request)
+    targets = {str(i): target for i, target in enumerate(request.targets)}
+
+    try:
+        return await run_forecast(_model('GlobalForecastService'), request.hparams, **targets)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
 
 
 @forecast_router.post("/ipp/catboost")
@@ -40,7 +239,6 @@ async def cb_ipp_forecast(request: IPPRequestCB) -> ForecastResponse:
     
     ## Параметры:
     - __hparams:__ гиперпараметры CatBoost
-    - __confidence_interval:__ доверительный интервал
     - __goal:__ временной ряд индекса ИПП
     - __features:__ список временных рядов признаков индекса
     
@@ -49,23 +247,12 @@ async def cb_ipp_forecast(request: IPPRequestCB) -> ForecastResponse:
     ## Возвращает:
     ForecastResponse(responses: tuple[float])
     
-    _т.е. прогноз на следующие 3 месяца_
+    _т.е. прогноз на следующие 3 месяца и интервалы прогноза уровней 90%, 95% и 99%_
     """
 
-    return (IPPForecast(request.hparams)
-            .set_data(
-                ipp=request.ipp,
-                rzd=request.features.rzd,
-                news=request.features.news,
-                curs=request.features.curs,
-                cb_monitor=request.features.cb_monitor,
-                interest_rate=request.features.interest_rate,
-                business_clim=request.features.business_clim,
-                consumer_price=request.features.consumer_price
-            )
-            .preprocess_features()
-            .train()
-            .predict())
+    request = _resolve_series(request)
+
+    return await run_forecast(_model('IPPForecast'), request.hparams, **_ipp_series(request))
 
 
 @forecast_router.post("/ipc/catboost")
@@ -85,17 +272,9 @@ async def cb_ipc_forecast(request: IPCRequestCB) -> ForecastResponse:
     ForecastResponse
     """
 
-    return (IPCForecast(request.hparams)
-            .set_data(
-                ipc=request.ipc,
-                curs=request.features.curs,
-                interest_rate=request.features.interest_rate,
-                money_supply=request.features.money_supply,
-                agg_m0=request.features.agg_m0
-            )
-            .preprocess_features()
-            .train()
-            .predict())
+    request = _resolve_series(request)
+
+    return await run_forecast(_model('IPCForecast'), request.hparams, **_ipc_series(request))
 
 
 @forecast_router.post("/ort/catboost")
@@ -115,13 +294,321 @@ async def cb_ort_forecast(request: ORTRequestCB) -> ForecastResponse:
     ForecastResponse
     """
 
-    return (ORTForecast(request.hparams)
-            .set_data(
-                ort=request.ort,
-                salary=request.features.salary,
-                business_clim=request.features.business_clim,
-                news=request.features.news
-            )
-            .preprocess_features()
-            .train()
-            .predict())
+    request = _resolve_series(request)
+
+    return await run_forecast(_model('ORTForecast'), request.hparams, **_ort_series(request))
+
+
+@forecast_router.post("/ipp/catboost/batch")
+async def cb_ipp_forecast_batch(request: IPPBatchRequestCB) -> BatchForecastResponse:
+    """
+    # Пакетный прогноз индекса промышленного производства с CatBoost
+
+    Одни данные и список наборов гиперпараметров: данные предобрабатываются один раз,
+    модели для разных наборов обучаются параллельно
+
+    ## Параметры:
+    - __hparams:__ список наборов гиперпараметров CatBoost
+    - __stream:__ отдавать прогнозы по мере готовности (application/x-ndjson, BatchForecastItem в строке)
+
+    ## Возвращает:
+    BatchForecastResponse - прогнозы в порядке наборов гиперпараметров
+    """
+
+    request = _resolve_series(request)
+
+    return await _batch_forecast(_model('IPPForecast'), request, _ipp_series(request))
+
+
+@forecast_router.post("/ipc/catboost/batch")
+async def cb_ipc_forecast_batch(request: IPCBatchRequestCB) -> BatchForecastResponse:
+    """
+    # Пакетный прогноз индекса потребительских цен с CatBoost
+
+    Параметры и ответ как у /ipp/catboost/batch
+    """
+
+    request = _resolve_series(request)
+
+    return await _batch_forecast(_model('IPCForecast'), request, _ipc_series(request))
+
+
+@forecast_router.post("/ort/catboost/batch")
+async def cb_ort_forecast_batch(request: ORTBatchRequestCB) -> BatchForecastResponse:
+    """
+    # Пакетный прогноз оборота розничной торговли с CatBoost
+
+    Параметры и ответ как у /ipp/catboost/batch
+    """
+
+    request = _resolve_series(request)
+
+    return await _batch_forecast(_model('ORTForecast'), request, _ort_series(request))
+
+
+@forecast_router.post("/base/search")
+async def base_search(request: BaseSearchRequest) -> SearchResponse:
+    """
+    # Подбор гиперпараметров базовой модели NHiTS
+
+    ## Параметры:
+    - __hparams:__ гиперпараметры, с которых начинается подбор. Горизонт прогноза не подбирается
+    - __search:__ число попыток, параллельность, размер отложенной выборки, ограничение по времени
+    - __target:__ временной ряд
+
+    ## Возвращает:
+    SearchResponse - лучшие гиперпараметры, их MAPE на отложенных месяцах и прогноз
+    """
+
+    request = _resolve_series(request)
+
+    return await _search(_tunable_base_model(), request.hparams, request.search, dict(target_data=request.target))
+
+
+@forecast_router.post("/ipp/catboost/search")
+async def cb_ipp_search(request: IPPSearchRequestCB) -> SearchResponse:
+    """
+    # Подбор гиперпараметров CatBoost для индекса промышленного производства
+
+    Попытки идут параллельно на одних предобработанных данных. Качество считается на последних
+    valid_size месяцах по каждой из трех моделей, плохие попытки останавливаются после первых моделей
+
+    ## Параметры:
+    - __hparams:__ гиперпараметры, с которых начинается подбор
+    - __search:__ число попыток, параллельность, размер отложенной выборки, ограничение по времени
+
+    ## Возвращает:
+    SearchResponse - лучшие гиперпараметры, их MAPE на отложенных месяцах и прогноз
+    """
+
+    request = _resolve_series(request)
+
+    return await _search(_model('IPPForecast'), request.hparams, request.search, _ipp_series(request))
+
+
+@forecast_router.post("/ipc/catboost/search")
+async def cb_ipc_search(request: IPCSearchRequestCB) -> SearchResponse:
+    """
+    # Подбор гиперпараметров CatBoost для индекса потребительских цен
+
+    Параметры и ответ как у /ipp/catboost/search
+    """
+
+    request = _resolve_series(request)
+
+    return await _search(_model('IPCForecast'), request.hparams, request.search, _ipc_series(request))
+
+
+@forecast_router.post("/ort/catboost/search")
+async def cb_ort_search(request: ORTSearchRequestCB) -> SearchResponse:
+    """
+    # Подбор гиперпараметров CatBoost для оборота розничной торговли
+
+    Параметры и ответ как у /ipp/catboost/search
+    """
+
+    request = _resolve_series(request)
+
+    return await _search(_model('ORTForecast'), request.hparams, request.search, _ort_series(request))
+
+
+@forecast_router.post("/base/backtest")
+@cache(namespace="backtest", expire=3600)
+async def base_backtest(request: BaseBacktestRequest) -> BacktestResponse:
+    """
+    # Бэктест базовой модели NHiTS
+
+    Шаг прогноза j каждой точки отсчета сравнивается с месяцем через j месяцев после нее
+
+    Параметры и ответ как у /ipp/catboost/backtest
+    """
+
+    request = _resolve_series(request)
+
+    return await _backtest(_tunable_base_model(), request.hparams, request.backtest, dict(target_data=request.target))
+
+
+@forecast_router.post("/ipp/catboost/backtest")
+@cache(namespace="backtest", expire=3600)
+async def cb_ipp_backtest(request: IPPBacktestRequestCB) -> BacktestResponse:
+    """
+    # Бэктест CatBoost для индекса промышленного производства
+
+    Точка отсчета сдвигается по последним window месяцам с шагом step. Для каждой точки модели обучаются
+    только на месяцах до нее и проверяются на test_size следующих. Матрица признаков строится один раз,
+    проходы обучаются параллельно
+
+    ## Параметры:
+    - __hparams:__ гиперпараметры CatBoost
+    - __backtest:__ window, test_size, step
+
+    ## Возвращает:
+    BacktestResponse - MAPE и R2 каждого шага прогноза по всем точкам отсчета и по каждой из них
+    """
+
+    request = _resolve_series(request)
+
+    return await _backtest(_model('IPPForecast'), request.hparams, request.backtest, _ipp_series(request))
+
+
+@forecast_router.post("/ipc/catboost/backtest")
+@cache(namespace="backtest", expire=3600)
+async def cb_ipc_backtest(request: IPCBacktestRequestCB) -> BacktestResponse:
+    """
+    # Бэктест CatBoost для индекса потребительских цен
+
+    Параметры и ответ как у /ipp/catboost/backtest
+    """
+
+    request = _resolve_series(request)
+
+    return await _backtest(_model('IPCForecast'), request.hparams, request.backtest, _ipc_series(request))
+
+
+@forecast_router.post("/ort/catboost/backtest")
+@cache(namespace="backtest", expire=3600)
+async def cb_ort_backtest(request: ORTBacktestRequestCB) -> BacktestResponse:
+    """
+    # Бэктест CatBoost для оборота розничной торговли
+
+    Параметры и ответ как у /ipp/catboost/backtest
+    """
+
+    request = _resolve_series(request)
+
+    return await _backtest(_model('ORTForecast'), request.hparams, request.backtest, _ort_series(request))
+
+
+@forecast_router.post("/ipp/catboost/session")
+async def cb_ipp_session(request: IPPRequestCB) -> SessionResponse:
+    """
+    # Прогноз ИПП с CatBoost с сохранением сессии обучения
+
+    Тело и прогноз как у /ipp/catboost. Модели сохраняются вместе с данными, и когда выйдет новый месяц,
+    достаточно отправить только его в /sessions/{session_id}/append
+
+    ## Возвращает:
+    SessionResponse - номер сессии и прогноз
+    """
+
+    request = _resolve_series(request)
+
+    return await _start_session(_model('IPPForecast'), request.hparams, _ipp_series(request))
+
+
+@forecast_router.post("/ipc/catboost/session")
+async def cb_ipc_session(request: IPCRequestCB) -> SessionResponse:
+    """
+    # Прогноз ИПЦ с CatBoost с сохранением сессии обучения
+
+    Параметры и ответ как у /ipp/catboost/session
+    """
+
+    request = _resolve_series(request)
+
+    return await _start_session(_model('IPCForecast'), request.hparams, _ipc_series(request))
+
+
+@forecast_router.post("/ort/catboost/session")
+async def cb_ort_session(request: ORTRequestCB) -> SessionResponse:
+    """
+    # Прогноз ОРТ с CatBoost с сохранением сессии обучения
+
+    Параметры и ответ как у /ipp/catboost/session
+    """
+
+    request = _resolve_series(request)
+
+    return await _start_session(_model('ORTForecast'), request.hparams, _ort_series(request))
+
+
+@forecast_router.post("/sessions/{session_id}/append")
+async def append_to_session(request: AppendRequest, session_id: str = SessionId) -> SessionResponse:
+    """
+    # Добавить новые значения рядов в сессию обучения
+
+    Ряды дописываются к сохраненным, модели, у которых изменилась выборка, продолжают бустинг от прошлых
+    (или обучаются заново при refit). Модели с неизменной выборкой не переобучаются
+
+    ## Параметры:
+    - __series:__ только новые значения рядов, по именам из запроса на прогноз
+    - __refit:__ обучить модели заново
+
+    ## Возвращает:
+    SessionResponse - прогноз обновленных моделей
+    """
+
+    try:
+        response = await append_session(session_id, refit=request.refit, **request.series)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    if response is None:
+        raise HTTPException(status_code=404, detail='Такой сессии нет')
+
+    return SessionResponse(session_id=session_id, response=response)
+
+
+@forecast_router.delete("/sessions/{session_id}")
+async def remove_session(session_id: str = SessionId) -> None:
+    """# Удалить сессию обучения"""
+
+    if not delete_session(session_id):
+        raise HTTPException(status_code=404, detail='Такой сессии нет')
+
+
+@forecast_router.post("/jobs/base", status_code=202)
+async def base_forecast_job(request: BaseRequest) -> JobResponse:
+    """
+    # Базовая модель для прогноза в фоновой задаче
+
+    Тело как у /base. Сразу возвращает job_id, прогноз забирается через GET /jobs/{job_id}
+    """
+
+    request = _resolve_series(request)
+
+    return _submit_job('nhits', _model('BaseForecastService'), request.hparams, dict(target_data=request.target))
+
+
+@forecast_router.post("/jobs/ipp/catboost", status_code=202)
+async def cb_ipp_forecast_job(request: IPPRequestCB) -> JobResponse:
+    """# Прогноз ИПП с CatBoost в фоновой задаче. Тело как у /ipp/catboost"""
+
+    request = _resolve_series(request)
+
+    return _submit_job('catboost', _model('IPPForecast'), request.hparams, _ipp_series(request))
+
+
+@forecast_router.post("/jobs/ipc/catboost", status_code=202)
+async def cb_ipc_forecast_job(request: IPCRequestCB) -> JobResponse:
+    """# Прогноз ИПЦ с CatBoost в фоновой задаче. Тело как у /ipc/catboost"""
+
+    request = _resolve_series(request)
+
+    return _submit_job('catboost', _model('IPCForecast'), request.hparams, _ipc_series(request))
+
+
+@forecast_router.post("/jobs/ort/catboost", status_code=202)
+async def cb_ort_forecast_job(request: ORTRequestCB) -> JobResponse:
+    """# Прогноз ОРТ с CatBoost в фоновой задаче. Тело как у /ort/catboost"""
+
+    request = _resolve_series(request)
+
+    return _submit_job('catboost', _model('ORTForecast'), request.hparams, _ort_series(request))
+
+
+@forecast_router.get("/jobs/{job_id}")
+async def get_job(job_id: str = JobId) -> JobResponse:
+    """
+    # Состояние фоновой задачи
+
+    status: queued, running, done (прогноз в result) или failed (причина в error).
+    Результат хранится JOB_RESULT_TTL секунд после завершения
+    """
+
+    job = job_queue.get(job_id)
+
+    if job is None:
+        raise HTTPException(status_code=404, detail='Такой задачи нет')
+
+    return _job_response(job)
@@ -0,0 +1,71 @@
+import hmac
+import io
+import os
+import pstats
+from typing import Literal, Optional
+
+from fastapi import APIRouter, Header, HTTPException, Path, Response
+from fastapi.responses import FileResponse, PlainTextResponse
+
+from app import config
+from app.profiling import profile_path, start_profile
+
+
+# Номер профиля - uuid4 hex, другие значения не должны попасть в путь на диске
+ProfileId = Path(pattern='^[0-9a-f]{32}$')
+
+profiles_router = APIRouter()
+
+
+def _check_token(token: str) -> None:
+    if not config.PROFILE_TOKENS:
+        raise HTTPException(status_code=403, detail='Профилирование отключено: не задан PROFILE_TOKENS')
+
+    if not any(hmac.compare_digest(token, allowed) for allowed in config.PROFILE_TOKENS):
+        raise HTTPException(status_code=403, detail='Неверный X-Profile-Token')
+
+
+async def profile_request(
+        response: Response,
+        x_profile_token: Optional[str] = Header(None, include_in_schema=False),
+        x_profile_cold: bool = Header(False, include_in_schema=False)
+) -> None:
+    """
+    Зависимость маршрутов прогноза: с заголовком X-Profile-Token запрос выполняется под cProfile
+
+    Профиль сохраняется под номером из заголовка ответа X-Profile-Id и забирается через GET /profiles/{profile_id}.
+    С X-Profile-Cold: true модели обучаются заново, даже если они есть в хранилище
+    """
+
+    if x_profile_token is not None:
+        _check_token(x_profile_token)
+        response.headers['X-Profile-Id'] = start_profile(cold=x_profile_cold).id
+
+
+@profiles_router.get("/profiles/{profile_id}", include_in_schema=False)
+async def get_profile(
+        profile_id: str = ProfileId,
+        format: Literal['pstats', 'text'] = 'pstats',
+        limit: int = 50,
+        x_profile_token: Optional[str] = Header(None)
+) -> Response:
+    """
+    # Профиль запроса
+
+    pstats - файл для pstats, snakeviz и т.п., text - limit самых долгих функций по суммарному времени
+    """
+
+    _check_token(x_profile_token or '')
+
+    path = profile_path(profile_id)
+
+    if not os.path.exists(path):
+        raise HTTPException(status_code=404, detail='Такого профиля нет')
+
+    if format == 'pstats':
+        return FileResponse(path, media_type='application/octet-stream', filename=f'{profile_id}.pstats')
+
+    stream = io.StringIO()
+    pstats.Stats(path, stream=stream).sort_stats('cumulative').print_stats(limit)
+
+    return PlainTextResponse(stream.getvalue())
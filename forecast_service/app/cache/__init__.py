@@ -1,4 +1,11 @@
 from .in_memory import lifespan
+from .decorator import cache, forecast_key_builder
+from .fingerprint import fingerprint
+from .lru import LRUBackend
+from .single_flight import SingleFlight, single_flight
+from .model_registry import ModelRegistry, model_registry, session_registry
+from .series import SeriesCache, series_cache
 
 
-__all__ = ['lifespan']
\ No newline at end of file
+__all__ = ['lifespan', 'cache', 'forecast_key_builder', 'fingerprint', 'LRUBackend', 'ModelRegistry', 'model_registry',
+           'session_registry', 'SingleFlight', 'single_flight', 'SeriesCache', 'series_cache']
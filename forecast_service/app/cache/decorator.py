@@ -0,0 +1,99 @@
+from functools import wraps
+from typing import Any, Awaitable, Callable, Optional, TypeVar, Union
+
+import orjson
+from fastapi import Response
+from fastapi_cache import FastAPICache
+
+from app.api.encoding import encoded_response, render, response_media_type
+from app.profiling import current_profile
+
+from .fingerprint import fingerprint
+from .single_flight import single_flight
+
+
+R = TypeVar('R')
+
+
+def forecast_key_builder(
+        func: Callable[..., Any],
+        namespace: str = '',
+        *,
+        request: Any = None,
+        response: Any = None,
+        args: tuple[Any, ...],
+        kwargs: dict[str, Any],
+) -> str:
+    """
+    Короткий ключ кеша по содержимому запроса
+
+    Вместо repr всего тела запроса ряды хешируются потоково по массивам значений и дат
+    """
+
+    parts = [part for name in sorted(kwargs) for part in (name, kwargs[name])]
+
+    return f'{namespace}:{func.__module__}:{func.__name__}:{fingerprint(*args, *parts)}'
+
+
+def cache(
+        namespace: str = '',
+        expire: Optional[int] = None
+) -> Callable[[Callable[..., Awaitable[R]]], Callable[..., Awaitable[Union[R, Response]]]]:
+    """
+    Кеширование ответа обработчика в бэкенде FastAPICache
+
+    В отличие от fastapi_cache.decorator.cache кеширует и POST запросы: прогнозы
+    принимают данные в теле запроса, поэтому GET для них не подходит.
+    Одновременные запросы с одним ключом, которых еще нет в кеше, ждут одного вычисления.
+    Профилируемые запросы всегда вычисляются заново
+
+    В кеше лежит готовое тело ответа: JSON под ключом запроса, msgpack и Arrow - под ключом
+    с форматом, они собираются из JSON при первом запросе в этом формате. Из кеша отдаются
+    байты как есть, без разбора и повторной сериализации
+    """
+
+    def wrapper(func: Callable[..., Awaitable[R]]) -> Callable[..., Awaitable[Union[R, Response]]]:
+        @wraps(func)
+        async def inner(*args: Any, **kwargs: Any) -> Union[R, Response]:
+            # без кеша ответ собирает FastAPI, чтобы сохранились заголовки зависимостей (X-Profile-Id)
+            if not FastAPICache.get_enable() or current_profile() is not None:
+                return await func(*args, **kwargs)
+
+            backend = FastAPICache.get_backend()
+            expire_s = expire or FastAPICache.get_expire()
+            media_type = response_media_type()
+
+            key = FastAPICache.get_key_builder()(
+                func, f'{FastAPICache.get_prefix()}:{namespace}', args=args, kwargs=kwargs
+            )
+            body_key = key if media_type is None else f'{key}:{media_type}'
+
+            cached = await backend.get(body_key)
+
+            if cached is not None:
+                return encoded_response(cached, media_type)
+
+            async def compute() -> bytes:
+                # пока ждали, такой же запрос мог успеть завершиться и попасть в кеш.
+                # Обращение этого запроса к кешу уже посчитано, повторная проверка в статистику не попадает
+                cached = await getattr(backend, 'peek', backend.get)(key)
+
+                if cached is not None:
+                    return cached
+
+                body = render(await func(*args, **kwargs), None)
+                await backend.set(key, body, expire_s)
+
+                return body
+
+            body = await single_flight.do(key, compute)
+
+            if media_type is not None:
+                body = render(orjson.loads(body), media_type)
+                await backend.set(body_key, body, expire_s)
+
+            return encoded_response(body, media_type)
+
+        return inner
+
+    return wrapper
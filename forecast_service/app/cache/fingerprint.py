@@ -0,0 +1,61 @@
+import json
+import hashlib
+from typing import Any
+
+import numpy as np
+from pydantic import BaseModel
+
+from app.schemas import Feature, SeriesReference
+from app.store import series_store
+
+
+def _update(hasher: "hashlib._Hash", part: Any) -> None:
+    # каждую часть предваряем типом, чтобы разные наборы частей не давали одинаковый поток байт
+    if isinstance(part, Feature):
+        hasher.update(b'F')
+        hasher.update(np.asarray(part.values, dtype=np.float64).tobytes())
+        hasher.update('\x00'.join(part.dates).encode())
+
+    elif isinstance(part, SeriesReference):
+        # ссылка на ряд хешируется вместе с версией его файла: после пересборки хранилища ключ другой
+        hasher.update(b'R')
+        for value in (part.dataset_uuid, part.as_of, series_store.version(part.dataset_uuid)):
+            _update(hasher, value)
+
+    elif isinstance(part, BaseModel):
+        hasher.update(b'M')
+        for name, value in part:
+            _update(hasher, name)
+            _update(hasher, value)
+
+    elif isinstance(part, (list, tuple)):
+        # элементы хешируются по отдельности: ряды в списке - по массивам, а не по repr
+        hasher.update(b'L')
+        for item in part:
+            _update(hasher, item)
+
+    elif isinstance(part, dict):
+        hasher.update(b'D')
+        hasher.update(json.dumps(part, sort_keys=True, default=str).encode())
+
+    else:
+        hasher.update(b'S')
+        hasher.update(str(part).encode())
+
+    hasher.update(b'\x01')
+
+
+def fingerprint(*parts: Any) -> str:
+    """
+    Хеш содержимого временных рядов и гиперпараметров
+
+    Ряды хешируются потоково, по массивам значений и дат, без сериализации в json.
+    Ссылки на ряды хранилища - по dataset_uuid, as_of и версии файла ряда
+    """
+
+    hasher = hashlib.blake2b(digest_size=16)
+
+    for part in parts:
+        _update(hasher, part)
+
+    return hasher.hexdigest()
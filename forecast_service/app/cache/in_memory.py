@@ -3,11 +3,18 @@ from typing import AsyncIterator
 
 from fastapi import FastAPI
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.inmemory import InMemoryBackend
+
+from app import config
+
+from .decorator import forecast_key_builder
+from .lru import LRUBackend
 
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
-    FastAPICache.init(InMemoryBackend())
+    FastAPICache.init(
+        LRUBackend(max_bytes=config.CACHE_MAX_BYTES, default_expire=config.CACHE_EXPIRE),
+        expire=config.CACHE_EXPIRE,
+        key_builder=forecast_key_builder
+    )
     yield
-
@@ -0,0 +1,119 @@
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+from fastapi_cache.types import Backend
+
+
+@dataclass
+class _Entry:
+    data: bytes
+    expires_at: float
+    size: int
+
+
+class LRUBackend(Backend):
+    """
+    Бэкенд fastapi_cache с ограничением по памяти
+
+    Записи вытесняются по LRU, когда суммарный размер ключей и значений превышает max_bytes,
+    и удаляются по истечении ttl. Все методы не содержат await, поэтому в рамках одного
+    event loop выполняются атомарно и блокировка не нужна
+    """
+
+    def __init__(self, max_bytes: int, default_expire: Optional[int] = None):
+        self._store: OrderedDict[str, _Entry] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._default_expire = default_expire
+        self._size = 0
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'expirations': self.expirations,
+            'entries': len(self._store),
+            'bytes': self._size,
+            'max_bytes': self._max_bytes,
+        }
+
+    def _pop(self, key: str) -> None:
+        entry = self._store.pop(key)
+        self._size -= entry.size
+
+    def _get(self, key: str, count: bool = True) -> Optional[_Entry]:
+        entry = self._store.get(key)
+
+        if entry is not None and entry.expires_at < time.monotonic():
+            self._pop(key)
+            self.expirations += 1
+            entry = None
+
+        if entry is None:
+            self.misses += count
+            return None
+
+        self._store.move_to_end(key)
+        self.hits += count
+        return entry
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        entry = self._get(key)
+
+        if entry is None:
+            return 0, None
+
+        return int(entry.expires_at - time.monotonic()), entry.data
+
+    async def get(self, key: str) -> Optional[bytes]:
+        entry = self._get(key)
+
+        return None if entry is None else entry.data
+
+    async def peek(self, key: str) -> Optional[bytes]:
+        """Как get, но не попадает в hits и misses: для повторной проверки в рамках того же запроса"""
+
+        entry = self._get(key, count=False)
+
+        return None if entry is None else entry.data
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None) -> None:
+        size = len(key) + len(value)
+
+        if key in self._store:
+            self._pop(key)
+
+        # значение больше всего бюджета не кешируем, иначе оно вытеснит все остальное
+        if size > self._max_bytes:
+            return
+
+        expire = expire or self._default_expire
+        expires_at = time.monotonic() + expire if expire else float('inf')
+
+        self._store[key] = _Entry(data=value, expires_at=expires_at, size=size)
+        self._size += size
+
+        while self._size > self._max_bytes:
+            self._pop(next(iter(self._store)))
+            self.evictions += 1
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        if namespace:
+            keys = [k for k in self._store if k.startswith(namespace)]
+        elif key:
+            keys = [key] if key in self._store else []
+        else:
+            keys = list(self._store)
+
+        for k in keys:
+            self._pop(k)
+
+        return len(keys)
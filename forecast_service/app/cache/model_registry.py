@@ -0,0 +1,264 @@
+import fcntl
+import hashlib
+import os
+import pickle
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from importlib import metadata
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional
+
+from app import config
+
+
+# Код, от которого зависят обученные модели, и библиотеки, которыми они обучены
+_MODEL_CODE = Path(__file__).resolve().parent.parent / 'service'
+_MODEL_LIBRARIES = ('catboost', 'neuralforecast', 'torch', 'numpy', 'pandas')
+
+
+def code_version() -> str:
+    """Хеш кода моделей и версий библиотек. После их изменения модели прошлой версии не загружаются"""
+
+    hasher = hashlib.blake2b(digest_size=8)
+
+    for path in sorted(_MODEL_CODE.rglob('*.py')):
+        hasher.update(str(path.relative_to(_MODEL_CODE)).encode())
+        hasher.update(path.read_bytes())
+
+    for library in _MODEL_LIBRARIES:
+        try:
+            hasher.update(f'{library}=={metadata.version(library)}'.encode())
+        except metadata.PackageNotFoundError:
+            hasher.update(library.encode())
+
+    return hasher.hexdigest()
+
+
+def _size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(directory, name))
+               for directory, _, names in os.walk(path) for name in names)
+
+
+def _pickle_save(obj: Any, path: str) -> None:
+    with open(os.path.join(path, 'model.pkl'), 'wb') as f:
+        pickle.dump(obj, f, protocol=pickle.HIGHEST_PROTOCOL)
+
+
+def _pickle_load(path: str) -> Any:
+    with open(os.path.join(path, 'model.pkl'), 'rb') as f:
+        return pickle.load(f)
+
+
+class ModelRegistry:
+    """
+    Хранилище обученных моделей на локальном диске
+
+    Ключ - fingerprint входных рядов и гиперпараметров, значение - каталог с артефактами модели.
+    Каталог сначала пишется во временный, а затем переименовывается, поэтому процессы пула
+    не видят недописанных моделей. Существующий каталог ключа перезаписывается.
+
+    Каталоги ключей лежат в подкаталоге version, поэтому модели другой версии кода не загружаются.
+    Если каталоги занимают больше max_bytes, после сохранения удаляются те, что дольше всех не загружались
+    и не сохранялись (время изменения каталога обновляется при загрузке). 0 - без ограничения.
+    Каталоги, которые не сохранялись дольше ttl секунд, не загружаются и удаляются. 0 - без срока
+
+    lock(key) - блокировка ключа на файле, общая для всех процессов и воркеров на этом диске
+
+    По умолчанию ошибка сохранения не мешает прогнозу и пропускается, со strict - пробрасывается.
+    Внутри bypass() хранилище для текущего потока как выключенное: модели обучаются заново и не сохраняются
+    """
+
+    def __init__(self, root: str, strict: bool = False, version: str = '', max_bytes: int = 0, ttl: int = 0):
+        self._root = root
+        self._strict = strict
+        self._version = version
+        self._max_bytes = max_bytes
+        self._ttl = ttl
+        self._bypass: ContextVar[bool] = ContextVar(f'registry_bypass_{id(self)}', default=False)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self._root) and not self._bypass.get()
+
+    @property
+    def bypassed(self) -> bool:
+        return self._bypass.get()
+
+    @contextmanager
+    def bypass(self) -> Iterator[None]:
+        token = self._bypass.set(True)
+
+        try:
+            yield
+        finally:
+            self._bypass.reset(token)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._root, self._version, key)
+
+    def _lock_path(self, key: str) -> str:
+        return os.path.join(self._root, f'.lock-{key}')
+
+    @contextmanager
+    def lock(self, key: str) -> Iterator[None]:
+        if not self._root:
+            yield
+            return
+
+        os.makedirs(self._root, exist_ok=True)
+
+        with open(self._lock_path(key), 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _expired(self, path: str) -> bool:
+        try:
+            return bool(self._ttl) and time.time() - os.path.getmtime(path) > self._ttl
+        except OSError:
+            return True
+
+    def load(self, key: str, loader: Callable[[str], Any] = _pickle_load) -> Optional[Any]:
+        if not self.enabled or not os.path.isdir(self._path(key)):
+            return None
+
+        if self._expired(self._path(key)):
+            self._remove(self._path(key))
+            return None
+
+        try:
+            obj = loader(self._path(key))
+        except Exception:
+            # битый или устаревший артефакт - просто переобучим модель
+            return None
+
+        if self._max_bytes:
+            # каталог мог удалить другой процесс, пока модель загружалась
+            try:
+                os.utime(self._path(key))
+            except OSError:
+                pass
+
+        return obj
+
+    def save(self, key: str, obj: Any, saver: Callable[[Any, str], None] = _pickle_save) -> None:
+        if not self.enabled:
+            return
+
+        os.makedirs(os.path.join(self._root, self._version), exist_ok=True)
+        tmp_path = os.path.join(self._root, f'.tmp-{uuid.uuid4().hex}')
+        os.makedirs(tmp_path)
+
+        try:
+            saver(obj, tmp_path)
+            self._swap(tmp_path, self._path(key))
+        except Exception:
+            # диск недоступен - прогноз от этого не зависит, а вот сессия без сохранения потеряет данные
+            if self._strict:
+                raise
+        finally:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+
+        if self._max_bytes or self._ttl:
+            self._prune()
+
+    def _entries(self) -> list[str]:
+        # каталоги ключей всех версий, служебные .tmp- и .old- каталоги не считаются
+        if not self._version:
+            return [entry.path for entry in os.scandir(self._root) if entry.is_dir() and entry.name[0] != '.']
+
+        return [entry.path
+                for version in os.scandir(self._root) if version.is_dir() and version.name[0] != '.'
+                for entry in os.scandir(version.path) if entry.is_dir()]
+
+    def _prune(self) -> None:
+        entries = []
+
+        for path in self._entries():
+            try:
+                entries.append((os.path.getmtime(path), _size(path), path))
+            except OSError:
+                # каталог удалил другой процесс
+                continue
+
+        if self._ttl:
+            expired = [entry for entry in entries if time.time() - entry[0] > self._ttl]
+            for _, _, path in expired:
+                self._remove(path)
+            entries = [entry for entry in entries if entry not in expired]
+
+            # блокировки ключей, которых нет (например, дописывание в несуществующую сессию)
+            for entry in os.scandir(self._root):
+                if (entry.name.startswith('.lock-') and self._expired(entry.path)
+                        and not os.path.isdir(self._path(entry.name[len('.lock-'):]))):
+                    try:
+                        os.remove(entry.path)
+                    except OSError:
+                        pass
+
+        total = sum(size for _, size, _ in entries)
+
+        for _, size, path in sorted(entries):
+            if not self._max_bytes or total <= self._max_bytes:
+                break
+
+            self._remove(path)
+            total -= size
+
+        # пустые каталоги прошлых версий
+        if self._version:
+            for version in os.scandir(self._root):
+                if version.is_dir() and version.name[0] != '.' and version.name != self._version:
+                    try:
+                        os.rmdir(version.path)
+                    except OSError:
+                        pass
+
+    def _swap(self, tmp_path: str, path: str) -> None:
+        # os.replace не заменяет непустой каталог, поэтому старый сначала отодвигается в сторону
+        old_path = None
+
+        if os.path.isdir(path):
+            old_path = os.path.join(self._root, f'.old-{uuid.uuid4().hex}')
+            os.replace(path, old_path)
+
+        try:
+            os.replace(tmp_path, path)
+        except OSError:
+            # каталог ключа успел записать другой процесс - если наш остался в стороне, возвращаем его
+            if old_path is not None and not os.path.exists(path):
+                os.replace(old_path, path)
+                old_path = None
+            raise
+        finally:
+            if old_path is not None:
+                shutil.rmtree(old_path, ignore_errors=True)
+
+    def _remove(self, path: str) -> None:
+        shutil.rmtree(path, ignore_errors=True)
+
+        # файл блокировки удаленного ключа больше не нужен
+        try:
+            os.remove(self._lock_path(os.path.basename(path)))
+        except OSError:
+            pass
+
+    def delete(self, key: str) -> bool:
+        if not self.enabled or not os.path.isdir(self._path(key)):
+            return False
+
+        self._remove(self._path(key))
+
+        return True
+
+
+model_registry = ModelRegistry(config.MODEL_REGISTRY_DIR, version=code_version(),
+                               max_bytes=config.MODEL_REGISTRY_MAX_BYTES)
+
+# Сессии обучения: модель вместе с ее данными, чтобы дописывать новые значения
+session_registry = ModelRegistry(config.SESSION_DIR, strict=True, ttl=config.SESSION_TTL)
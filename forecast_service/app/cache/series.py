@@ -0,0 +1,95 @@
+import threading
+from collections import OrderedDict
+from typing import Callable
+
+import numpy as np
+
+from app import config
+from app.service.data_preprocess import TimeSeries
+
+
+def _nbytes(series: TimeSeries) -> int:
+    return np.asarray(series.values).nbytes + np.asarray(series.dates).nbytes
+
+
+def _freeze(series: TimeSeries) -> TimeSeries:
+    # ряд из кеша получают все запросы процесса, поэтому случайная запись в него должна падать
+    for array in (series.values, series.dates):
+        if isinstance(array, np.ndarray):
+            array.flags.writeable = False
+
+    return series
+
+
+class SeriesCache:
+    """
+    Ряды, посчитанные из входных рядов запроса: помесячные средние ежедневных рядов и производные ряды
+
+    Ключ - хеш содержимого исходных рядов, поэтому ряд, который приходит в запросах разных индексов
+    (курс доллара у ИПП и ИПЦ), усредняется процессом один раз. Записи вытесняются по LRU, когда суммарный
+    размер массивов превышает max_bytes. Ряды из кеша общие и доступны только для чтения
+    """
+
+    def __init__(self, max_bytes: int):
+        self._store: OrderedDict[str, tuple[TimeSeries, int]] = OrderedDict()
+        self._max_bytes = max_bytes
+        self._size = 0
+        # в пуле потоков к кешу обращаются одновременно
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def stats(self) -> dict[str, int]:
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self._store),
+            'bytes': self._size,
+            'max_bytes': self._max_bytes,
+        }
+
+    def get(self, key: str, compute: Callable[[], TimeSeries]) -> TimeSeries:
+        """Ряд из кеша, а если его нет - результат compute, который сохраняется под key"""
+
+        with self._lock:
+            entry = self._store.get(key)
+
+            if entry is not None:
+                self._store.move_to_end(key)
+                self.hits += 1
+                return entry[0]
+
+            self.misses += 1
+
+        # считаем без блокировки: одинаковый ряд в двух потоках посчитается дважды, но одинаково
+        series = compute()
+        size = _nbytes(series)
+
+        if size > self._max_bytes:
+            return series
+
+        series = _freeze(series)
+
+        with self._lock:
+            if key not in self._store:
+                self._store[key] = (series, size)
+                self._size += size
+
+            while self._size > self._max_bytes:
+                _, (_, removed) = self._store.popitem(last=False)
+                self._size -= removed
+                self.evictions += 1
+
+        return series
+
+    def clear(self) -> None:
+        with self._lock:
+            self._store.clear()
+            self._size = 0
+
+
+series_cache = SeriesCache(config.SERIES_CACHE_MAX_BYTES)
@@ -0,0 +1,48 @@
+import asyncio
+from typing import Any, Awaitable, Callable, TypeVar
+
+
+R = TypeVar('R')
+
+
+class SingleFlight:
+    """
+    Объединение одновременных вызовов с одинаковым ключом
+
+    Первый вызов запускает вычисление отдельной задачей, остальные с тем же ключом ждут
+    ее результата (или ошибки), пока она не завершилась. Отмена одного из ожидающих,
+    например при отключении клиента, не отменяет вычисление для остальных
+    """
+
+    def __init__(self):
+        self._inflight: dict[str, asyncio.Task] = {}
+
+        # сколько вызовов получили результат чужого вычисления
+        self.coalesced = 0
+
+    @property
+    def inflight(self) -> int:
+        return len(self._inflight)
+
+    async def do(self, key: str, func: Callable[[], Awaitable[R]]) -> R:
+        task = self._inflight.get(key)
+
+        if task is None:
+            task = asyncio.ensure_future(func())
+            self._inflight[key] = task
+            task.add_done_callback(lambda done: self._finish(key, done))
+        else:
+            self.coalesced += 1
+
+        return await asyncio.shield(task)
+
+    def _finish(self, key: str, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+
+        # ошибку уже получили ожидающие, а если все отключились - не пишем о ней в лог asyncio
+        if not task.cancelled():
+            task.exception()
+
+
+single_flight = SingleFlight()
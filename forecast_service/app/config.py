@@ -17,4 +17,78 @@ APP_NGINX_PREFIX = os.getenv('APP_NGINX_PREFIX',
                              default="/forecast/api"
                              )
 
-BASE_FORECAST_MODEL = os.getenv('BASE_FORECAST_MODEL')
+# Базовая модель для /base: NHITS или RNN
+BASE_FORECAST_MODEL = os.getenv('BASE_FORECAST_MODEL', default='NHITS')
+
+# Включенные бэкенды моделей: base (BASE_FORECAST_MODEL) и catboost. Библиотеки бэкенда импортируются
+# при первом запросе к его модели, запросы к выключенным бэкендам получают 503
+FORECAST_BACKENDS = [backend.strip() for backend in os.getenv('FORECAST_BACKENDS', default='base,catboost').split(',')]
+
+# Пул, в котором выполняется обучение моделей: process или thread
+FORECAST_EXECUTOR = os.getenv('FORECAST_EXECUTOR', default='process')
+
+FORECAST_WORKERS = int(os.getenv('FORECAST_WORKERS', default=os.cpu_count() or 1))
+
+# Способ запуска процессов пула. spawn безопаснее для torch и catboost, чем fork
+FORECAST_MP_CONTEXT = os.getenv('FORECAST_MP_CONTEXT', default='spawn')
+
+# Каталог, в котором хранятся обученные модели. Пустая строка отключает хранилище
+MODEL_REGISTRY_DIR = os.getenv('MODEL_REGISTRY_DIR',
+                               default=os.path.join(os.path.dirname(__file__), '.model_registry')
+                               )
+
+# Бюджет хранилища моделей в байтах: сверх него удаляются модели, которые дольше всех не использовались. 0 - без ограничения
+MODEL_REGISTRY_MAX_BYTES = int(os.getenv('MODEL_REGISTRY_MAX_BYTES', default=2 * 1024 * 1024 * 1024))
+
+# Сколько обученных NHITS моделей каждый процесс держит в памяти, чтобы не загружать их из хранилища. 0 отключает
+NHITS_WARM_MODELS = int(os.getenv('NHITS_WARM_MODELS', default=8))
+
+# Фоновые задачи: сколько задач каждого типа обучается одновременно, сколько может ждать вместе с ними
+# и сколько секунд хранится результат
+JOB_CONCURRENCY_NHITS = int(os.getenv('JOB_CONCURRENCY_NHITS', default=1))
+
+JOB_CONCURRENCY_CATBOOST = int(os.getenv('JOB_CONCURRENCY_CATBOOST', default=FORECAST_WORKERS))
+
+JOB_QUEUE_DEPTH = int(os.getenv('JOB_QUEUE_DEPTH', default=64))
+
+JOB_RESULT_TTL = int(os.getenv('JOB_RESULT_TTL', default=3600))
+
+# Подбор гиперпараметров: больше скольких попыток не запускать и через сколько секунд не начинать новые,
+# даже если запрос просит больше. 0 - без ограничения
+SEARCH_MAX_TRIALS = int(os.getenv('SEARCH_MAX_TRIALS', default=200))
+
+SEARCH_TIMEOUT = float(os.getenv('SEARCH_TIMEOUT', default=600))
+
+# Каталог сессий обучения, в которые можно дописывать новые месяцы данных. Пустая строка отключает сессии
+SESSION_DIR = os.getenv('SESSION_DIR',
+                        default=os.path.join(os.path.dirname(__file__), '.sessions')
+                        )
+
+# Через сколько секунд без изменений сессия удаляется. 0 - сессии хранятся без срока
+SESSION_TTL = int(os.getenv('SESSION_TTL', default=7 * 24 * 3600))
+
+# Токены, с которыми запрос можно профилировать (заголовок X-Profile-Token), через запятую. Пустая строка отключает
+PROFILE_TOKENS = [token for token in os.getenv('PROFILE_TOKENS', default='').split(',') if token]
+
+# Каталог профилей запросов
+PROFILE_DIR = os.getenv('PROFILE_DIR',
+                        default=os.path.join(os.path.dirname(__file__), '.profiles')
+                        )
+
+# Сколько секунд хранятся профили и сколько последних профилей остается в PROFILE_DIR
+PROFILE_TTL = int(os.getenv('PROFILE_TTL', default=24 * 3600))
+
+PROFILE_MAX_FILES = int(os.getenv('PROFILE_MAX_FILES', default=100))
+
+# Бюджет памяти кеша прогнозов в байтах и время жизни записей в секундах
+CACHE_MAX_BYTES = int(os.getenv('CACHE_MAX_BYTES', default=256 * 1024 * 1024))
+
+CACHE_EXPIRE = int(os.getenv('CACHE_EXPIRE', default=3600))
+
+# Бюджет памяти в байтах, в котором каждый процесс держит помесячные и производные ряды (app.cache.series). 0 отключает
+SERIES_CACHE_MAX_BYTES = int(os.getenv('SERIES_CACHE_MAX_BYTES', default=64 * 1024 * 1024))
+
+# Каталог с Arrow файлами временных рядов, на которые можно ссылаться по dataset_uuid
+SERIES_STORE_DIR = os.getenv('SERIES_STORE_DIR',
+                             default=os.path.join(os.path.dirname(__file__), '.series_store')
+                             )
@@ -0,0 +1,4 @@
+from .forecast_interface import BaseForecast, TunableForecast, PreparedData, BacktestFold
+
+
+__all__ = ['BaseForecast', 'TunableForecast', 'PreparedData', 'BacktestFold']
@@ -1,10 +1,57 @@
 from abc import ABC, abstractmethod
+from dataclasses import dataclass
+from typing import Any, Optional
 
+import numpy as np
+
+from app.metrics import timed
 from app.schemas import Feature, BaseHyperparameters, ForecastResponse
 
 
+@dataclass(frozen=True)
+class PreparedData:
+    """Предобработанные данные модели и хеш входных рядов, по которым они построены"""
+
+    fingerprint: str
+    data: Any
+
+
+@dataclass(frozen=True)
+class BacktestFold:
+    """
+    Один проход бэктеста: модели обучены на train_size первых наблюдениях,
+    actual и predict - факт и прогноз по шагам на месяцах после точки отсчета origin
+    """
+
+    origin: np.datetime64
+    train_size: int
+    actual: tuple[np.ndarray, ...]
+    predict: tuple[np.ndarray, ...]
+
+
+# этапы моделей, время которых попадает в метрику forecast_stage_seconds
+STAGES = ('set_data', 'append_data', 'preprocess_features', 'train', 'update', 'predict', 'validation_error',
+          'backtest_fold')
+
+
 class BaseForecast(ABC):
-    """Интерфейс предсказания индекса"""
+    """
+    Интерфейс предсказания индекса
+
+    Этапы STAGES, реализованные наследником, замеряются автоматически. В метриках модель
+    подписывается индексом index, по умолчанию - именем класса
+    """
+
+    index: Optional[str] = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        for stage in STAGES:
+            method = cls.__dict__.get(stage)
+
+            if method is not None and not getattr(method, '__isabstractmethod__', False):
+                setattr(cls, stage, timed(stage, method))
 
     @abstractmethod
     def __init__(self, **hparams: BaseHyperparameters) -> None:
@@ -25,3 +72,42 @@ class BaseForecast(ABC):
     @abstractmethod
     def predict(self) -> ForecastResponse:
         ...
+
+
+class TunableForecast(BaseForecast):
+    """
+    Модель, которую можно обучать на чужих предобработанных данных и подбирать ей гиперпараметры
+
+    Качество оценивается по шагам (validation_steps), чтобы плохие попытки подбора
+    можно было остановить после первых шагов
+    """
+
+    @classmethod
+    def validation_steps(cls, hparams: BaseHyperparameters) -> int:
+        """Сколько шагов у оценки качества модели с такими гиперпараметрами"""
+
+        return 1
+
+    @abstractmethod
+    def prepared(self) -> PreparedData:
+        ...
+
+    @abstractmethod
+    def set_prepared(self, prepared: PreparedData) -> "TunableForecast":
+        ...
+
+    @abstractmethod
+    def validation_error(self, step: int, valid_size: int) -> float:
+        """MAPE на последних valid_size наблюдениях для модели, обученной на предыдущих"""
+        ...
+
+    @abstractmethod
+    def backtest_fold(self, origin: int, test_size: int) -> BacktestFold:
+        """Прогноз по шагам на test_size наблюдениях с номера origin моделями, обученными на наблюдениях до него"""
+        ...
+
+    @staticmethod
+    @abstractmethod
+    def suggest_hparams(trial, hparams: BaseHyperparameters) -> BaseHyperparameters:
+        """Гиперпараметры попытки optuna. Неподбираемые параметры берутся из hparams"""
+        ...
@@ -0,0 +1,8 @@
+from .process_pool import lifespan, run_forecast, run_forecast_batch
+from .search import run_search
+from .backtest import run_backtest
+from .sessions import start_session, append_session, delete_session
+
+
+__all__ = ['lifespan', 'run_forecast', 'run_forecast_batch', 'run_search', 'run_backtest', 'start_session',
+           'append_session', 'delete_session']
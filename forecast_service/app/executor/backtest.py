@@ -0,0 +1,102 @@
+import asyncio
+from functools import partial
+from typing import Optional
+
+import numpy as np
+
+from app.domain.forecast_interface import TunableForecast, PreparedData, BacktestFold
+from app.schemas import BaseHyperparameters, Feature, BacktestSettings, BacktestResponse, HorizonBacktest
+
+from .process_pool import run_in_pool, _run_prepare
+
+
+def _run_fold(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        prepared: PreparedData,
+        origin: int,
+        test_size: int
+) -> BacktestFold:
+    """Один проход бэктеста. Выполняется в процессе пула"""
+
+    return (model_cls(hparams)
+            .set_prepared(prepared)
+            .backtest_fold(origin, test_size))
+
+
+# метрики считаются в процессе сервиса, куда sklearn не импортируется ради быстрого холодного старта
+def _mape(actual: np.ndarray, predict: np.ndarray) -> float:
+    # как sklearn.metrics.mean_absolute_percentage_error
+    return float(np.mean(np.abs(actual - predict) / np.maximum(np.abs(actual), np.finfo(np.float64).eps)))
+
+
+def _r2(actual: np.ndarray, predict: np.ndarray) -> Optional[float]:
+    if len(actual) < 2:
+        return None
+
+    total = np.sum((actual - actual.mean()) ** 2)
+    residual = np.sum((actual - predict) ** 2)
+
+    if total == 0:
+        return None
+
+    return float(1 - residual / total)
+
+
+def _horizons(folds: list[BacktestFold]) -> list[HorizonBacktest]:
+    horizons = []
+
+    for step in range(len(folds[0].actual)):
+        # шаги дальше test_size не проверяются (горизонт NHiTS может быть длиннее окна)
+        if not len(folds[0].actual[step]):
+            continue
+
+        pairs = [(fold.actual[step], fold.predict[step]) for fold in folds]
+
+        actual = np.concatenate([actual for actual, _ in pairs])
+        predict = np.concatenate([predict for _, predict in pairs])
+
+        horizons.append(HorizonBacktest(
+            horizon=step + 1,
+            mape=_mape(actual, predict),
+            r2_score=_r2(actual, predict),
+            fold_mape=[_mape(actual, predict) for actual, predict in pairs],
+            fold_r2_score=[_r2(actual, predict) for actual, predict in pairs]
+        ))
+
+    return horizons
+
+
+async def run_backtest(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        settings: BacktestSettings,
+        **data: Feature
+) -> BacktestResponse:
+    """
+    Бэктест со сдвигающейся точкой отсчета на последних window месяцах
+
+    Данные предобрабатываются один раз. В каждом проходе модели обучаются на наблюдениях
+    до точки отсчета и проверяются на test_size следующих, проходы обучаются в пуле параллельно
+    """
+
+    prepared = await run_in_pool(partial(_run_prepare, model_cls, hparams, data))
+
+    n = len(prepared.data)
+    if n <= settings.window:
+        raise ValueError(f'Для бэктеста на {settings.window} месяцах нужно больше наблюдений, есть {n}')
+
+    origins = range(n - settings.window, n - settings.test_size + 1, settings.step)
+    if not origins:
+        raise ValueError(f'test_size = {settings.test_size} не помещается в window = {settings.window}')
+
+    folds = await asyncio.gather(*(
+        run_in_pool(partial(_run_fold, model_cls, hparams, prepared, origin, settings.test_size))
+        for origin in origins
+    ))
+
+    return BacktestResponse(
+        origins=[fold.origin.astype('datetime64[D]').item().strftime('%d.%m.%Y') for fold in folds],
+        train_sizes=[fold.train_size for fold in folds],
+        horizons=_horizons(folds)
+    )
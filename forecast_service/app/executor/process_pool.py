@@ -0,0 +1,200 @@
+import asyncio
+import multiprocessing
+from contextlib import asynccontextmanager
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import AsyncIterator, Callable, Optional, Sequence, TypeVar
+
+from fastapi import FastAPI
+
+from app import config
+from app.metrics import TRAININGS_IN_PROGRESS, WorkerSamples, collect_samples, merge_samples
+from app.profiling import current_profile, profile_call
+from app.domain.forecast_interface import BaseForecast, TunableForecast, PreparedData
+from app.schemas import BaseHyperparameters, Feature, ForecastResponse
+
+
+R = TypeVar('R')
+
+_executor: Optional[Executor] = None
+
+
+def _create_executor() -> Executor:
+    if config.FORECAST_EXECUTOR == 'thread':
+        return ThreadPoolExecutor(max_workers=config.FORECAST_WORKERS)
+
+    if config.FORECAST_EXECUTOR == 'process':
+        return ProcessPoolExecutor(
+            max_workers=config.FORECAST_WORKERS,
+            mp_context=multiprocessing.get_context(config.FORECAST_MP_CONTEXT)
+        )
+
+    raise ValueError(f'Неизвестный тип пула: {config.FORECAST_EXECUTOR =}')
+
+
+def get_executor() -> Executor:
+    global _executor
+
+    if _executor is None:
+        _executor = _create_executor()
+
+    return _executor
+
+
+def shutdown_executor(executor: Optional[Executor] = None, wait: bool = True) -> None:
+    """
+    Останавливает пул, следующий запрос создаст новый
+
+    С executor - только если он все еще текущий: упавший пул мог уже пересоздать другой запрос
+    """
+
+    global _executor
+
+    if executor is None:
+        executor = _executor
+    elif executor is not _executor:
+        return
+
+    if executor is not None:
+        _executor = None
+        executor.shutdown(wait=wait, cancel_futures=True)
+
+
+async def run_in_pool(func: Callable[[], R]) -> R:
+    """
+    Выполняет func в пуле. Если пул упал, он заменяется новым для следующих задач
+
+    Замеры этапов моделей, сделанные в процессе пула, возвращаются вместе с результатом
+    (или с ошибкой) и попадают в метрики процесса сервиса. Если запрос профилируется, задача выполняется
+    под cProfile и ее статистика добавляется в профиль запроса
+    """
+
+    loop = asyncio.get_running_loop()
+    profile = current_profile()
+
+    if profile is not None:
+        func = partial(profile_call, func, cold=profile.cold)
+
+    executor = get_executor()
+
+    try:
+        with TRAININGS_IN_PROGRESS.track_inprogress():
+            result, samples = await loop.run_in_executor(executor, partial(collect_samples, func))
+    except BrokenProcessPool:
+        # процесс пула упал (например, по памяти): пересоздаем пул для следующих запросов.
+        # Ждать остановки упавшего пула в event loop не нужно
+        shutdown_executor(executor, wait=False)
+        raise
+    except Exception as e:
+        # замеры этапов, выполненных до ошибки
+        samples = getattr(e, 'worker_samples', None)
+        if isinstance(samples, WorkerSamples):
+            merge_samples(samples)
+        raise
+
+    merge_samples(samples)
+
+    if profile is not None:
+        result, stats = result
+        profile.add(stats)
+
+    return result
+
+
+def _run_pipeline(
+        model_cls: type[BaseForecast],
+        hparams: BaseHyperparameters,
+        data: dict[str, Feature]
+) -> ForecastResponse:
+    """Весь пайплайн модели. Выполняется в процессе пула, поэтому должен быть на уровне модуля"""
+
+    return (model_cls(hparams)
+            .set_data(**data)
+            .preprocess_features()
+            .train()
+            .predict())
+
+
+async def run_forecast(
+        model_cls: type[BaseForecast],
+        hparams: BaseHyperparameters,
+        **data: Feature
+) -> ForecastResponse:
+    """Обучает модель и делает прогноз вне event loop, не блокируя остальные запросы"""
+
+    return await run_in_pool(partial(_run_pipeline, model_cls, hparams, data))
+
+
+def _run_prepare(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        data: dict[str, Feature]
+) -> PreparedData:
+    """Только предобработка данных, без обучения"""
+
+    return (model_cls(hparams)
+            .set_data(**data)
+            .preprocess_features()
+            .prepared())
+
+
+def _run_fit(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        prepared: PreparedData
+) -> ForecastResponse:
+    """Обучение и прогноз на уже предобработанных данных"""
+
+    return (model_cls(hparams)
+            .set_prepared(prepared)
+            .train()
+            .predict())
+
+
+async def run_forecast_batch(
+        model_cls: type[TunableForecast],
+        hparams: Sequence[BaseHyperparameters],
+        **data: Feature
+) -> AsyncIterator[tuple[int, ForecastResponse]]:
+    """
+    Прогнозы по одним данным для нескольких наборов гиперпараметров
+
+    Данные предобрабатываются один раз, после чего модели обучаются в пуле параллельно.
+    Отдает пары (номер набора гиперпараметров, прогноз) по мере готовности.
+    Одинаковые наборы обучаются один раз
+    """
+
+    # номера наборов для каждого различного набора гиперпараметров
+    positions: dict[str, list[int]] = {}
+    for i, params in enumerate(hparams):
+        positions.setdefault(params.model_dump_json(), []).append(i)
+
+    async def fit(key: str, prepared: PreparedData) -> tuple[str, ForecastResponse]:
+        params = hparams[positions[key][0]]
+
+        return key, await run_in_pool(partial(_run_fit, model_cls, params, prepared))
+
+    tasks = []
+
+    try:
+        prepared = await run_in_pool(partial(_run_prepare, model_cls, hparams[0], data))
+
+        tasks = [asyncio.ensure_future(fit(key, prepared)) for key in positions]
+
+        for task in asyncio.as_completed(tasks):
+            key, response = await task
+
+            for i in positions[key]:
+                yield i, response
+    finally:
+        # клиент отключился или обучение упало - остальные модели уже не нужны
+        for task in tasks:
+            task.cancel()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    get_executor()
+    yield
+    shutdown_executor()
@@ -0,0 +1,160 @@
+import asyncio
+import warnings
+from concurrent.futures.process import BrokenProcessPool
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+
+from app import config
+from app.domain.forecast_interface import TunableForecast, PreparedData
+from app.schemas import BaseHyperparameters, Feature, SearchResponse, SearchSettings
+
+from .process_pool import run_in_pool, _run_prepare, _run_fit
+
+if TYPE_CHECKING:
+    # optuna импортируется при первом подборе, при старте приложения он не нужен
+    import optuna
+    from optuna.trial import Trial
+
+
+def _run_validation(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        prepared: PreparedData,
+        step: int,
+        valid_size: int
+) -> float:
+    """Ошибка одного шага оценки качества. Выполняется в процессе пула"""
+
+    return (model_cls(hparams)
+            .set_prepared(prepared)
+            .validation_error(step, valid_size))
+
+
+def _searched_params(model_cls: type[TunableForecast], hparams: BaseHyperparameters) -> dict:
+    """Значения из hparams только для параметров, которые подбирает suggest_hparams модели"""
+
+    from optuna.trial import FixedTrial
+
+    trial = FixedTrial(hparams.model_dump())
+
+    # значение вне диапазона подбора не ошибка: первая попытка все равно пробует гиперпараметры из запроса
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model_cls.suggest_hparams(trial, hparams)
+
+    return trial.params
+
+
+def _limits(settings: SearchSettings) -> tuple[int, Optional[float]]:
+    """Число попыток и время подбора с ограничениями SEARCH_MAX_TRIALS и SEARCH_TIMEOUT"""
+
+    n_trials = min(settings.n_trials, config.SEARCH_MAX_TRIALS) if config.SEARCH_MAX_TRIALS else settings.n_trials
+    timeouts = [t for t in (settings.timeout, config.SEARCH_TIMEOUT) if t]
+
+    return n_trials, min(timeouts, default=None)
+
+
+async def _search(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        settings: SearchSettings,
+        prepared: PreparedData
+) -> "optuna.Study":
+    import optuna
+    from optuna.pruners import MedianPruner
+    from optuna.samplers import TPESampler
+    from optuna.trial import TrialState
+
+    optuna.logging.set_verbosity(optuna.logging.WARNING)
+
+    loop = asyncio.get_running_loop()
+
+    study = optuna.create_study(
+        direction='minimize',
+        # constant_liar - параллельные попытки не сэмплируют одни и те же точки
+        sampler=TPESampler(seed=settings.seed, constant_liar=True),
+        pruner=MedianPruner(n_startup_trials=5)
+    )
+    # первой пробуем гиперпараметры из запроса
+    study.enqueue_trial(_searched_params(model_cls, hparams))
+
+    n_trials, timeout = _limits(settings)
+    deadline = None if timeout is None else loop.time() + timeout
+    started = 0
+
+    async def evaluate(trial: "Trial") -> float:
+        params = model_cls.suggest_hparams(trial, hparams)
+        errors = []
+
+        for step in range(model_cls.validation_steps(params)):
+            errors.append(await run_in_pool(
+                partial(_run_validation, model_cls, params, prepared, step, settings.valid_size)
+            ))
+
+            # после каждого шага сравниваем с остальными попытками: плохие дальше не обучаем
+            trial.report(sum(errors) / len(errors), step)
+            if trial.should_prune():
+                raise optuna.TrialPruned()
+
+        return sum(errors) / len(errors)
+
+    async def worker():
+        nonlocal started
+
+        # ask и tell вызываются только из event loop, поэтому study не нужна блокировка
+        while started < n_trials and (deadline is None or loop.time() < deadline):
+            started += 1
+            trial = study.ask()
+
+            try:
+                study.tell(trial, await evaluate(trial))
+            except optuna.TrialPruned:
+                study.tell(trial, state=TrialState.PRUNED)
+            except BrokenProcessPool:
+                raise
+            except Exception:
+                # например, CatBoost не смог обучиться на таких параметрах
+                study.tell(trial, state=TrialState.FAIL)
+
+    await asyncio.gather(*(worker() for _ in range(settings.n_jobs or config.FORECAST_WORKERS)))
+
+    return study
+
+
+async def run_search(
+        model_cls: type[TunableForecast],
+        hparams: BaseHyperparameters,
+        settings: SearchSettings,
+        **data: Feature
+) -> SearchResponse:
+    """
+    Подбор гиперпараметров optuna
+
+    Данные предобрабатываются один раз, попытки идут параллельно в пуле. Качество
+    оценивается на последних valid_size месяцах по шагам модели, после каждого шага
+    попытка может быть остановлена. Лучшая модель обучается на всех данных
+    """
+
+    from optuna.trial import FixedTrial, TrialState
+
+    prepared = await run_in_pool(partial(_run_prepare, model_cls, hparams, data))
+
+    if len(prepared.data) <= settings.valid_size:
+        raise ValueError(f'Для оценки качества нужно больше {settings.valid_size} наблюдений, есть {len(prepared.data)}')
+
+    study = await _search(model_cls, hparams, settings, prepared)
+
+    finished = study.get_trials(deepcopy=False, states=(TrialState.COMPLETE,))
+    if not finished:
+        raise ValueError('Ни одна попытка подбора не завершилась')
+
+    best = model_cls.suggest_hparams(FixedTrial(study.best_params), hparams)
+    response = await run_in_pool(partial(_run_fit, model_cls, best, prepared))
+
+    return SearchResponse(
+        hparams=best,
+        valid_mape=study.best_value,
+        n_trials=len(finished),
+        n_pruned=len(study.get_trials(deepcopy=False, states=(TrialState.PRUNED,))),
+        response=response
+    )
@@ -0,0 +1,84 @@
+import asyncio
+import uuid
+from functools import partial
+from typing import TYPE_CHECKING, Optional
+from weakref import WeakValueDictionary
+
+from app.cache import session_registry
+from app.schemas import CatBoostHyperparameters, Feature, ForecastResponse
+
+from .process_pool import run_in_pool
+
+if TYPE_CHECKING:
+    # модуль моделей тянет catboost, при импорте приложения он не нужен
+    from app.service.forecast_models import CatBoostForecast
+
+
+# Добавления в одну сессию выполняются по очереди, иначе одно из них потеряется. Блокировка asyncio
+# не занимает процессы пула ожиданием, блокировка файла в _run_append - общая для воркеров uvicorn
+_locks: "WeakValueDictionary[str, asyncio.Lock]" = WeakValueDictionary()
+
+
+def _run_start(
+        session_id: str,
+        model_cls: type["CatBoostForecast"],
+        hparams: CatBoostHyperparameters,
+        data: dict[str, Feature]
+) -> ForecastResponse:
+    model = (model_cls(hparams)
+             .set_data(**data)
+             .preprocess_features()
+             .train())
+
+    session_registry.save(session_id, model)
+
+    return model.predict()
+
+
+def _run_append(session_id: str, refit: bool, data: dict[str, Feature]) -> Optional[ForecastResponse]:
+    with session_registry.lock(session_id):
+        model: Optional["CatBoostForecast"] = session_registry.load(session_id)
+
+        if model is None:
+            return None
+
+        model = (model
+                 .append_data(**data)
+                 .preprocess_features()
+                 .update(refit=refit))
+
+        session_registry.save(session_id, model)
+
+    return model.predict()
+
+
+async def start_session(
+        model_cls: type["CatBoostForecast"],
+        hparams: CatBoostHyperparameters,
+        **data: Feature
+) -> tuple[str, ForecastResponse]:
+    """Обучает модель как обычный прогноз и сохраняет ее вместе с данными под новым номером сессии"""
+
+    if not session_registry.enabled:
+        raise RuntimeError('Сессии отключены: не задан SESSION_DIR')
+
+    session_id = uuid.uuid4().hex
+
+    return session_id, await run_in_pool(partial(_run_start, session_id, model_cls, hparams, data))
+
+
+async def append_session(session_id: str, refit: bool = False, **data: Feature) -> Optional[ForecastResponse]:
+    """
+    Дописывает новые значения рядов в сессию и обновляет ее модели
+
+    Возвращает прогноз по обновленным моделям или None, если сессии нет
+    """
+
+    lock = _locks.setdefault(session_id, asyncio.Lock())
+
+    async with lock:
+        return await run_in_pool(partial(_run_append, session_id, refit, data))
+
+
+def delete_session(session_id: str) -> bool:
+    return session_registry.delete(session_id)
@@ -0,0 +1,4 @@
+from .queue import Job, JobQueue, QueueFull, job_queue, lifespan
+
+
+__all__ = ['Job', 'JobQueue', 'QueueFull', 'job_queue', 'lifespan']
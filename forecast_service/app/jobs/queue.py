@@ -0,0 +1,127 @@
+import asyncio
+import time
+import uuid
+from collections import Counter
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional
+
+from fastapi import FastAPI
+
+from app import config
+from app.schemas import JobStatus
+
+
+class QueueFull(Exception):
+    """В очереди задач этого типа нет места"""
+
+
+@dataclass
+class Job:
+    id: str
+    kind: str
+    status: JobStatus = JobStatus.queued
+    created: float = field(default_factory=time.time)
+    started: Optional[float] = None
+    finished: Optional[float] = None
+    result: Any = None
+    error: Optional[str] = None
+    task: Optional[asyncio.Task] = field(default=None, repr=False)
+
+
+class JobQueue:
+    """
+    Очередь фоновых задач внутри процесса сервиса
+
+    Для каждого типа задач задается, сколько их выполняется одновременно и сколько может
+    ждать вместе с выполняемыми. Сами вычисления идут в пуле executor, очередь только
+    ограничивает, сколько задач туда попадает. Результаты хранятся ttl секунд после завершения
+    """
+
+    def __init__(self, limits: dict[str, tuple[int, int]], ttl: float):
+        self._limits = limits
+        self._ttl = ttl
+
+        self._semaphores = {kind: asyncio.Semaphore(concurrency) for kind, (concurrency, _) in limits.items()}
+        self._pending: Counter[str] = Counter()
+        self._jobs: dict[str, Job] = {}
+
+    def submit(self, kind: str, factory: Callable[[], Awaitable[Any]]) -> Job:
+        """Ставит в очередь задачу factory() и сразу возвращает ее. QueueFull - если очередь заполнена"""
+
+        self._expire()
+
+        _, depth = self._limits[kind]
+        if self._pending[kind] >= depth:
+            raise QueueFull(kind)
+
+        job = Job(id=uuid.uuid4().hex, kind=kind)
+
+        self._jobs[job.id] = job
+        self._pending[kind] += 1
+        job.task = asyncio.create_task(self._run(job, factory))
+
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        self._expire()
+
+        return self._jobs.get(job_id)
+
+    @property
+    def kinds(self) -> tuple[str, ...]:
+        return tuple(self._limits)
+
+    def pending(self, kind: str) -> int:
+        """Сколько задач типа kind ждет или выполняется"""
+
+        return self._pending[kind]
+
+    async def _run(self, job: Job, factory: Callable[[], Awaitable[Any]]) -> None:
+        try:
+            async with self._semaphores[job.kind]:
+                job.status = JobStatus.running
+                job.started = time.time()
+
+                job.result = await factory()
+                job.status = JobStatus.done
+        except asyncio.CancelledError:
+            job.status = JobStatus.failed
+            job.error = 'Задача отменена'
+            raise
+        except Exception as e:
+            job.status = JobStatus.failed
+            job.error = f'{type(e).__name__}: {e}'
+        finally:
+            job.finished = time.time()
+            job.task = None
+            self._pending[job.kind] -= 1
+
+    def _expire(self) -> None:
+        deadline = time.time() - self._ttl
+
+        for job_id in [j.id for j in self._jobs.values() if j.finished is not None and j.finished < deadline]:
+            del self._jobs[job_id]
+
+    async def shutdown(self) -> None:
+        tasks = [job.task for job in self._jobs.values() if job.task is not None]
+
+        for task in tasks:
+            task.cancel()
+
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+job_queue = JobQueue(
+    limits={
+        'nhits': (config.JOB_CONCURRENCY_NHITS, config.JOB_QUEUE_DEPTH),
+        'catboost': (config.JOB_CONCURRENCY_CATBOOST, config.JOB_QUEUE_DEPTH),
+    },
+    ttl=config.JOB_RESULT_TTL
+)
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    yield
+    await job_queue.shutdown()
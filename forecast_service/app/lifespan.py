@@ -0,0 +1,16 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from fastapi import FastAPI
+
+from app.cache import lifespan as cache_lifespan
+from app.executor import lifespan as executor_lifespan
+from app.jobs import lifespan as jobs_lifespan
+from app.store import lifespan as store_lifespan
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # задачи останавливаются раньше пула, в котором они выполняются
+    async with cache_lifespan(app), store_lifespan(app), executor_lifespan(app), jobs_lifespan(app):
+        yield
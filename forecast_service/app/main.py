@@ -3,7 +3,8 @@ from fastapi.middleware.cors import CORSMiddleware
 from fastapi.openapi.utils import get_openapi
 
 from app.api.v1 import router_v1
-from app.cache import lifespan
+from app.lifespan import lifespan
+from app.metrics import PayloadSizeMiddleware
 
 from . import config
 
@@ -24,6 +25,8 @@ forecast_service.add_middleware(
     allow_headers=["*"],
 )
 
+forecast_service.add_middleware(PayloadSizeMiddleware)
+
 forecast_service.include_router(router_v1, prefix='/v1')
 
 forecast_service.openapi_schema = get_openapi(
@@ -0,0 +1,12 @@
+from prometheus_client import REGISTRY
+
+from .collector import ServiceCollector
+from .middleware import PayloadSizeMiddleware
+from .stages import WorkerSamples, collect_samples, merge_samples, observe_stage, timed, TRAININGS_IN_PROGRESS
+
+
+REGISTRY.register(ServiceCollector())
+
+
+__all__ = ['PayloadSizeMiddleware', 'ServiceCollector', 'WorkerSamples', 'collect_samples', 'merge_samples',
+           'observe_stage', 'timed', 'TRAININGS_IN_PROGRESS']
@@ -0,0 +1,53 @@
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
+from prometheus_client.registry import Collector
+from fastapi_cache import FastAPICache
+
+from app.cache import LRUBackend, single_flight
+from app.jobs import job_queue
+
+from .stages import peak_rss
+
+
+class ServiceCollector(Collector):
+    """Метрики, которые читаются из состояния сервиса в момент запроса /metrics"""
+
+    def collect(self):
+        try:
+            backend = FastAPICache.get_backend()
+        except AssertionError:
+            # кеш еще не инициализирован
+            backend = None
+
+        if isinstance(backend, LRUBackend):
+            stats = backend.stats
+
+            lookups = CounterMetricFamily('forecast_cache_lookups', 'Обращения к кешу прогнозов', labels=['result'])
+            lookups.add_metric(['hit'], stats['hits'])
+            lookups.add_metric(['miss'], stats['misses'])
+            yield lookups
+
+            removed = CounterMetricFamily('forecast_cache_removed', 'Удаленные записи кеша', labels=['reason'])
+            removed.add_metric(['eviction'], stats['evictions'])
+            removed.add_metric(['expiration'], stats['expirations'])
+            yield removed
+
+            yield GaugeMetricFamily('forecast_cache_entries', 'Записей в кеше', value=stats['entries'])
+            yield GaugeMetricFamily('forecast_cache_bytes', 'Размер кеша в байтах', value=stats['bytes'])
+
+        yield CounterMetricFamily(
+            'forecast_requests_coalesced',
+            'Запросы, получившие результат такого же одновременного запроса',
+            value=single_flight.coalesced
+        )
+        yield GaugeMetricFamily(
+            'forecast_single_flight_in_progress',
+            'Различные прогнозы, которые сейчас вычисляются',
+            value=single_flight.inflight
+        )
+
+        pending = GaugeMetricFamily('forecast_jobs_pending', 'Фоновые задачи, которые ждут или выполняются', labels=['kind'])
+        for kind in job_queue.kinds:
+            pending.add_metric([kind], job_queue.pending(kind))
+        yield pending
+
+        yield GaugeMetricFamily('forecast_peak_rss_bytes', 'Пиковый RSS процесса сервиса', value=peak_rss())
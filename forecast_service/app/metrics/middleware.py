@@ -0,0 +1,50 @@
+from prometheus_client import Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+PAYLOAD_BYTES = Histogram(
+    'forecast_payload_bytes',
+    'Размер тела запроса и ответа',
+    ['route', 'direction'],
+    buckets=(1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216)
+)
+
+
+class PayloadSizeMiddleware:
+    """
+    Размеры тел запросов и ответов по маршрутам
+
+    Считаются прочитанные и отправленные байты, поэтому учитываются и запросы без Content-Length,
+    и потоковые ответы. Запросы, не попавшие ни в один маршрут, не учитываются
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope['type'] != 'http':
+            await self.app(scope, receive, send)
+            return
+
+        sizes = {'request': 0, 'response': 0}
+
+        async def counting_receive() -> Message:
+            message = await receive()
+            if message['type'] == 'http.request':
+                sizes['request'] += len(message.get('body', b''))
+            return message
+
+        async def counting_send(message: Message) -> None:
+            if message['type'] == 'http.response.body':
+                sizes['response'] += len(message.get('body', b''))
+            await send(message)
+
+        try:
+            await self.app(scope, counting_receive, counting_send)
+        finally:
+            # маршрут FastAPI записывает в scope при сопоставлении пути
+            route = scope.get('route')
+
+            if route is not None:
+                for direction, size in sizes.items():
+                    PAYLOAD_BYTES.labels(route.path, direction).observe(size)
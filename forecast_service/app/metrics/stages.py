@@ -0,0 +1,108 @@
+import resource
+import threading
+import time
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, TypeVar
+
+from prometheus_client import Gauge, Histogram
+
+
+R = TypeVar('R')
+
+STAGE_SECONDS = Histogram(
+    'forecast_stage_seconds',
+    'Время этапа пайплайна модели',
+    ['index', 'stage'],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+)
+
+WORKER_PEAK_RSS = Gauge(
+    'forecast_worker_peak_rss_bytes',
+    'Наибольший пиковый RSS среди процессов пула, выполнявших задачи'
+)
+
+TRAININGS_IN_PROGRESS = Gauge(
+    'forecast_trainings_in_progress',
+    'Задачи пула (обучение, предобработка, оценка качества), которые сейчас выполняются'
+)
+
+# замеры этапов в текущем потоке, пока выполняется collect_samples
+_local = threading.local()
+
+_worker_peak_rss = 0
+
+
+@dataclass
+class WorkerSamples:
+    """Замеры, сделанные в процессе пула, для переноса в метрики процесса сервиса"""
+
+    stages: list[tuple[str, str, float]] = field(default_factory=list)
+    peak_rss: int = 0
+
+
+def peak_rss() -> int:
+    # на linux ru_maxrss в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def observe_stage(index: str, stage: str, seconds: float) -> None:
+    samples = getattr(_local, 'samples', None)
+
+    if samples is None:
+        STAGE_SECONDS.labels(index, stage).observe(seconds)
+    else:
+        samples.stages.append((index, stage, seconds))
+
+
+def timed(stage: str, method: Callable[..., R]) -> Callable[..., R]:
+    """Метод модели, время которого попадает в forecast_stage_seconds с индексом модели"""
+
+    @wraps(method)
+    def inner(self, *args: Any, **kwargs: Any) -> R:
+        start = time.perf_counter()
+
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            observe_stage(type(self).index or type(self).__name__, stage, time.perf_counter() - start)
+
+    return inner
+
+
+def _take_samples() -> WorkerSamples:
+    samples, _local.samples = _local.samples, None
+    samples.peak_rss = peak_rss()
+
+    return samples
+
+
+def collect_samples(func: Callable[[], R]) -> tuple[R, WorkerSamples]:
+    """
+    Выполняет func и возвращает результат вместе с замерами этапов
+
+    Вызывается в процессе пула: метрики процесса пула сервис не видит, поэтому замеры
+    возвращаются вместе с результатом и переносятся в метрики сервиса через merge_samples.
+    Если func упала, замеры до ошибки передаются в ее атрибуте worker_samples
+    """
+
+    _local.samples = WorkerSamples()
+
+    try:
+        result = func()
+    except BaseException as e:
+        # исключение вернется из процесса пула вместе со своими атрибутами
+        e.worker_samples = _take_samples()
+        raise
+
+    return result, _take_samples()
+
+
+def merge_samples(samples: WorkerSamples) -> None:
+    global _worker_peak_rss
+
+    for index, stage, seconds in samples.stages:
+        STAGE_SECONDS.labels(index, stage).observe(seconds)
+
+    _worker_peak_rss = max(_worker_peak_rss, samples.peak_rss)
+    WORKER_PEAK_RSS.set(_worker_peak_rss)
@@ -0,0 +1,4 @@
+from .profiler import RequestProfile, current_profile, profile_call, profile_path, prune_profiles, start_profile
+
+
+__all__ = ['RequestProfile', 'current_profile', 'profile_call', 'profile_path', 'prune_profiles', 'start_profile']
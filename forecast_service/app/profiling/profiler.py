@@ -0,0 +1,118 @@
+import cProfile
+import glob
+import os
+import pstats
+import time
+import uuid
+from contextlib import nullcontext
+from contextvars import ContextVar
+from typing import Any, Callable, Optional, TypeVar
+
+from app import config
+
+
+R = TypeVar('R')
+
+
+class _RawStats:
+    """Статистика cProfile из процесса пула в виде, который принимает pstats.Stats"""
+
+    def __init__(self, stats: dict):
+        self.stats = stats
+
+    def create_stats(self) -> None:
+        pass
+
+
+class RequestProfile:
+    """
+    Профиль одного запроса
+
+    Собирается из профилей задач пула, выполненных для запроса, и после каждой задачи
+    сохраняется в PROFILE_DIR/<id>.pstats. С cold задачи не берут модели из хранилища
+    и памяти процесса, поэтому в профиль попадает обучение
+    """
+
+    def __init__(self, cold: bool = False):
+        self.id = uuid.uuid4().hex
+        self.cold = cold
+        self._stats: Optional[pstats.Stats] = None
+
+    @property
+    def path(self) -> str:
+        return profile_path(self.id)
+
+    def add(self, stats: dict) -> None:
+        if self._stats is None:
+            self._stats = pstats.Stats(_RawStats(stats))
+        else:
+            self._stats.add(_RawStats(stats))
+
+        os.makedirs(config.PROFILE_DIR, exist_ok=True)
+        self._stats.dump_stats(self.path)
+
+
+_current: ContextVar[Optional[RequestProfile]] = ContextVar('request_profile', default=None)
+
+
+def profile_path(profile_id: str) -> str:
+    return os.path.join(config.PROFILE_DIR, f'{profile_id}.pstats')
+
+
+def current_profile() -> Optional[RequestProfile]:
+    """Профиль текущего запроса или None, если запрос не профилируется"""
+
+    return _current.get()
+
+
+def prune_profiles() -> None:
+    """Удаляет профили старше PROFILE_TTL и самые старые сверх PROFILE_MAX_FILES"""
+
+    paths = []
+
+    for path in glob.glob(os.path.join(config.PROFILE_DIR, '*.pstats')):
+        try:
+            paths.append((os.path.getmtime(path), path))
+        except OSError:
+            continue
+
+    paths.sort(reverse=True)
+    expired = time.time() - config.PROFILE_TTL
+
+    for i, (mtime, path) in enumerate(paths):
+        if i >= config.PROFILE_MAX_FILES or mtime < expired:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+
+def start_profile(cold: bool = False) -> RequestProfile:
+    """Включает профилирование для текущего запроса и задач, которые он запустит"""
+
+    prune_profiles()
+
+    profile = RequestProfile(cold=cold)
+    _current.set(profile)
+
+    return profile
+
+
+def profile_call(func: Callable[[], R], cold: bool = False) -> tuple[R, dict[Any, Any]]:
+    """
+    Выполняет func под cProfile. Вызывается в процессе пула, статистика возвращается вместе с результатом
+
+    С cold хранилище моделей на время вызова выключено
+    """
+
+    # app.cache импортирует app.profiling, поэтому хранилище импортируется при вызове
+    from app.cache import model_registry
+
+    profiler = cProfile.Profile()
+
+    with model_registry.bypass() if cold else nullcontext():
+        result = profiler.runcall(func)
+
+    profiler.create_stats()
+
+    return result, profiler.stats
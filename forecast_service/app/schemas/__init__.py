@@ -1,12 +1,19 @@
 from .io.response import ForecastResponse, FeatureResponse, IPPFeaturesResponse, IPCFeaturesResponse, FeaturesResponse, \
-    ORTFeaturesResponse
-from .io.request import FeatureRequest, IPPRequestCB, BaseRequest, IPCRequestCB
+    ORTFeaturesResponse, BatchForecastItem, BatchForecastResponse, SearchResponse, \
+    SessionResponse, JobResponse, HorizonBacktest, BacktestResponse, PredictionInterval, \
+    MultiSeriesForecastResponse
+from .io.request import FeatureRequest, IPPRequestCB, BaseRequest, IPCRequestCB, ORTRequestCB, \
+    IPPBatchRequestCB, IPCBatchRequestCB, ORTBatchRequestCB, \
+    BaseSearchRequest, IPPSearchRequestCB, IPCSearchRequestCB, ORTSearchRequestCB, AppendRequest, \
+    BaseBacktestRequest, IPPBacktestRequestCB, IPCBacktestRequestCB, ORTBacktestRequestCB, \
+    BaseMultiRequest
 
-from .ml.features import Feature, IPPFeatures
-from .ml.params import BaseHyperparameters, RNNHyperparameters, CatBoostHyperparameters
+from .ml.features import Feature, SeriesReference, FeatureSource, IPPFeatures
+from .ml.params import BaseHyperparameters, RNNHyperparameters, CatBoostHyperparameters, NHiTSHyperparameters, \
+    SearchSettings, CatBoostMode, BacktestSettings
 from .ml.scores import ModelScore
 
-from .common import ConfidenceIntervalEnum, ReadyOnModels
+from .common import ConfidenceIntervalEnum, ReadyOnModels, JobStatus
 
 
 # Соответствие между готовыми моделями и их признаками
@@ -8,6 +8,21 @@ class ConfidenceIntervalEnum(str, Enum):
     medium = '95%'
     hight = '99%'
 
+    @property
+    def level(self) -> int:
+        """Вероятность покрытия в процентах"""
+
+        return int(self.value.rstrip('%'))
+
+
+class JobStatus(str, Enum):
+    """Состояние фоновой задачи"""
+
+    queued = 'queued'
+    running = 'running'
+    done = 'done'
+    failed = 'failed'
+
 
 class ReadyOnModels(str, Enum):
     """Индексы для которых готовы модели машинного обучения"""
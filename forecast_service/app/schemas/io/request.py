@@ -1,7 +1,7 @@
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, conlist
 
-from app.schemas.ml.params import CatBoostHyperparameters, NHiTSHyperparameters
-from app.schemas.ml.features import Feature, IPPFeatures, IPCFeatures, ORTFeatures
+from app.schemas.ml.params import CatBoostHyperparameters, NHiTSHyperparameters, SearchSettings, BacktestSettings
+from app.schemas.ml.features import Feature, FeatureSource, IPPFeatures, IPCFeatures, ORTFeatures
 
 
 class FeatureRequest(BaseModel):
@@ -21,7 +21,7 @@ class BaseRequest(BaseModel):
     """
 
     hparams: NHiTSHyperparameters
-    target: Feature = Field(None, description="Переменная для предсказания")
+    target: FeatureSource = Field(None, description="Переменная для предсказания")
 
 
 class IPPRequestCB(BaseModel):
@@ -35,7 +35,7 @@ class IPPRequestCB(BaseModel):
     """
 
     hparams: CatBoostHyperparameters
-    ipp: Feature = Field(None, description="Индекс промышленного производства")
+    ipp: FeatureSource = Field(None, description="Индекс промышленного производства")
     features: IPPFeatures
 
 
@@ -50,7 +50,7 @@ class IPCRequestCB(BaseModel):
     """
 
     hparams: CatBoostHyperparameters
-    ipc: Feature = Field(None, description="Индекс потребительских цен")
+    ipc: FeatureSource = Field(None, description="Индекс потребительских цен")
     features: IPCFeatures
 
 
@@ -65,5 +65,179 @@ class ORTRequestCB(BaseModel):
     """
 
     hparams: CatBoostHyperparameters
-    ort: Feature = Field(None, description="Оборот розничной торговли, Россия. Ежемесячные данные. Всего. В % к соответствующему периоду предыдущего года")
+    ort: FeatureSource = Field(None, description="Оборот розничной торговли, Россия. Ежемесячные данные. Всего. В % к соответствующему периоду предыдущего года")
     features: ORTFeatures
+
+
+# Сколько наборов гиперпараметров можно передать в один пакетный запрос
+MAX_BATCH_SIZE = 64
+
+BatchHyperparameters = conlist(CatBoostHyperparameters, min_length=1, max_length=MAX_BATCH_SIZE)
+
+
+class IPPBatchRequestCB(IPPRequestCB):
+    """
+    DTO для пакетного прогноза ИПП: одни данные и несколько наборов гиперпараметров CatBoost
+
+    Параметры:
+    - hparams:             список наборов гиперпараметров CatBoost
+    - stream:              отдавать прогнозы по мере готовности (NDJSON)
+    """
+
+    hparams: BatchHyperparameters
+    stream: bool = Field(False, description="Отдавать прогнозы по мере готовности, по одному JSON в строке")
+
+
+class IPCBatchRequestCB(IPCRequestCB):
+    """
+    DTO для пакетного прогноза ИПЦ: одни данные и несколько наборов гиперпараметров CatBoost
+
+    Параметры:
+    - hparams:             список наборов гиперпараметров CatBoost
+    - stream:              отдавать прогнозы по мере готовности (NDJSON)
+    """
+
+    hparams: BatchHyperparameters
+    stream: bool = Field(False, description="Отдавать прогнозы по мере готовности, по одному JSON в строке")
+
+
+class ORTBatchRequestCB(ORTRequestCB):
+    """
+    DTO для пакетного прогноза ОРТ: одни данные и несколько наборов гиперпараметров CatBoost
+
+    Параметры:
+    - hparams:             список наборов гиперпараметров CatBoost
+    - stream:              отдавать прогнозы по мере готовности (NDJSON)
+    """
+
+    hparams: BatchHyperparameters
+    stream: bool = Field(False, description="Отдавать прогнозы по мере готовности, по одному JSON в строке")
+
+
+# Сколько рядов можно передать в один запрос к глобальной модели
+MAX_SERIES = 256
+
+
+class BaseMultiRequest(BaseModel):
+    """
+    DTO для прогноза нескольких временных рядов одной глобальной моделью NHiTS
+
+    Параметры:
+    - hparams:             гиперпараметры модели
+    - targets:             временные ряды, которые предсказываем
+    """
+
+    hparams: NHiTSHyperparameters
+    targets: conlist(FeatureSource, min_length=1, max_length=MAX_SERIES) = Field(
+        description="Переменные для предсказания, модель обучается на всех сразу"
+    )
+
+
+class BaseSearchRequest(BaseRequest):
+    """
+    DTO для подбора гиперпараметров базовой модели NHiTS
+
+    Параметры:
+    - hparams:             гиперпараметры, с которых начинается подбор. Горизонт прогноза не подбирается
+    - search:              настройки подбора
+    """
+
+    search: SearchSettings = SearchSettings()
+
+
+class IPPSearchRequestCB(IPPRequestCB):
+    """
+    DTO для подбора гиперпараметров CatBoost для ИПП
+
+    Параметры:
+    - hparams:             гиперпараметры, с которых начинается подбор
+    - search:              настройки подбора
+    """
+
+    search: SearchSettings = SearchSettings()
+
+
+class IPCSearchRequestCB(IPCRequestCB):
+    """
+    DTO для подбора гиперпараметров CatBoost для ИПЦ
+
+    Параметры:
+    - hparams:             гиперпараметры, с которых начинается подбор
+    - search:              настройки подбора
+    """
+
+    search: SearchSettings = SearchSettings()
+
+
+class ORTSearchRequestCB(ORTRequestCB):
+    """
+    DTO для подбора гиперпараметров CatBoost для ОРТ
+
+    Параметры:
+    - hparams:             гиперпараметры, с которых начинается подбор
+    - search:              настройки подбора
+    """
+
+    search: SearchSettings = SearchSettings()
+
+
+class BaseBacktestRequest(BaseRequest):
+    """
+    DTO для бэктеста базовой модели NHiTS
+
+    Параметры:
+    - hparams:             гиперпараметры модели
+    - backtest:            точки отсчета и размер проверяемого окна
+    """
+
+    backtest: BacktestSettings = BacktestSettings()
+
+
+class IPPBacktestRequestCB(IPPRequestCB):
+    """
+    DTO для бэктеста CatBoost для ИПП
+
+    Параметры:
+    - hparams:             гиперпараметры CatBoost
+    - backtest:            точки отсчета и размер проверяемого окна
+    """
+
+    backtest: BacktestSettings = BacktestSettings()
+
+
+class IPCBacktestRequestCB(IPCRequestCB):
+    """
+    DTO для бэктеста CatBoost для ИПЦ
+
+    Параметры:
+    - hparams:             гиперпараметры CatBoost
+    - backtest:            точки отсчета и размер проверяемого окна
+    """
+
+    backtest: BacktestSettings = BacktestSettings()
+
+
+class ORTBacktestRequestCB(ORTRequestCB):
+    """
+    DTO для бэктеста CatBoost для ОРТ
+
+    Параметры:
+    - hparams:             гиперпараметры CatBoost
+    - backtest:            точки отсчета и размер проверяемого окна
+    """
+
+    backtest: BacktestSettings = BacktestSettings()
+
+
+class AppendRequest(BaseModel):
+    """
+    DTO для добавления новых значений в сессию обучения
+
+    Параметры:
+    - series:              только новые значения рядов по их именам в запросе (ipp, news, curs, ...).
+                           Значение за уже известную дату заменяет старое
+    - refit:               обучить модели заново вместо продолжения бустинга
+    """
+
+    series: dict[str, Feature] = Field(description="Новые значения рядов")
+    refit: bool = Field(False, description="Обучить модели заново, а не продолжать бустинг от прошлых")
@@ -1,15 +1,104 @@
-from typing import TypeAlias, Union
+from typing import Annotated, Optional, TypeAlias, Union
 
-from pydantic import BaseModel, Field
+import numpy as np
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator, WithJsonSchema
 from app.schemas.ml.scores import ModelScore
+from app.schemas.ml.params import CatBoostHyperparameters, NHiTSHyperparameters
+from app.schemas.common import ConfidenceIntervalEnum, JobStatus
+
+
+def _as_float_array(values) -> np.ndarray:
+    return np.asarray(values, dtype=np.float64).ravel()
+
+
+# Ряд прогноза хранится массивом numpy: модели отдают массивы (или кортежи массивов по шагам), и они
+# не проверяются поэлементно. В JSON - список чисел, JSON ответов API собирается из буфера (app.api.encoding)
+FloatArray: TypeAlias = Annotated[
+    np.ndarray,
+    PlainValidator(_as_float_array),
+    PlainSerializer(lambda values: values.tolist(), return_type=list[float], when_used='json'),
+    WithJsonSchema({'type': 'array', 'items': {'type': 'number'}})
+]
+
+
+class PredictionInterval(BaseModel):
+    """Границы прогноза predict, в которые значения попадают с вероятностью level"""
+
+    level: ConfidenceIntervalEnum
+    lower: FloatArray
+    upper: FloatArray
 
 
 class ForecastResponse(BaseModel):
-    """Прогноз на предыдущие значения, на будущие и качество модели"""
+    """Прогноз на предыдущие значения, на будущие, интервалы прогноза и качество модели"""
 
-    previous: list[float]
-    predict: list[float]
+    previous: FloatArray
+    predict: FloatArray
     scores: list[ModelScore]
+    intervals: list[PredictionInterval] = Field(default_factory=list, description="Интервалы прогноза для всех уровней ConfidenceIntervalEnum")
+
+
+class BatchForecastItem(BaseModel):
+    """Прогноз для набора гиперпараметров с номером hparams_index из пакетного запроса"""
+
+    hparams_index: int
+    response: ForecastResponse
+
+
+class BatchForecastResponse(BaseModel):
+    """Прогнозы пакетного запроса в порядке наборов гиперпараметров"""
+
+    responses: list[ForecastResponse]
+
+
+class MultiSeriesForecastResponse(BaseModel):
+    """Прогнозы глобальной модели в порядке рядов запроса"""
+
+    responses: list[ForecastResponse]
+
+
+class SearchResponse(BaseModel):
+    """Лучшие найденные гиперпараметры и прогноз модели, обученной с ними на всех данных"""
+
+    hparams: Union[CatBoostHyperparameters, NHiTSHyperparameters]
+    valid_mape: float = Field(description="MAPE лучшей попытки на отложенных последних месяцах")
+    n_trials: int = Field(description="Сколько попыток завершено")
+    n_pruned: int = Field(description="Сколько попыток остановлено досрочно")
+    response: ForecastResponse
+
+
+class HorizonBacktest(BaseModel):
+    """Качество шага прогноза по всем точкам отсчета бэктеста"""
+
+    horizon: int = Field(description="Шаг прогноза, с единицы")
+    mape: float = Field(description="MAPE по прогнозам всех точек отсчета")
+    r2_score: Optional[float] = Field(description="R2 по прогнозам всех точек отсчета")
+    fold_mape: list[float] = Field(description="MAPE каждой точки отсчета, в порядке origins")
+    fold_r2_score: list[Optional[float]] = Field(description="R2 каждой точки отсчета. Нет, если в проходе меньше двух месяцев")
+
+
+class BacktestResponse(BaseModel):
+    """Качество модели на последних месяцах: модели каждой точки отсчета обучены только на данных до нее"""
+
+    origins: list[str] = Field(description="Первый проверяемый месяц каждой точки отсчета, dd.mm.yyyy")
+    train_sizes: list[int] = Field(description="Сколько наблюдений было в обучении каждой точки отсчета")
+    horizons: list[HorizonBacktest]
+
+
+class SessionResponse(BaseModel):
+    """Номер сессии обучения и прогноз ее текущих моделей"""
+
+    session_id: str
+    response: ForecastResponse
+
+
+class JobResponse(BaseModel):
+    """Состояние фоновой задачи прогноза. result есть, когда status = done, error - когда failed"""
+
+    job_id: str
+    status: JobStatus
+    result: Optional[ForecastResponse] = None
+    error: Optional[str] = None
 
 
 class FeatureResponse(BaseModel):
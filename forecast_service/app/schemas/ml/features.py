@@ -1,29 +1,66 @@
-from pydantic import BaseModel, Field
+from datetime import date
+from typing import Annotated, Optional, TypeAlias, Union
+
+import numpy as np
+from pydantic import BaseModel, Field, PlainSerializer, PlainValidator, TypeAdapter, WithJsonSchema
+
+
+_FLOAT_LIST = TypeAdapter(list[float])
+
+
+def _as_series_values(values) -> np.ndarray:
+    # числовые массивы (из Arrow) и списки чисел переводятся в numpy целиком, без проверки каждого элемента.
+    # Остальное (строки, null) проверяется как list[float], с теми же ошибками валидации
+    array = values if isinstance(values, np.ndarray) else np.asarray(values) if isinstance(values, list) else None
+
+    if array is not None and array.ndim == 1 and array.dtype.kind in 'fiu':
+        return array.astype(np.float64, copy=False)
+
+    return np.asarray(_FLOAT_LIST.validate_python(values), dtype=np.float64)
+
+
+# Значения ряда во входных данных: массив float64. В JSON - список чисел
+SeriesValues: TypeAlias = Annotated[
+    np.ndarray,
+    PlainValidator(_as_series_values),
+    PlainSerializer(lambda values: values.tolist(), return_type=list[float], when_used='json'),
+    WithJsonSchema({'type': 'array', 'items': {'type': 'number'}})
+]
 
 
 class Feature(BaseModel):
-    values: list[float]
+    values: SeriesValues
     dates: list[str]
 
 
+class SeriesReference(BaseModel):
+    """Ссылка на временной ряд в хранилище сервиса вместо самих данных"""
+
+    dataset_uuid: str = Field(description="dataset_uuid признака из features_list")
+    as_of: Optional[date] = Field(None, description="Взять данные не позднее этой даты. По умолчанию весь ряд")
+
+
+FeatureSource: TypeAlias = Union[Feature, SeriesReference]
+
+
 class IPPFeatures(BaseModel):
-    news:           Feature = Field(None, description="Новостной идекс ЦБ, Россия")
-    cb_monitor:     Feature = Field(None, description="Оценка изменения спроса на продукцию, товары, услуги (промышленность), пункты, Россия")
-    business_clim:  Feature = Field(None, description="Промышленность Индикатор бизнес-климата Банка России")
-    interest_rate:  Feature = Field(None, description="Ключевая ставка ")
-    rzd:            Feature = Field(None, description="Погрузка на сети РЖД")
-    consumer_price: Feature = Field(None, description="Индекс цен на электроэнергию в первой ценовой зоне")
-    curs:           Feature = Field(None, description="Курс рубля к доллару США")
+    news:           FeatureSource = Field(None, description="Новостной идекс ЦБ, Россия")
+    cb_monitor:     FeatureSource = Field(None, description="Оценка изменения спроса на продукцию, товары, услуги (промышленность), пункты, Россия")
+    business_clim:  FeatureSource = Field(None, description="Промышленность Индикатор бизнес-климата Банка России")
+    interest_rate:  FeatureSource = Field(None, description="Ключевая ставка ")
+    rzd:            FeatureSource = Field(None, description="Погрузка на сети РЖД")
+    consumer_price: FeatureSource = Field(None, description="Индекс цен на электроэнергию в первой ценовой зоне")
+    curs:           FeatureSource = Field(None, description="Курс рубля к доллару США")
 
 
 class IPCFeatures(BaseModel):
-    money_supply:   Feature = Field(None, description="Денежная масса РФ")
-    agg_m0:         Feature = Field(None, description="Денежный аггрегат M0")
-    interest_rate:  Feature = Field(None, description="Ключевая ставка ")
-    curs:           Feature = Field(None, description="Курс рубля к доллару США")
+    money_supply:   FeatureSource = Field(None, description="Денежная масса РФ")
+    agg_m0:         FeatureSource = Field(None, description="Денежный аггрегат M0")
+    interest_rate:  FeatureSource = Field(None, description="Ключевая ставка ")
+    curs:           FeatureSource = Field(None, description="Курс рубля к доллару США")
 
 
 class ORTFeatures(BaseModel):
-    news: Feature = Field(None, description="Новостной индекс ЦБ, Россия")
-    salary: Feature = Field(None, description="Реальная зачисленная заработная плата работников организации. В % к соответствующему периоду предыдущего года")
-    business_clim: Feature = Field(None, description="Промышленность Индикатор бизнес-климата Банка России")
+    news: FeatureSource = Field(None, description="Новостной индекс ЦБ, Россия")
+    salary: FeatureSource = Field(None, description="Реальная зачисленная заработная плата работников организации. В % к соответствующему периоду предыдущего года")
+    business_clim: FeatureSource = Field(None, description="Промышленность Индикатор бизнес-климата Банка России")
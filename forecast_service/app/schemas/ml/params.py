@@ -1,13 +1,22 @@
-from typing import Union, TypeAlias
+from enum import Enum
+from typing import Optional, Union, TypeAlias
 
 from pydantic import BaseModel, Field, conint, confloat
 
 
+class CatBoostMode(str, Enum):
+    """Как обучаются шаги прогноза CatBoost"""
+
+    per_horizon = 'per_horizon'    # своя модель на каждый шаг
+    multi_output = 'multi_output'  # одна модель MultiRMSE на все шаги сразу
+
+
 class CatBoostHyperparameters(BaseModel):
     depth: conint(gt=0, lt=32) = Field(default=3)
     learning_rate: confloat(gt=0, lt=1) = Field(default=0.1)
     l2_leaf_reg: confloat(gt=0, lt=5) = Field(default=.005)
     iterations: conint(gt=0, lt=32) = Field(default=8)
+    mode: CatBoostMode = Field(default=CatBoostMode.per_horizon, description="Модель на каждый шаг или одна на все шаги")
 
 
 class RNNHyperparameters(BaseModel):
@@ -31,4 +40,22 @@ class NHiTSHyperparameters(BaseModel):
     learning_rate: confloat(gt=0, lt=1) = Field(default=0.0001, description="Шаг обучения")
 
 
+class SearchSettings(BaseModel):
+    """Настройки подбора гиперпараметров"""
+
+    n_trials: conint(gt=0, le=500) = Field(default=50, description="Сколько наборов гиперпараметров попробовать")
+    n_jobs: Optional[conint(gt=0, le=64)] = Field(default=None, description="Сколько попыток идет параллельно. По умолчанию по числу процессов пула")
+    valid_size: conint(gt=0, lt=60) = Field(default=12, description="Сколько последних месяцев отложить для оценки качества")
+    timeout: Optional[confloat(gt=0)] = Field(default=None, description="Не начинать новые попытки после стольких секунд")
+    seed: Optional[int] = Field(default=None, description="Зерно сэмплера для воспроизводимости")
+
+
+class BacktestSettings(BaseModel):
+    """Настройки бэктеста со сдвигающейся точкой отсчета"""
+
+    window: conint(gt=0, le=240) = Field(default=24, description="На скольких последних месяцах проверяется модель")
+    test_size: conint(gt=0, le=60) = Field(default=3, description="Сколько месяцев после точки отсчета проверяется в каждом проходе")
+    step: conint(gt=0, le=60) = Field(default=1, description="На сколько месяцев сдвигается точка отсчета между проходами")
+
+
 BaseHyperparameters: TypeAlias = Union[RNNHyperparameters, CatBoostHyperparameters, NHiTSHyperparameters]
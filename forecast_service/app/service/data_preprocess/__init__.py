@@ -1,3 +1,14 @@
-from .preprocess import TimeSeries
+from .preprocess import TimeSeries, parse_dates, parse_month_ordinals
+from .alignment import MonthlyFrame, align_monthly
+from .lags import LagEngine, LaggedData, parse_lag
 
-__all__ = ['TimeSeries']
+__all__ = [
+    'TimeSeries',
+    'parse_dates',
+    'parse_month_ordinals',
+    'MonthlyFrame',
+    'align_monthly',
+    'LagEngine',
+    'LaggedData',
+    'parse_lag'
+]
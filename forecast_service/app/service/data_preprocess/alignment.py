@@ -0,0 +1,67 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from .preprocess import TimeSeries
+
+
+@dataclass(frozen=True)
+class MonthlyFrame:
+    """
+    Несколько рядов на общем помесячном календаре
+
+    months - месяцы строк по возрастанию, values - матрица (месяц x ряд), пропуски - nan
+    """
+
+    months: np.ndarray
+    values: np.ndarray
+    columns: tuple[str, ...]
+
+    def column(self, name: str) -> np.ndarray:
+        return self.values[:, self.columns.index(name)]
+
+    def to_frame(self) -> pd.DataFrame:
+        df = pd.DataFrame(self.values, columns=list(self.columns))
+        df.insert(0, 'date', self.months)
+
+        return df
+
+
+def align_monthly(series: dict[str, TimeSeries]) -> MonthlyFrame:
+    """
+    Выравнивание рядов по месяцам за один проход
+
+    Календарь считается один раз по крайним месяцам всех рядов, после чего значения каждого
+    ряда раскладываются в общую матрицу по индексу месяца. Остаются только месяцы, в которых
+    есть хотя бы одно значение - как при последовательных outer merge по дате. Если в ряде
+    несколько значений за месяц, берется последнее
+    """
+
+    months = {name: ts.months() for name, ts in series.items()}
+    non_empty = [m for m in months.values() if len(m)]
+
+    if not non_empty:
+        return MonthlyFrame(
+            months=np.array([], dtype='datetime64[M]'),
+            values=np.empty((0, len(series))),
+            columns=tuple(series)
+        )
+
+    start = min(m.min() for m in non_empty)
+    end = max(m.max() for m in non_empty)
+
+    matrix = np.full((int(end - start) + 1, len(series)), np.nan)
+    occupied = np.zeros(len(matrix), dtype=bool)
+
+    for j, (name, ts) in enumerate(series.items()):
+        rows = (months[name] - start).astype(np.int64)
+
+        matrix[rows, j] = ts.values
+        occupied[rows] = True
+
+    return MonthlyFrame(
+        months=np.arange(start, end + 1)[occupied],
+        values=matrix[occupied],
+        columns=tuple(series)
+    )
@@ -0,0 +1,147 @@
+import re
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from .alignment import MonthlyFrame
+
+
+_LAG_COLUMN = re.compile(r'^(?P<series>.+)_lag_(?P<lag>\d+)$')
+
+
+def parse_lag(column: str) -> tuple[str, int]:
+    """Имя признака в ряд и лаг: 'news_lag_3' -> ('news', 3), 'curs' -> ('curs', 0)"""
+
+    match = _LAG_COLUMN.match(column)
+
+    if match is None:
+        return column, 0
+
+    return match['series'], int(match['lag'])
+
+
+def _bfill(x: np.ndarray) -> np.ndarray:
+    """Заполнение пропусков следующим значением по каждому столбцу"""
+
+    n = len(x)
+    index = np.where(np.isnan(x), n, np.arange(n)[:, None])
+    index = np.minimum.accumulate(index[::-1], axis=0)[::-1]
+
+    # строка из nan на позиции n - для пропусков, после которых значений нет
+    padded = np.concatenate((x, np.full((1, x.shape[1]), np.nan)))
+
+    return np.take_along_axis(padded, index, axis=0)
+
+
+@dataclass(frozen=True)
+class LaggedData:
+    """
+    Матрицы признаков моделей и месяцы их строк
+
+    frame и rows - из чего построены матрицы, чтобы перестроить их по части месяцев (LagEngine.build)
+    """
+
+    months: np.ndarray
+    designs: dict[str, np.ndarray]
+    frame: Optional[MonthlyFrame] = None
+    rows: Optional[np.ndarray] = None
+
+    def __getitem__(self, name: str) -> np.ndarray:
+        return self.designs[name]
+
+    def take(self, rows: slice) -> "LaggedData":
+        """Срез строк всех матриц, без копирования"""
+
+        return LaggedData(months=self.months[rows], designs={name: x[rows] for name, x in self.designs.items()})
+
+    def __len__(self) -> int:
+        return len(self.months)
+
+
+class LagEngine:
+    """
+    Построение матриц признаков по именам колонок вида <ряд>_lag_<k>
+
+    План (индексы рядов и смещения лагов) считается один раз при создании. Лаги берутся
+    из sliding_window_view над матрицей MonthlyFrame, поэтому материализуются только
+    колонки, которые читают модели, и сразу в непрерывный float массив
+
+    Строка попадает в выборку, если в этом месяце есть значения всех входных рядов
+    и всех используемых лагов
+    """
+
+    def __init__(
+            self,
+            columns: tuple[str, ...],
+            designs: dict[str, tuple[str, ...]],
+            transforms: Optional[dict[str, Callable[[np.ndarray], np.ndarray]]] = None
+    ):
+        self.columns = tuple(columns)
+        transforms = transforms or {}
+
+        parsed = {name: [parse_lag(column) for column in design] for name, design in designs.items()}
+        index = {column: j for j, column in enumerate(self.columns)}
+
+        self.max_lag = max((lag for design in parsed.values() for _, lag in design), default=0)
+
+        # plan: индексы рядов, позиции лагов в окне и преобразования колонок
+        self._plans = {
+            name: (
+                np.array([index[series] for series, _ in design], dtype=np.intp),
+                np.array([self.max_lag - lag for _, lag in design], dtype=np.intp),
+                [(k, transforms[column]) for k, column in enumerate(designs[name]) if column in transforms]
+            )
+            for name, design in parsed.items()
+        }
+
+        # обязательные (ряд, лаг): все используемые лаги и сами ряды
+        self._required = np.zeros((len(self.columns), self.max_lag + 1), dtype=bool)
+        self._required[:, self.max_lag] = True
+        for series_index, offsets, _ in self._plans.values():
+            self._required[series_index, offsets] = True
+
+    def windows(self, frame: MonthlyFrame) -> np.ndarray:
+        """Представление (месяц x ряд x лаг) без копирования: windows[t, j, max_lag - k] = ряд j на t - k"""
+
+        if frame.columns != self.columns:
+            raise ValueError(f'Ожидались ряды {self.columns}, получили {frame.columns}')
+
+        padded = np.concatenate((np.full((self.max_lag, len(self.columns)), np.nan), frame.values))
+
+        return sliding_window_view(padded, self.max_lag + 1, axis=0)
+
+    def build(self, frame: MonthlyFrame, rows: Optional[np.ndarray] = None, bfill: bool = False) -> LaggedData:
+        """
+        Матрицы признаков для строк rows (маска по месяцам frame)
+
+        При bfill пропуски внутри выборки заполняются следующими значениями
+        и отбрасываются только последние строки, которые заполнить нечем
+        """
+
+        windows = self.windows(frame)
+        mask = np.ones(len(frame.months), dtype=bool) if rows is None else rows
+        rows = np.flatnonzero(mask)
+
+        valid = ~np.isnan(windows[rows][:, self._required])
+
+        if bfill:
+            keep = np.logical_or.accumulate(valid[::-1], axis=0)[::-1].all(axis=1)
+        else:
+            keep = valid.all(axis=1)
+
+        designs = {}
+
+        for name, (series_index, offsets, transforms) in self._plans.items():
+            x = windows[rows[:, None], series_index[None, :], offsets[None, :]]
+
+            for k, transform in transforms:
+                x[:, k] = transform(x[:, k])
+
+            if bfill:
+                x = _bfill(x)
+
+            designs[name] = np.ascontiguousarray(x[keep])
+
+        return LaggedData(months=frame.months[rows[keep]], designs=designs, frame=frame, rows=mask)
@@ -1,8 +1,70 @@
 from dataclasses import dataclass
-from datetime import date 
+from datetime import date
+from typing import Callable
+
+import numpy as np
 import pandas as pd
 
 
+# Длина даты в формате dd.mm.yyyy
+_DATE_LEN = 10
+
+
+def parse_dates(dates) -> np.ndarray:
+    """
+    Даты в формате dd.mm.yyyy в numpy.datetime64[D]
+
+    Строки разбираются за один векторный проход по их байтам. Если хотя бы одна дата
+    не в формате dd.mm.yyyy или такого дня нет в месяце, разбор отдается pandas, и он поднимает ошибку
+    """
+
+    arr = np.asarray(dates)
+
+    if np.issubdtype(arr.dtype, np.datetime64):
+        return arr.astype('datetime64[D]')
+
+    if arr.dtype == object and len(arr) and isinstance(arr[0], date):
+        return arr.astype('datetime64[D]')
+
+    if arr.dtype.kind == 'U' and arr.dtype.itemsize == _DATE_LEN * 4 and arr.size:
+        chars = arr.astype(f'S{_DATE_LEN}').view(np.uint8).reshape(-1, _DATE_LEN).astype(np.int64) - ord('0')
+        digits = chars[:, [0, 1, 3, 4, 6, 7, 8, 9]]
+
+        if ((digits >= 0) & (digits <= 9)).all() and (chars[:, [2, 5]] == ord('.') - ord('0')).all():
+            day = chars[:, 0] * 10 + chars[:, 1]
+            month = chars[:, 3] * 10 + chars[:, 4]
+            year = chars[:, 6] * 1000 + chars[:, 7] * 100 + chars[:, 8] * 10 + chars[:, 9]
+
+            if ((month >= 1) & (month <= 12) & (day >= 1)).all():
+                months = ((year - 1970) * 12 + month - 1).astype('datetime64[M]')
+                starts = months.astype('datetime64[D]')
+                # день проверяется по длине своего месяца: 31.02 не должно стать 2 марта
+                lengths = ((months + 1).astype('datetime64[D]') - starts).astype(np.int64)
+
+                if (day <= lengths).all():
+                    return starts + (day - 1)
+
+    return pd.to_datetime(arr, format='%d.%m.%Y').to_numpy().astype('datetime64[D]')
+
+
+def parse_month_ordinals(dates) -> np.ndarray:
+    """Номера месяцев (месяцы с января 1970) для дат в формате dd.mm.yyyy"""
+
+    return parse_dates(dates).astype('datetime64[M]').astype(np.int64)
+
+
+# Агрегации по группам, отсортированным по месяцу.
+# Принимают значения, начала групп и их размеры
+_REDUCTIONS: dict[str, Callable[[np.ndarray, np.ndarray, np.ndarray], np.ndarray]] = {
+    'mean': lambda values, starts, sizes: np.add.reduceat(values, starts) / sizes,
+    'sum': lambda values, starts, sizes: np.add.reduceat(values, starts),
+    'min': lambda values, starts, sizes: np.minimum.reduceat(values, starts),
+    'max': lambda values, starts, sizes: np.maximum.reduceat(values, starts),
+    'first': lambda values, starts, sizes: values[starts],
+    'last': lambda values, starts, sizes: values[starts + sizes - 1],
+}
+
+
 @dataclass
 class TimeSeries:
     """Класс с предобработкой временного ряда
@@ -17,30 +79,69 @@ class TimeSeries:
         if len(self.values) != len(self.dates):
             raise ValueError(f'value и dates Должны быть одной длины, но имеем: {len(self.dates) =}, {len(self.values) =}')
 
-    def _create_df(self):
-        tmp = pd.DataFrame({"date": self.dates, "value": self.values})
+    def months(self) -> np.ndarray:
+        """Месяц каждого значения как numpy.datetime64[M]"""
 
-        tmp.date = tmp.date.apply(
-            lambda x: date(
-                day=1,
-                month=int(x.split('.')[1]),
-                year=int(x.split('.')[2])
-            )
-        )
+        return parse_dates(self.dates).astype('datetime64[M]')
 
-        return tmp.sort_values(by='date')
+    def append(self, other: 'TimeSeries') -> 'TimeSeries':
+        """
+        Ряд с добавленными значениями other
 
-    def days_to_months(self, method='mean') -> 'TimeSeries':
+        Значение за уже известную дату заменяется новым (уточнение данных). Даты нового
+        ряда уже разобраны, поэтому следующие добавления не разбирают строки заново
         """
-        Ежедневные данные приводятся к ежемесячным по методу
-        (среднее за месяц или другое, определенное в pandas.agg)
+
+        days, new_days = parse_dates(self.dates), parse_dates(other.dates)
+
+        # старые значения за даты, которые пришли заново, выбрасываем
+        kept = ~np.isin(days, new_days)
+
+        days = np.concatenate((days[kept], new_days))
+        values = np.concatenate((np.asarray(self.values, dtype=np.float64)[kept], np.asarray(other.values, dtype=np.float64)))
+
+        order = np.argsort(days, kind='stable')
+
+        return TimeSeries(values=values[order], dates=days[order])
+
+    def resample(self, *methods: str) -> dict[str, 'TimeSeries']:
         """
+        Ежедневные данные приводятся к ежемесячным сразу несколькими методами
+        (mean, sum, min, max, first, last)
 
-        tmp = self._create_df()
+        Даты разбираются и группируются один раз для всех методов. Пропуски не учитываются
+        """
+
+        unknown = set(methods) - _REDUCTIONS.keys()
+        if unknown:
+            raise ValueError(f'Неизвестные методы агрегации: {unknown}, доступны: {tuple(_REDUCTIONS)}')
+
+        days = parse_dates(self.dates)
+        values = np.asarray(self.values, dtype=np.float64)
+
+        present = ~np.isnan(values)
+        days, values = days[present], values[present]
+
+        # устойчивая сортировка сохраняет порядок значений внутри дня для first и last
+        order = np.argsort(days, kind='stable')
+        months = days[order].astype('datetime64[M]')
+        values = values[order]
 
-        tmp['month-date'] = tmp.date.apply(lambda d: date(day=1, month=d.month, year=d.year))
+        if not len(months):
+            return {method: TimeSeries(values=values, dates=months) for method in methods}
 
-        tmp = tmp.groupby('month-date', as_index=False).agg({'value': method})
+        starts = np.flatnonzero(np.concatenate(([True], months[1:] != months[:-1])))
+        sizes = np.diff(np.append(starts, len(months)))
 
-        return TimeSeries(values=list(tmp['value']), dates=list(tmp['month-date']))
+        return {
+            method: TimeSeries(values=_REDUCTIONS[method](values, starts, sizes), dates=months[starts])
+            for method in methods
+        }
+
+    def days_to_months(self, method='mean') -> 'TimeSeries':
+        """
+        Ежедневные данные приводятся к ежемесячным по методу
+        (среднее за месяц или другое из resample)
+        """
 
+        return self.resample(method)[method]
@@ -1,12 +1,57 @@
-from .base_forecast_model import BaseForecastService
-from .ipp import IPPForecast
-from .ipc import IPCForecast
-from .ort import ORTForecast
+"""
+Модели прогноза
+
+Модули моделей импортируют тяжелые библиотеки (torch, neuralforecast, catboost), поэтому
+загружаются при первом обращении, а не при импорте пакета. Доступны только модели
+из бэкендов, перечисленных в config.FORECAST_BACKENDS
+"""
+
+from importlib import import_module
+
+from app import config
+
+
+# имя модели -> бэкенд, модуль и класс
+_MODELS = {
+    'BaseForecastService': ('base', '.base_forecast_model', 'BaseForecastService'),
+    # глобальная модель на несколько рядов есть только у NHiTS
+    'GlobalForecastService': ('base', '.base_forecast_model.NHITS.model', 'GlobalForecastService'),
+    'IPPForecast': ('catboost', '.ipp', 'IPPForecast'),
+    'IPCForecast': ('catboost', '.ipc', 'IPCForecast'),
+    'ORTForecast': ('catboost', '.ort', 'ORTForecast'),
+    'CatBoostForecast': ('catboost', '.spec', 'CatBoostForecast'),
+}
+
+
+class BackendDisabled(RuntimeError):
+    """Бэкенд модели не включен в config.FORECAST_BACKENDS"""
+
+
+def get_model(name: str) -> type:
+    """Класс модели по имени. Модуль модели импортируется при первом вызове"""
+
+    backend, module, attr = _MODELS[name]
+
+    if backend not in config.FORECAST_BACKENDS:
+        raise BackendDisabled(f'Модель {name} отключена: бэкенда {backend} нет в FORECAST_BACKENDS')
+
+    return getattr(import_module(module, __name__), attr)
+
+
+def __getattr__(name: str) -> type:
+    if name not in _MODELS:
+        raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
+
+    return get_model(name)
 
 
 __all__ = [
     'BaseForecastService',
+    'GlobalForecastService',
     'IPPForecast',
     'IPCForecast',
-    'ORTForecast'
+    'ORTForecast',
+    'CatBoostForecast',
+    'BackendDisabled',
+    'get_model'
 ]
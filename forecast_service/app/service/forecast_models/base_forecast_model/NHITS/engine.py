@@ -0,0 +1,112 @@
+import copy
+import types
+import warnings
+from collections import OrderedDict
+from typing import Optional
+
+import neuralforecast
+import torch
+from neuralforecast import NeuralForecast
+from neuralforecast.tsdataset import TimeSeriesLoader
+
+from app import config
+
+
+# Trainer нужен только для обучения: без прогресс бара, логгера и сводки модели он поднимается быстрее
+TRAINER_KWARGS = dict(enable_progress_bar=False, enable_model_summary=False, logger=False)
+
+# _predict_without_trainer повторяет BaseWindows.predict этой версии и читает его внутренние поля.
+# С другой версией (она закреплена в requirements.txt) прогноз идет через Trainer
+NEURALFORECAST_VERSION = '1.7.3'
+
+DIRECT_INFERENCE = neuralforecast.__version__ == NEURALFORECAST_VERSION
+
+if not DIRECT_INFERENCE:
+    warnings.warn(f'neuralforecast {neuralforecast.__version__} вместо {NEURALFORECAST_VERSION}: '
+                  f'инференс NHITS без Trainer отключен')
+
+
+def _predict_without_trainer(self, dataset, test_size=None, step_size=1, random_seed=None, **data_module_kwargs):
+    """
+    BaseWindows.predict без pytorch_lightning.Trainer
+
+    Trainer.predict только проходит по батчам predict_dataloader и вызывает predict_step,
+    поэтому делаем то же самое напрямую, без создания Trainer и его колбеков на каждый вызов
+    """
+
+    self._check_exog(dataset)
+    self._restart_seed(random_seed)
+    data_module_kwargs = self._set_quantile_for_iqloss(**data_module_kwargs)
+
+    self.predict_step_size = step_size
+    self.decompose_forecast = False
+
+    loader = TimeSeriesLoader(
+        dataset,
+        batch_size=self.valid_batch_size,
+        num_workers=data_module_kwargs.get('num_workers', 0),
+        shuffle=False
+    )
+
+    self.eval()
+    with torch.inference_mode():
+        fcsts = [self.predict_step(batch, i) for i, batch in enumerate(loader)]
+
+    fcsts = torch.vstack(fcsts).detach().cpu().numpy().flatten()
+
+    return fcsts.reshape(-1, len(self.loss.output_names))
+
+
+def direct_inference(nf: NeuralForecast) -> NeuralForecast:
+    """
+    Копия nf для одного прогноза, в которой predict и predict_insample идут без Trainer
+    (с неподдерживаемой версией neuralforecast - через Trainer)
+
+    Прогноз меняет поля моделей (predict_step_size, test_size) и состояние их скейлера,
+    а обученные модели общие для потоков пула (warm_models). Поэтому модели копируются
+    целиком (сети маленькие, копия - миллисекунды), датасет nf остается общим, а сама nf нетронутой
+    """
+
+    nf = copy.copy(nf)
+    nf.models = [copy.deepcopy(model) for model in nf.models]
+
+    if DIRECT_INFERENCE:
+        for model in nf.models:
+            model.predict = types.MethodType(_predict_without_trainer, model)
+
+    return nf
+
+
+class WarmModels:
+    """
+    Обученные модели, уже загруженные в память процесса
+
+    Повторный запрос с теми же рядом и гиперпараметрами не читает модель с диска
+    и не восстанавливает ее датасет. Хранится не больше size последних моделей
+    """
+
+    def __init__(self, size: int):
+        self._size = size
+        self._models: OrderedDict[str, NeuralForecast] = OrderedDict()
+
+    def get(self, key: str) -> Optional[NeuralForecast]:
+        nf = self._models.get(key)
+
+        if nf is not None:
+            self._models.move_to_end(key)
+
+        return nf
+
+    def put(self, key: str, nf: NeuralForecast) -> None:
+        if self._size <= 0:
+            return
+
+        self._models[key] = nf
+        self._models.move_to_end(key)
+
+        while len(self._models) > self._size:
+            self._models.popitem(last=False)
+
+
+warm_models = WarmModels(config.NHITS_WARM_MODELS)
+
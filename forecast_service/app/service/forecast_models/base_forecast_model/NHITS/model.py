@@ -1,21 +1,48 @@
+import numpy as np
 import torch
 import pandas as pd
 from datetime import date
 
 from neuralforecast import NeuralForecast
-from neuralforecast.losses.pytorch import MSE
+from neuralforecast.losses.pytorch import MQLoss
 from neuralforecast.models import NHITS
+from sklearn.metrics import mean_absolute_percentage_error
 from utilsforecast.losses import mape, rmse
 from utilsforecast.evaluation import evaluate
 
-from app.domain.forecast_interface import BaseForecast
-from app.schemas import Feature, ForecastResponse, ModelScore
+from app.cache import fingerprint, model_registry
+from app.domain.forecast_interface import TunableForecast, PreparedData, BacktestFold
+from app.schemas import (Feature, ForecastResponse, ModelScore, ConfidenceIntervalEnum, PredictionInterval,
+                         MultiSeriesForecastResponse)
 from app.schemas.ml.params import NHiTSHyperparameters
 
+from .engine import TRAINER_KWARGS, direct_inference, warm_models
 
-class BaseForecastService(BaseForecast):
-    """Сервис для прогноза временных рядов с помощью рекурентных нейронных сетей"""
 
+# Модель учит квантили всех уровней ConfidenceIntervalEnum, точечный прогноз - медиана
+LEVELS = [level.level for level in ConfidenceIntervalEnum]
+POINT = 'NHITS-median'
+QUANTILES = ([f'NHITS-lo-{level}' for level in reversed(LEVELS)] + [POINT]
+             + [f'NHITS-hi-{level}' for level in LEVELS])
+
+
+def _forecast(model: NeuralForecast, df: pd.DataFrame) -> pd.DataFrame:
+    """Прогноз квантилей. Головы квантилей независимы и могут пересекаться, поэтому в каждой строке они сортируются"""
+
+    forecast = model.predict(df)
+    forecast[QUANTILES] = np.sort(forecast[QUANTILES].to_numpy(), axis=1)
+
+    return forecast
+
+
+class BaseForecastService(TunableForecast):
+    """
+    Сервис для прогноза временных рядов с помощью рекурентных нейронных сетей
+
+    Интервалы прогноза всех уровней дает одна модель с квантильной функцией потерь
+    """
+
+    index = 'base'
     last_day = date(year=2015, month=1, day=1)
 
     def __init__(
@@ -23,8 +50,11 @@ class BaseForecastService(BaseForecast):
             hparams: NHiTSHyperparameters
     ):
         self._df = None
+        self._data_fingerprint = None
+        self._fingerprint = None
         self._hparams = hparams
-        self._model = self._init_model()
+        # модель создается только если ее нет в памяти процесса и в хранилище
+        self._model = None
 
         self.device = torch.device('cuda:0' if torch.cuda.is_available() else 'cpu')
 
@@ -35,10 +65,11 @@ class BaseForecastService(BaseForecast):
                 input_size=self._hparams.lookback,
                 max_steps=self._hparams.epochs,
                 scaler_type='standard',
-                loss=MSE(),
+                loss=MQLoss(level=LEVELS),
                 learning_rate=self._hparams.learning_rate,
                 n_freq_downsample=[2, 1, 1],
-                mlp_units=3 * [[2, 2]]
+                mlp_units=3 * [[2, 2]],
+                **TRAINER_KWARGS
             )
         ], freq='M')
 
@@ -49,6 +80,8 @@ class BaseForecastService(BaseForecast):
     def set_data(self, target_data: Feature) -> "BaseForecastService":
         shape = len(target_data.dates)
         self._df = pd.DataFrame({'unique_id': ['1'] * shape, 'ds': target_data.dates, 'y': target_data.values})
+        self._data_fingerprint = fingerprint(type(self).__name__, target_data)
+        self._fingerprint = fingerprint(self._data_fingerprint, self._hparams, QUANTILES)
 
         return self
 
@@ -60,37 +93,168 @@ class BaseForecastService(BaseForecast):
         # Скалирование производит NeuralForecast под капотом
         return self
 
+    def prepared(self) -> PreparedData:
+        return PreparedData(fingerprint=self._data_fingerprint, data=self._df)
+
+    def set_prepared(self, prepared: PreparedData) -> "BaseForecastService":
+        self._data_fingerprint = prepared.fingerprint
+        self._fingerprint = fingerprint(prepared.fingerprint, self._hparams, QUANTILES)
+        self._df = prepared.data.copy()
+
+        return self
+
+    def validation_error(self, step: int, valid_size: int) -> float:
+        """MAPE прогноза на горизонт по модели, обученной без последних valid_size месяцев"""
+
+        train, valid = self._df.iloc[:-valid_size], self._df.iloc[-valid_size:]
+
+        self._model = self._init_model()
+        self._model.fit(df=train)
+        predict = _forecast(direct_inference(self._model), train)[POINT].to_numpy()
+
+        n = min(len(predict), valid_size)
+
+        return mean_absolute_percentage_error(valid.y.to_numpy()[:n], predict[:n])
+
+    def backtest_fold(self, origin: int, test_size: int) -> BacktestFold:
+        """Прогноз на горизонт по модели, обученной на первых origin месяцах. Шаг j сравнивается с месяцем origin + j"""
+
+        train, test = self._df.iloc[:origin], self._df.iloc[origin:origin + test_size]
+
+        model = self._init_model()
+        model.fit(df=train)
+        predict = _forecast(direct_inference(model), train)[POINT].to_numpy()[:len(test)]
+        actual = test.y.to_numpy()
+
+        steps = range(self._hparams.horizon)
+
+        return BacktestFold(
+            origin=test.ds.iloc[0].to_datetime64(),
+            train_size=origin,
+            actual=tuple(actual[j:j + 1] for j in steps),
+            predict=tuple(predict[j:j + 1] for j in steps)
+        )
+
+    @staticmethod
+    def suggest_hparams(trial, hparams: NHiTSHyperparameters) -> NHiTSHyperparameters:
+        # горизонт прогноза задает пользователь, его не подбираем
+        return NHiTSHyperparameters(
+            lookback=trial.suggest_int('lookback', 2, 23),
+            horizon=hparams.horizon,
+            epochs=trial.suggest_int('epochs', 10, 300, log=True),
+            learning_rate=trial.suggest_float('learning_rate', 1e-4, 1e-1, log=True)
+        )
+
     def train(self) -> "BaseForecastService":
         if torch.cuda.is_available():
             self._df['y'] = self._df['y'].to(self.device)
 
-        # размер валидационной выборки 12
-        self._model.fit(df=self._df, val_size=12)
+        # на тех же данных и гиперпараметрах модель уже обучалась - берем ее из памяти процесса или из хранилища
+        model = None if model_registry.bypassed else warm_models.get(self._fingerprint)
+
+        if model is None:
+            model = model_registry.load(self._fingerprint, loader=self._load_model)
+
+        if model is None:
+            model = self._init_model()
+            # размер валидационной выборки 12
+            model.fit(df=self._df, val_size=12)
+            model_registry.save(self._fingerprint, model, saver=self._save_model)
+
+        self._model = model
+        warm_models.put(self._fingerprint, model)
 
         return self
 
-    def _score(self) -> ModelScore:
-        Y_hat_insample = self._model.predict_insample(step_size=self._hparams.horizon).reset_index()
+    @staticmethod
+    def _save_model(model: NeuralForecast, path: str) -> None:
+        # датасет нужен для predict_insample после загрузки
+        model.save(path=path, save_dataset=True, overwrite=True)
 
-        evaluation_df = evaluate(Y_hat_insample.loc[:, Y_hat_insample.columns != 'cutoff'], metrics=[rmse, mape])
+    @staticmethod
+    def _load_model(path: str) -> NeuralForecast:
+        return NeuralForecast.load(path=path)
+
+    @staticmethod
+    def _score(Y_hat_insample: pd.DataFrame) -> ModelScore:
+        evaluation_df = evaluate(Y_hat_insample[['unique_id', 'ds', 'y', POINT]], metrics=[rmse, mape])
 
         return ModelScore(
-            mape=evaluation_df[evaluation_df['metric'] == 'mape']['NHITS'].iloc[0],
+            mape=evaluation_df[evaluation_df['metric'] == 'mape'][POINT].iloc[0],
             r2_score=1
         )
 
+    @classmethod
+    def _response(cls, insample: pd.DataFrame, forecast: pd.DataFrame) -> ForecastResponse:
+        return ForecastResponse(
+            previous=insample.y.to_numpy(),
+            predict=forecast[POINT].to_numpy(),
+            # score считается по предсказанию модели предыдущих значений
+            scores=[cls._score(insample)],
+            intervals=[
+                PredictionInterval(
+                    level=level,
+                    lower=forecast[f'NHITS-lo-{level.level}'].to_numpy(),
+                    upper=forecast[f'NHITS-hi-{level.level}'].to_numpy()
+                )
+                for level in ConfidenceIntervalEnum
+            ]
+        )
+
     def predict(self) -> ForecastResponse:
-        # Предсказание модели предыдущих значений
-        previous = list(self._model.predict_insample(step_size=self._hparams.horizon).reset_index().y)
+        model = direct_inference(self._model)
 
-        # Предсказание будущих значений
-        predict = list(self._model.predict(self._df).reset_index()['NHITS'])
+        # Предсказание модели предыдущих значений и будущих значений
+        insample = model.predict_insample(step_size=self._hparams.horizon).reset_index()
+        forecast = _forecast(model, self._df)
 
-        # Получаем score
-        scores = [self._score()]
+        return self._response(insample, forecast)
 
-        return ForecastResponse(
-            previous=previous,
-            predict=predict,
-            scores=scores
-        )
+
+class GlobalForecastService(BaseForecastService):
+    """
+    Одна модель NHiTS на несколько временных рядов
+
+    Ряды упаковываются в одну таблицу, имя ряда в set_data становится его unique_id.
+    Модель обучается одним fit на всех рядах и прогнозирует их одним predict. Ряды должны быть одной длины
+    Подбор гиперпараметров и бэктест - только по одному ряду, у BaseForecastService
+    """
+
+    def __init__(self, hparams: NHiTSHyperparameters):
+        super().__init__(hparams)
+        self._ids = ()
+
+    def set_data(self, **targets: Feature) -> "GlobalForecastService":
+        self._ids = tuple(targets)
+        self._df = pd.concat([
+            pd.DataFrame({'unique_id': unique_id, 'ds': target.dates, 'y': target.values})
+            for unique_id, target in targets.items()
+        ], ignore_index=True)
+        self._data_fingerprint = fingerprint(type(self).__name__, *(part for item in targets.items() for part in item))
+        self._fingerprint = fingerprint(self._data_fingerprint, self._hparams, QUANTILES)
+
+        return self
+
+    def preprocess_features(self) -> "GlobalForecastService":
+        self._df['ds'] = pd.to_datetime(self._df.ds, format='%d.%m.%Y')
+        self._df = self._df.sort_values(by=['unique_id', 'ds'])
+
+        # predict_insample в neuralforecast работает только с рядами одной длины
+        sizes = self._df.groupby('unique_id').size()
+        if sizes.nunique() > 1:
+            raise ValueError(f'Ряды должны быть одной длины, длины рядов: {sizes[list(self._ids)].tolist()}')
+
+        return self
+
+    def predict(self) -> MultiSeriesForecastResponse:
+        model = direct_inference(self._model)
+
+        insample = model.predict_insample(step_size=self._hparams.horizon).reset_index()
+        # unique_id - индекс прогноза или его колонка, в зависимости от NIXTLA_ID_AS_COL
+        forecast = _forecast(model, self._df).reset_index()
+
+        insample, forecast = dict(tuple(insample.groupby('unique_id'))), dict(tuple(forecast.groupby('unique_id')))
+
+        return MultiSeriesForecastResponse(responses=[
+            self._response(insample[unique_id], forecast[unique_id]) for unique_id in self._ids
+        ])
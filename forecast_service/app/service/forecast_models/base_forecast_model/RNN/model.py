@@ -22,6 +22,7 @@ IData = list[int]
 class BaseForecastService(BaseForecast):
     """Сервис для прогноза временных рядов с помощью рекурентных нейронных сетей"""
     
+    index = 'base'
     last_day = date(year=2015, month=1, day=1)
     
     def __init__(
@@ -167,7 +168,7 @@ class BaseForecastService(BaseForecast):
 
     def predict(self) -> ForecastResponse:
         # Предсказание модели предыдущих значений
-        previous = list(self._scaler.inverse_transform((self._model.predict(self._df.z_goal[self._hparams.lookback:]))))
+        previous = self._scaler.inverse_transform(self._model.predict(self._df.z_goal[self._hparams.lookback:]))
 
         # Предсказанеи последующих 3
         predict = self._scaler.inverse_transform(self._iteration_predict(self._model, self._df.z_goal))
@@ -1,11 +1,32 @@
-# from service.forecast_models.base_forecast_model.RNN.model import BaseForecastService
-from app.service.forecast_models.base_forecast_model.NHITS.model import BaseForecastService
+from importlib import import_module
+
+from app import config
+
+
+# BASE_FORECAST_MODEL -> модуль базовой модели. RNN требует keras
+BASE_MODELS = {
+    'NHITS': '.NHITS.model',
+    'RNN': '.RNN.model',
+}
 
 
 def get_base_model():
-    return BaseForecastService
+    """Класс базовой модели, выбранной в config.BASE_FORECAST_MODEL. Модуль импортируется при первом вызове"""
+
+    if config.BASE_FORECAST_MODEL not in BASE_MODELS:
+        raise ValueError(f'Неизвестная базовая модель {config.BASE_FORECAST_MODEL}, доступны {", ".join(BASE_MODELS)}')
+
+    return import_module(BASE_MODELS[config.BASE_FORECAST_MODEL], __name__).BaseForecastService
+
+
+def __getattr__(name: str):
+    if name == 'BaseForecastService':
+        return get_base_model()
+
+    raise AttributeError(f'module {__name__!r} has no attribute {name!r}')
 
 
 __all__ = [
     'get_base_model',
+    'BaseForecastService'
 ]
@@ -1,4 +1,4 @@
-from .catboost_model import IPCForecast
+from .catboost_model import IPCForecast, IPC_SPEC
 
 
-__all__ = ['IPCForecast']
+__all__ = ['IPCForecast', 'IPC_SPEC']
@@ -1,4 +1,4 @@
-from .catboost_model import IPPForecast
+from .catboost_model import IPPForecast, IPP_SPEC
 
 
-__all__ = ['IPPForecast']
+__all__ = ['IPPForecast', 'IPP_SPEC']
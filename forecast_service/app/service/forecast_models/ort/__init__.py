@@ -1 +1,4 @@
-from .catboost_model import ORTForecast
+from .catboost_model import ORTForecast, ORT_SPEC
+
+
+__all__ = ['ORTForecast', 'ORT_SPEC']
@@ -0,0 +1,11 @@
+from .spec import ForecastSpec, ForecastPlan, Horizon, Derived
+from .catboost_model import CatBoostForecast
+
+
+__all__ = [
+    'ForecastSpec',
+    'ForecastPlan',
+    'Horizon',
+    'Derived',
+    'CatBoostForecast'
+]
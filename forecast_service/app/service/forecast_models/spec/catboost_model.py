@@ -0,0 +1,331 @@
+from typing import Optional
+
+import numpy as np
+from catboost import CatBoostRegressor
+from sklearn.metrics import mean_absolute_percentage_error, r2_score
+
+from app.cache import fingerprint, model_registry
+from app.service.data_preprocess import TimeSeries, LaggedData
+from app.domain.forecast_interface import TunableForecast, PreparedData, BacktestFold
+from app.schemas import (Feature, ForecastResponse, ModelScore, CatBoostHyperparameters, CatBoostMode,
+                         ConfidenceIntervalEnum, PredictionInterval)
+
+from .spec import ForecastSpec, ForecastPlan
+
+
+# Уровни интервалов прогноза как доли
+_LEVELS = np.array([level.level for level in ConfidenceIntervalEnum]) / 100
+
+# Какая часть последних месяцев выборки откладывается для калибровки интервалов прогноза
+CALIBRATION_SHARE = 0.25
+
+
+class CatBoostForecast(TunableForecast):
+    """
+    Модель прогноза индекса на CatBoost по спецификации
+
+    На каждый шаг прогноза обучается своя модель, либо (mode=multi_output) одна модель
+    MultiRMSE на объединении признаков всех шагов. Наследник задает только spec,
+    план по ней компилируется один раз при создании класса
+
+    Интервалы прогноза конформные: полуширина - квантиль абсолютных ошибок на последних CALIBRATION_SHARE
+    месяцах выборки у моделей, обученных без них. Полуширины считаются вместе с моделями и хранятся с ними
+    """
+
+    spec: ForecastSpec
+    _plan: ForecastPlan
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+
+        if 'spec' in cls.__dict__:
+            cls._plan = cls.spec.compile()
+            cls.index = cls.spec.target
+
+    def __init__(self, hparams: CatBoostHyperparameters):
+        "Конструктор класса. Класс будет неизменяемым, поэтому все признаки пересоздаются"
+        self._hparams = dict(hparams)
+
+        # mode - не параметр CatBoost, но входит в хеш модели вместе с остальными
+        self._params = {k: v for k, v in self._hparams.items() if k != 'mode'}
+        self._multi_output = hparams.mode == CatBoostMode.multi_output
+
+        self._models = tuple(self._new_model() for _ in self._designs())
+
+        self._data_fingerprint = None
+        self._fingerprint = None
+        self._series_fingerprints = None
+        self._raw_data = None
+        self._data = None
+        self._previous_data = None
+        # полуширины интервалов прогноза (шаг x уровень)
+        self._widths = None
+
+    def set_data(self, **series: Feature) -> "CatBoostForecast":
+        if series.keys() != set(self.spec.inputs):
+            raise ValueError(f'Ожидались ряды {self.spec.inputs}, получили {tuple(series)}')
+
+        self._raw_data = {name: TimeSeries(series[name].values, series[name].dates) for name in self.spec.inputs}
+
+        # хеши отдельных рядов нужны и для кеша помесячных рядов, поэтому хеш данных считается из них
+        self._series_fingerprints = {name: fingerprint(series[name]) for name in self.spec.inputs}
+        self._data_fingerprint = fingerprint(type(self).__name__, *self._series_fingerprints.values())
+        self._fingerprint = fingerprint(self._data_fingerprint, self._hparams)
+
+        return self
+
+    def append_data(self, **series: Feature) -> "CatBoostForecast":
+        """Добавляет к рядам новые значения. Для сессий: после него preprocess_features и update"""
+
+        unknown = series.keys() - set(self.spec.inputs)
+        if unknown:
+            raise ValueError(f'Неизвестные ряды {tuple(unknown)}, ожидались {self.spec.inputs}')
+
+        for name, feature in series.items():
+            self._raw_data[name] = self._raw_data[name].append(TimeSeries(feature.values, feature.dates))
+            self._series_fingerprints[name] = fingerprint(self._series_fingerprints[name], feature)
+
+        # хеш данных - хеш прошлых данных и добавленных значений
+        self._data_fingerprint = fingerprint(
+            self._data_fingerprint, *(part for name in sorted(series) for part in (name, series[name]))
+        )
+        self._fingerprint = fingerprint(self._data_fingerprint, self._hparams)
+
+        self._previous_data = self._data
+
+        return self
+
+    def preprocess_features(self) -> "CatBoostForecast":
+        """Предобработка признаков. Создадим переменные с лагом"""
+
+        self._data = self._plan.prepare(self._raw_data, self._series_fingerprints)
+
+        return self
+
+    def prepared(self) -> PreparedData:
+        """Предобработанные данные, чтобы обучить на них модели с другими гиперпараметрами"""
+
+        return PreparedData(fingerprint=self._data_fingerprint, data=self._data)
+
+    def set_prepared(self, prepared: PreparedData) -> "CatBoostForecast":
+        """Вместо set_data и preprocess_features берет данные, уже предобработанные другой моделью"""
+
+        self._data_fingerprint = prepared.fingerprint
+        self._fingerprint = fingerprint(prepared.fingerprint, self._hparams)
+        self._data = prepared.data
+
+        return self
+
+    @classmethod
+    def validation_steps(cls, hparams: CatBoostHyperparameters) -> int:
+        return 1 if hparams.mode == CatBoostMode.multi_output else len(cls.spec.horizons)
+
+    def _new_model(self) -> CatBoostRegressor:
+        if self._multi_output:
+            return CatBoostRegressor(**self._params, loss_function='MultiRMSE', verbose=False)
+
+        return CatBoostRegressor(**self._params, verbose=False)
+
+    def _designs(self) -> tuple[str, ...]:
+        """Матрицы признаков обучаемых моделей"""
+
+        if self._multi_output:
+            return 'multi_output',
+
+        return tuple(f'model_{k}' for k in range(1, len(self.spec.horizons) + 1))
+
+    def _target(self, k: int, data: Optional[LaggedData] = None) -> np.ndarray:
+        """Цель модели k: один шаг или все шаги сразу"""
+
+        target = (self._data if data is None else data)['target']
+
+        return target if self._multi_output else target[:, k]
+
+    @staticmethod
+    def _train(model, X, y):
+        model.fit(X=X, y=y)
+
+        return model
+
+    def train(self) -> "CatBoostForecast":
+        # на тех же данных и гиперпараметрах модели уже обучались - берем их из хранилища
+        trained = model_registry.load(self._fingerprint)
+
+        if not isinstance(trained, dict):
+            trained = dict(
+                models=tuple(
+                    self._train(model, X=self._data[design], y=self._target(k))
+                    for k, (design, model) in enumerate(zip(self._designs(), self._models))
+                ),
+                widths=self._calibrate()
+            )
+            model_registry.save(self._fingerprint, trained)
+
+        self._models, self._widths = trained['models'], trained['widths']
+
+        return self
+
+    def _calibrate(self) -> Optional[np.ndarray]:
+        """
+        Полуширины интервалов прогноза (шаг x уровень) по ошибкам на отложенных месяцах
+
+        Модели обучаются без последних CALIBRATION_SHARE месяцев (проход backtest_fold) и ошибаются на них.
+        Полуширина уровня level - ceil((n + 1) * level)-я по возрастанию из n ошибок (split conformal).
+        Если n для уровня мало, берется наибольшая ошибка, поэтому при малом n уровни могут совпадать
+        """
+
+        calibration = int(len(self._data) * CALIBRATION_SHARE)
+
+        if calibration < 1:
+            return None
+
+        fold = self.backtest_fold(len(self._data) - calibration, calibration)
+        errors = np.sort(np.abs(np.stack(fold.actual) - np.stack(fold.predict)), axis=1)
+
+        # с bfill отложенных месяцев может остаться меньше: последние, которые нечем заполнить, отбрасываются
+        n = errors.shape[1]
+        if n < 1:
+            return None
+
+        ranks = np.minimum(np.ceil((n + 1) * _LEVELS).astype(int), n)
+
+        return errors[:, ranks - 1]
+
+    def update(self, refit: bool = False) -> "CatBoostForecast":
+        """
+        Обновление обученных моделей после append_data
+
+        Модель, у которой не изменились ни признаки, ни цель, остается как есть. Остальные
+        продолжают бустинг от прошлой модели (init_model) или, при refit, обучаются заново.
+        Результат не сохраняется в хранилище моделей: он зависит от истории добавлений.
+        Интервалы прогноза остаются откалиброванными при обучении сессии
+        """
+
+        previous = self._previous_data
+        models = []
+
+        for k, (design, model) in enumerate(zip(self._designs(), self._models)):
+            x, y = self._data[design], self._target(k)
+
+            if (previous is not None
+                    and np.array_equal(previous[design], x)
+                    and np.array_equal(self._target(k, previous), y)):
+                models.append(model)
+                continue
+
+            updated = self._new_model()
+            updated.fit(X=x, y=y, init_model=None if refit else model)
+            models.append(updated)
+
+        self._models = tuple(models)
+        self._previous_data = None
+
+        return self
+
+    def validation_error(self, step: int, valid_size: int) -> float:
+        """
+        MAPE модели шага step на последних valid_size месяцах, в масштабе индекса.
+        Для одной модели на все шаги - средняя MAPE по шагам
+        """
+
+        train, test = self._plan.split(self._data, len(self._data) - valid_size, valid_size)
+        design = self._designs()[step]
+
+        model = self._train(self._models[step], X=train[design], y=self._target(step, train))
+        predict, y = model.predict(test[design]), self._target(step, test)
+
+        if not self._multi_output:
+            return mean_absolute_percentage_error(self._plan.inverse(step, y), self._plan.inverse(step, predict))
+
+        return float(np.mean([
+            mean_absolute_percentage_error(self._plan.inverse(k, y[:, k]), self._plan.inverse(k, predict[:, k]))
+            for k in range(y.shape[1])
+        ]))
+
+    def backtest_fold(self, origin: int, test_size: int) -> BacktestFold:
+        """
+        Модели шагов, обученные на строках до origin, и их прогноз на test_size строках после.
+        Выборки строит ForecastPlan.split: без bfill это срезы уже построенных матриц, без копирования
+        """
+
+        train, test = self._plan.split(self._data, origin, test_size)
+        actual, predict = [], []
+
+        for k, design in enumerate(self._designs()):
+            y = self._target(k, test)
+            model = self._train(self._new_model(), X=train[design], y=self._target(k, train))
+            y_hat = model.predict(test[design])
+
+            # у одной модели на все шаги прогноз - матрица (месяц x шаг)
+            for step in range(len(self.spec.horizons)) if self._multi_output else (k,):
+                y_true = y[:, step] if self._multi_output else y
+                y_pred = y_hat[:, step] if self._multi_output else y_hat
+
+                actual.append(self._plan.inverse(step, y_true))
+                predict.append(self._plan.inverse(step, y_pred))
+
+        return BacktestFold(
+            origin=self._data.months[origin],
+            train_size=len(train),
+            actual=tuple(actual),
+            predict=tuple(predict)
+        )
+
+    @staticmethod
+    def suggest_hparams(trial, hparams: CatBoostHyperparameters) -> CatBoostHyperparameters:
+        # способ обучения задает пользователь, его не подбираем
+        return CatBoostHyperparameters(
+            depth=trial.suggest_int('depth', 2, 10),
+            learning_rate=trial.suggest_float('learning_rate', 0.01, 0.5, log=True),
+            l2_leaf_reg=trial.suggest_float('l2_leaf_reg', 0.001, 4.9, log=True),
+            iterations=trial.suggest_int('iterations', 4, 31),
+            mode=hparams.mode
+        )
+
+    @staticmethod
+    def _score(predict, y) -> ModelScore:
+        return ModelScore(
+            mape=mean_absolute_percentage_error(y, predict),
+            r2_score=r2_score(y, predict)
+        )
+
+    def _iteration_predict(self, data):
+        if self._multi_output:
+            predict = self._models[0].predict(data)
+
+            return tuple(self._plan.inverse(k, predict[k]) for k in range(len(predict)))
+
+        return tuple(self._plan.inverse(k, model.predict(data)) for k, model in enumerate(self._models))
+
+    def predict(self) -> ForecastResponse:
+        # Берем все значения
+        x = self._data[self._designs()[0]]
+
+        # Предсказание модели предыдущих значений
+        previous = self._models[0].predict(x)
+        if self._multi_output:
+            previous = previous[:, 0]
+
+        # Предсказанеи последующих шагов по последнему значению
+        predict = self._iteration_predict(x[-1])
+
+        # Получаем score
+        scores = [self._score(predict=previous, y=self._data['target'][:, 0])]
+
+        return ForecastResponse(
+            previous=previous,
+            predict=predict,
+            scores=scores,
+            intervals=self._intervals(np.asarray(predict, dtype=np.float64).ravel())
+        )
+
+    def _intervals(self, predict: np.ndarray) -> list[PredictionInterval]:
+        if self._widths is None:
+            return []
+
+        lower, upper = predict[:, None] - self._widths, predict[:, None] + self._widths
+
+        return [
+            PredictionInterval(level=level, lower=lower[:, j], upper=upper[:, j])
+            for j, level in enumerate(ConfidenceIntervalEnum)
+        ]
@@ -0,0 +1,139 @@
+from dataclasses import dataclass, field
+from datetime import date
+from functools import partial
+from typing import Callable, Optional
+
+import numpy as np
+
+from app.cache import fingerprint, series_cache
+from app.service.data_preprocess import TimeSeries, LagEngine, LaggedData, align_monthly
+
+
+@dataclass(frozen=True)
+class Horizon:
+    """
+    Модель одного шага прогноза
+
+    features - признаки вида <ряд>_lag_<лаг>, target - цель,
+    inverse - обратное преобразование прогноза (если цель преобразована в transforms)
+    """
+
+    features: tuple[str, ...]
+    target: str
+    inverse: Optional[Callable[[np.ndarray], np.ndarray]] = None
+
+
+@dataclass(frozen=True)
+class Derived:
+    """
+    Ряд, который считается из других рядов спецификации после усреднения
+
+    compute получает только ряды inputs, и ключ ряда в кеше строится только по их хешам
+    """
+
+    inputs: tuple[str, ...]
+    compute: Callable[[dict[str, TimeSeries]], TimeSeries]
+
+
+@dataclass(frozen=True)
+class ForecastSpec:
+    """
+    Описание модели прогноза индекса данными
+
+    inputs - входные ряды в порядке set_data, первый из них - прогнозируемый индекс
+    monthly - ежедневные ряды, которые усредняются по месяцам
+    derived - ряды, которые считаются из входных (и объявленных раньше производных) после усреднения
+    transforms - преобразования колонок признаков и целей
+    date_start - первый месяц выборки, bfill - заполнять ли пропуски следующими значениями
+    """
+
+    inputs: tuple[str, ...]
+    horizons: tuple[Horizon, ...]
+    monthly: tuple[str, ...] = ()
+    derived: dict[str, Derived] = field(default_factory=dict)
+    transforms: dict[str, Callable[[np.ndarray], np.ndarray]] = field(default_factory=dict)
+    date_start: Optional[date] = None
+    bfill: bool = False
+
+    @property
+    def target(self) -> str:
+        return self.inputs[0]
+
+    def compile(self) -> 'ForecastPlan':
+        return ForecastPlan(self)
+
+
+class ForecastPlan:
+    """
+    Спецификация, скомпилированная в план выполнения
+
+    Порядок колонок, план лагов LagEngine и месяц начала выборки считаются один раз,
+    prepare только раскладывает ряды по этому плану. Помесячные и производные ряды берутся
+    из series_cache по хешу исходных рядов, общего для всех моделей процесса
+    """
+
+    def __init__(self, spec: ForecastSpec):
+        self.spec = spec
+        self.columns = (*spec.inputs, *spec.derived)
+
+        designs = {f'model_{k}': horizon.features for k, horizon in enumerate(spec.horizons, 1)}
+        # одна модель на все шаги обучается на объединении признаков шагов
+        designs['multi_output'] = tuple(dict.fromkeys(f for horizon in spec.horizons for f in horizon.features))
+        designs['target'] = tuple(horizon.target for horizon in spec.horizons)
+
+        self._engine = LagEngine(columns=self.columns, designs=designs, transforms=spec.transforms)
+        self._start = None if spec.date_start is None else np.datetime64(spec.date_start, 'M')
+        self._inverse = tuple(horizon.inverse for horizon in spec.horizons)
+
+    def prepare(self, raw_data: dict[str, TimeSeries], keys: dict[str, str]) -> LaggedData:
+        """
+        Матрицы признаков model_1..model_n, multi_output и целей target по входным рядам
+
+        keys - хеши содержимого входных рядов, из них строятся ключи series_cache
+        """
+
+        series, keys = dict(raw_data), dict(keys)
+
+        for name in self.spec.monthly:
+            series[name] = series_cache.get(fingerprint('days_to_months', keys[name]), series[name].days_to_months)
+
+        # производный ряд зависит только от своих inputs: изменение других рядов его не пересчитывает
+        for name, derived in self.spec.derived.items():
+            compute = derived.compute
+            keys[name] = fingerprint(name, f'{compute.__module__}.{compute.__qualname__}', *(keys[i] for i in derived.inputs))
+            series[name] = series_cache.get(keys[name], partial(compute, {i: series[i] for i in derived.inputs}))
+
+        # все ряды раскладываем на общий помесячный календарь
+        frame = align_monthly({name: series[name] for name in self.columns})
+
+        # берем месяцы с известным индексом, начиная с date_start
+        rows = ~np.isnan(frame.column(self.spec.target))
+        if self._start is not None:
+            rows &= frame.months >= self._start
+
+        return self._engine.build(frame, rows, bfill=self.spec.bfill)
+
+    def split(self, data: LaggedData, origin: int, test_size: int) -> tuple[LaggedData, LaggedData]:
+        """
+        Обучающая выборка из строк до origin и тестовая из test_size строк с него
+
+        С bfill пропуск заполняется следующим значением, поэтому в срезах общих матриц обучающие строки
+        видят месяцы теста. Тогда выборки строятся заново, каждая только по своим месяцам, и в тестовой
+        может оказаться меньше строк: последние, которые нечем заполнить, отбрасываются, как в prepare
+        """
+
+        if not self.spec.bfill:
+            return data.take(slice(None, origin)), data.take(slice(origin, origin + test_size))
+
+        months = data.frame.months
+        start, end = data.months[origin], data.months[min(origin + test_size, len(data)) - 1]
+
+        return (self._engine.build(data.frame, data.rows & (months < start), bfill=True),
+                self._engine.build(data.frame, data.rows & (months >= start) & (months <= end), bfill=True))
+
+    def inverse(self, horizon: int, predict: np.ndarray) -> np.ndarray:
+        """Прогноз модели horizon (с нуля) в масштабе индекса"""
+
+        inverse = self._inverse[horizon]
+
+        return predict if inverse is None else inverse(predict)
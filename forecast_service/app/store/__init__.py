@@ -0,0 +1,4 @@
+from .series_store import SeriesStore, series_store, lifespan
+
+
+__all__ = ['SeriesStore', 'series_store', 'lifespan']
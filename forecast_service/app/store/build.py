@@ -0,0 +1,106 @@
+"""
+Сборка хранилища временных рядов из csv
+
+Поддерживаются выгрузки озера данных (<dataset_uuid>.csv с колонками dataset;date;values)
+и широкие таблицы вроде data/preprocessed_ipp_factors.csv, где каждая колонка - отдельный ряд
+с идентификатором <имя файла>.<колонка>
+
+python -m app.store.build examples/raw_data/*.csv
+"""
+
+import argparse
+import os
+import re
+
+import pandas as pd
+import pyarrow as pa
+
+from app import config
+from app.store.series_store import SERIES_SCHEMA, SERIES_SUFFIX
+
+
+def _read_csv(path: str) -> pd.DataFrame:
+    # выгрузки озера данных разделены ';', остальные таблицы - ','
+    with open(path, encoding='utf-8') as f:
+        sep = ';' if ';' in f.readline() else ','
+
+    return pd.read_csv(path, sep=sep)
+
+
+def _parse_dates(dates: pd.Series) -> pd.Series:
+    dayfirst = dates.astype(str).str.match(r'^\d{2}\.\d{2}\.\d{4}$').all()
+
+    return pd.to_datetime(dates, format='%d.%m.%Y' if dayfirst else 'ISO8601').dt.date
+
+
+def read_table(path: str) -> pd.DataFrame:
+    """Таблица из csv с колонкой date, разобранной в datetime.date. Разделитель и формат дат определяются по файлу"""
+
+    df = _read_csv(path)
+
+    if 'date' not in df.columns:
+        raise ValueError('нет колонки date')
+
+    df['date'] = _parse_dates(df['date'])
+
+    return df
+
+
+def read_series(path: str) -> dict[str, pd.DataFrame]:
+    """Ряды из файла: dataset_uuid -> DataFrame(date, value)"""
+
+    df = read_table(path)
+    dates = df['date']
+
+    stem = os.path.splitext(os.path.basename(path))[0]
+
+    if 'values' in df.columns:
+        columns = {stem: df['values']}
+    else:
+        # идентификатор ряда становится именем файла, поэтому берем только колонки с короткими ascii именами
+        columns = {
+            f'{stem}.{column}': df[column] for column in df.columns
+            if column not in ('date', 'dataset')
+            and re.fullmatch(r'[A-Za-z][\w-]{0,63}', column, flags=re.ASCII)
+            and pd.api.types.is_numeric_dtype(df[column])
+        }
+
+    return {
+        uuid: pd.DataFrame({'date': dates, 'value': values.astype(float)}).dropna().sort_values(by='date')
+        for uuid, values in columns.items()
+    }
+
+
+def write_series(root: str, dataset_uuid: str, df: pd.DataFrame) -> None:
+    table = pa.Table.from_pandas(df, schema=SERIES_SCHEMA, preserve_index=False)
+
+    os.makedirs(root, exist_ok=True)
+    tmp_path = os.path.join(root, f'.{dataset_uuid}{SERIES_SUFFIX}')
+
+    with pa.OSFile(tmp_path, 'wb') as sink, pa.ipc.new_file(sink, SERIES_SCHEMA) as writer:
+        writer.write_table(table)
+
+    # сервис мог уже отобразить старый файл в память, поэтому заменяем его целиком
+    os.replace(tmp_path, os.path.join(root, f'{dataset_uuid}{SERIES_SUFFIX}'))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Сборка хранилища временных рядов из csv')
+    parser.add_argument('paths', nargs='+', help='csv файлы с рядами')
+    parser.add_argument('--out', default=config.SERIES_STORE_DIR, help='каталог хранилища')
+    args = parser.parse_args()
+
+    for path in args.paths:
+        try:
+            series = read_series(path)
+        except (ValueError, pd.errors.ParserError, UnicodeDecodeError) as e:
+            print(f'Пропускаем {path}: {e}')
+            continue
+
+        for dataset_uuid, df in series.items():
+            write_series(args.out, dataset_uuid, df)
+            print(f'{dataset_uuid}: {len(df)} значений')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,130 @@
+import os
+from contextlib import asynccontextmanager
+from datetime import date
+from typing import AsyncIterator, Optional
+
+import numpy as np
+import pyarrow as pa
+import pyarrow.compute as pc
+from fastapi import FastAPI
+from pydantic import BaseModel
+
+from app import config
+from app.schemas import Feature, SeriesReference
+
+
+# схема файла ряда: даты по возрастанию и значения
+SERIES_SCHEMA = pa.schema([('date', pa.date32()), ('value', pa.float64())])
+
+SERIES_SUFFIX = '.arrow'
+
+
+class SeriesStore:
+    """
+    Колоночное хранилище временных рядов
+
+    Каждый ряд - Arrow IPC файл <dataset_uuid>.arrow. Файлы отображаются в память при старте,
+    поэтому данные не копируются в кучу процесса и читаются только по мере обращения.
+    При каждом обращении к ряду проверяется время изменения и размер его файла: пересобранный
+    или добавленный после старта ряд отображается заново, удаленный - пропадает
+    """
+
+    def __init__(self):
+        self._root = ''
+        self._tables: dict[str, pa.Table] = {}
+        self._versions: dict[str, str] = {}
+
+    def __contains__(self, dataset_uuid: str) -> bool:
+        return self.version(dataset_uuid) is not None
+
+    @property
+    def uuids(self) -> list[str]:
+        return sorted(self._tables)
+
+    def _path(self, dataset_uuid: str) -> str:
+        return os.path.join(self._root, f'{dataset_uuid}{SERIES_SUFFIX}')
+
+    def version(self, dataset_uuid: str) -> Optional[str]:
+        """Версия файла ряда (время изменения и размер), None - такого ряда нет"""
+
+        if not self._root or os.path.basename(dataset_uuid) != dataset_uuid or dataset_uuid.startswith('.'):
+            return None
+
+        try:
+            stat = os.stat(self._path(dataset_uuid))
+        except OSError:
+            return None
+
+        return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+    def _table(self, dataset_uuid: str) -> pa.Table:
+        version = self.version(dataset_uuid)
+
+        if version is None:
+            self._tables.pop(dataset_uuid, None)
+            self._versions.pop(dataset_uuid, None)
+            raise KeyError(dataset_uuid)
+
+        if self._versions.get(dataset_uuid) != version:
+            # build заменяет файл целиком, поэтому старое отображение остается целым, пока его читают
+            source = pa.memory_map(self._path(dataset_uuid), 'r')
+            self._tables[dataset_uuid] = pa.ipc.open_file(source).read_all()
+            self._versions[dataset_uuid] = version
+
+        return self._tables[dataset_uuid]
+
+    def load(self, root: str) -> "SeriesStore":
+        self._root = root
+        self._tables, self._versions = {}, {}
+
+        if not os.path.isdir(root):
+            return self
+
+        for name in os.listdir(root):
+            if name.endswith(SERIES_SUFFIX) and not name.startswith('.'):
+                self._table(name[:-len(SERIES_SUFFIX)])
+
+        return self
+
+    def get(self, dataset_uuid: str, as_of: Optional[date] = None) -> Feature:
+        """Ряд по dataset_uuid. Бросает KeyError, если такого ряда нет"""
+
+        table = self._table(dataset_uuid)
+
+        if as_of is not None:
+            # даты отсортированы, поэтому срез до as_of включительно находим бинарным поиском
+            end = np.searchsorted(table.column('date').to_numpy(), np.datetime64(as_of, 'D'), side='right')
+            table = table.slice(0, end)
+
+        dates = pc.strftime(table.column('date').cast(pa.timestamp('s')), format='%d.%m.%Y')
+
+        # данные из хранилища уже проверены, поэтому валидацию pydantic пропускаем
+        return Feature.model_construct(
+            values=table.column('value').to_numpy(),
+            dates=dates.to_pylist()
+        )
+
+    def resolve(self, model: BaseModel) -> BaseModel:
+        """Заменяет в запросе все SeriesReference на ряды из хранилища"""
+
+        update = {}
+
+        for name, value in model:
+            if isinstance(value, SeriesReference):
+                update[name] = self.get(value.dataset_uuid, value.as_of)
+            elif isinstance(value, BaseModel):
+                update[name] = self.resolve(value)
+            elif isinstance(value, list):
+                update[name] = [self.get(item.dataset_uuid, item.as_of) if isinstance(item, SeriesReference) else item
+                                for item in value]
+
+        return model.model_copy(update=update)
+
+
+series_store = SeriesStore()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    series_store.load(config.SERIES_STORE_DIR)
+    yield
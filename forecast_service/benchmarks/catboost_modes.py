@@ -0,0 +1,77 @@
+"""
+Сравнение способов обучения CatBoost: модель на каждый шаг против одной модели MultiRMSE
+
+Время - полный пайплайн прогноза ИПП (set_data -> predict) без хранилища моделей,
+точность - MAPE на последних valid_size месяцах у моделей, обученных на предыдущих
+
+    python -m benchmarks.catboost_modes --repeat 20 --iterations 8 16 31
+"""
+
+import argparse
+import json
+import os
+import statistics
+import time
+
+# обученные модели не должны браться из хранилища
+os.environ['MODEL_REGISTRY_DIR'] = ''
+
+from app.schemas import CatBoostHyperparameters, CatBoostMode, IPPRequestCB  # noqa: E402
+from app.service.forecast_models import IPPForecast  # noqa: E402
+
+from .data import ipp_body  # noqa: E402
+
+
+def load_series() -> dict:
+    request = IPPRequestCB(**ipp_body())
+
+    return dict(ipp=request.ipp, **dict(request.features))
+
+
+def run(hparams: CatBoostHyperparameters, series: dict, repeat: int, valid_size: int) -> dict:
+    timings = []
+
+    for _ in range(repeat):
+        start = time.perf_counter()
+        IPPForecast(hparams).set_data(**series).preprocess_features().train().predict()
+        timings.append(time.perf_counter() - start)
+
+    model = IPPForecast(hparams).set_data(**series).preprocess_features()
+    errors = [model.validation_error(step, valid_size) for step in range(IPPForecast.validation_steps(hparams))]
+
+    return dict(
+        mode=hparams.mode.value,
+        iterations=hparams.iterations,
+        median_ms=statistics.median(timings) * 1000,
+        min_ms=min(timings) * 1000,
+        valid_mape=statistics.mean(errors)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=20)
+    parser.add_argument('--iterations', type=int, nargs='+', default=[8])
+    parser.add_argument('--valid-size', type=int, default=12)
+    parser.add_argument('--json', action='store_true', help='Вывести результаты в JSON')
+    args = parser.parse_args()
+
+    series = load_series()
+
+    results = [
+        run(CatBoostHyperparameters(iterations=iterations, mode=mode), series, args.repeat, args.valid_size)
+        for iterations in args.iterations
+        for mode in CatBoostMode
+    ]
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    print(f'{"mode":<14}{"iterations":>11}{"median, ms":>12}{"min, ms":>10}{"valid MAPE":>12}')
+    for r in results:
+        print(f'{r["mode"]:<14}{r["iterations"]:>11}{r["median_ms"]:>12.1f}{r["min_ms"]:>10.1f}{r["valid_mape"]:>12.4f}')
+
+
+if __name__ == '__main__':
+    main()
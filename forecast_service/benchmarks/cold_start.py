@@ -0,0 +1,119 @@
+"""
+Холодный старт воркера: через сколько после запуска процесса приложение готово отвечать
+
+Каждый замер - отдельный процесс python. Замеряются импорт app.main, запуск lifespan,
+первый GET /v1/ipp/features_list и первый прогноз ИПП на CatBoost (с импортом catboost),
+а также пиковый RSS процесса. Строка eager - импорт всех моделей сразу, как было
+до ленивой загрузки бэкендов
+
+    python -m benchmarks.cold_start --repeat 5 --backends catboost base,catboost
+"""
+
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import time
+
+
+def _rss_mb() -> float:
+    # на linux ru_maxrss в килобайтах
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def child(eager: bool) -> dict:
+    """Один холодный старт в текущем процессе"""
+
+    result = {}
+
+    start = time.perf_counter()
+    from app.main import forecast_service
+
+    if eager:
+        from app.service import forecast_models
+        for name in forecast_models.__all__:
+            getattr(forecast_models, name)
+
+    from fastapi.testclient import TestClient
+    from .data import ipp_body
+
+    result['import_s'] = time.perf_counter() - start
+    result['import_rss_mb'] = _rss_mb()
+
+    body = ipp_body()
+
+    start = time.perf_counter()
+    with TestClient(forecast_service) as client:
+        result['startup_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        client.get('/v1/ipp/features_list').raise_for_status()
+        result['features_list_s'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        response = client.post('/v1/ipp/catboost', json=body)
+        result['catboost_s'] = time.perf_counter() - start if response.status_code == 200 else None
+
+    result['rss_mb'] = _rss_mb()
+
+    return result
+
+
+def run(backends: str, eager: bool, repeat: int) -> dict:
+    env = dict(
+        os.environ,
+        FORECAST_BACKENDS=backends,
+        # обучение в том же процессе, чтобы импорт catboost попал в замер
+        FORECAST_EXECUTOR=os.environ.get('FORECAST_EXECUTOR', 'thread'),
+        MODEL_REGISTRY_DIR=''
+    )
+    args = [sys.executable, '-m', 'benchmarks.cold_start', '--child'] + (['--eager'] if eager else [])
+    runs = [
+        json.loads(subprocess.run(args, env=env, check=True, capture_output=True, text=True).stdout)
+        for _ in range(repeat)
+    ]
+
+    result = dict(backends=backends, eager=eager)
+    for key in runs[0]:
+        values = [r[key] for r in runs if r[key] is not None]
+        result[key] = statistics.median(values) if values else None
+
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--backends', nargs='+', default=['catboost', 'base,catboost'])
+    parser.add_argument('--json', action='store_true', help='Вывести результаты в JSON')
+    parser.add_argument('--child', action='store_true', help=argparse.SUPPRESS)
+    parser.add_argument('--eager', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(child(args.eager)))
+        return
+
+    results = [run(backends, False, args.repeat) for backends in args.backends]
+    results.append(run('base,catboost', True, args.repeat))
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+        return
+
+    def fmt(value):
+        return '-' if value is None else f'{value:.2f}'
+
+    print(f'{"backends":<16}{"import, s":>11}{"startup, s":>12}{"features, s":>13}{"catboost, s":>13}'
+          f'{"RSS import, MB":>16}{"RSS, MB":>10}')
+    for r in results:
+        name = 'eager' if r['eager'] else r['backends']
+        print(f'{name:<16}{fmt(r["import_s"]):>11}{fmt(r["startup_s"]):>12}{fmt(r["features_list_s"]):>13}'
+              f'{fmt(r["catboost_s"]):>13}{r["import_rss_mb"]:>16.0f}{r["rss_mb"]:>10.0f}')
+
+
+if __name__ == '__main__':
+    main()
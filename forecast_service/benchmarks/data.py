@@ -0,0 +1,71 @@
+"""
+Входные данные бенчмарков: examples/data.json и выгрузки examples/raw_data
+
+Тела запросов собираются в том виде, в котором их принимает API. Ряда оборота розничной
+торговли в выгрузках нет, поэтому в запросе ОРТ целевым рядом стоит ИПП
+"""
+
+import json
+import os
+from typing import Optional
+
+from app.schemas import Feature
+from app.store.build import read_table
+
+
+EXAMPLES_DIR = os.path.join(os.path.dirname(__file__), '..', 'examples')
+
+RAW_DATA_DIR = os.path.join(EXAMPLES_DIR, 'raw_data')
+
+
+def csv_feature(name: str, column: Optional[str] = None) -> dict:
+    """Ряд из csv в raw_data. По умолчанию значения берутся из последней колонки"""
+
+    df = read_table(os.path.join(RAW_DATA_DIR, name))
+    df = df.dropna(subset=[column or df.columns[-1]])
+
+    return Feature(
+        dates=[d.strftime('%d.%m.%Y') for d in df['date']],
+        values=df[column or df.columns[-1]].astype(float).tolist()
+    ).model_dump(mode='json')
+
+
+def ipp_body() -> dict:
+    with open(os.path.join(EXAMPLES_DIR, 'data.json')) as f:
+        body = json.load(f)
+
+    # в примере признак назван с опечаткой
+    body['features']['business_clim'] = body['features'].pop('bussines_clim')
+
+    return body
+
+
+def ipc_body() -> dict:
+    aggregates = 'денежные агрегаты.csv'
+
+    return dict(
+        hparams={},
+        ipc=csv_feature('Базовый индекс потребительских цен.csv'),
+        features=dict(
+            curs=csv_feature('5e5ac82a-ab76-4567-b095-92f8064acb51.csv'),
+            interest_rate=csv_feature('87d93650-33f7-44b2-96df-6d520fa76c12.csv'),
+            money_supply=csv_feature(aggregates, 'Денежная масса, млрд нац ден ед, Россия'),
+            agg_m0=csv_feature(aggregates, 'Денежный агрегат М0')
+        )
+    )
+
+
+def ort_body() -> dict:
+    return dict(
+        hparams={},
+        ort=csv_feature('c1c92863-1827-405e-b3e4-dea782f57316.csv'),
+        features=dict(
+            salary=csv_feature('Денежные доходы населения, Россия — Диаграмма.csv'),
+            business_clim=csv_feature('14c74eba-c1a7-4aff-a1e3-0aa473ce8062.csv'),
+            news=csv_feature('423f7092-d29b-43da-8209-f100c1fc88cd.csv')
+        )
+    )
+
+
+def base_body(epochs: int) -> dict:
+    return dict(hparams=dict(epochs=epochs), target=ipp_body()['ipp'])
@@ -0,0 +1,203 @@
+"""
+Время этапов пайплайнов прогноза и запросов к API
+
+Для ИПП, ИПЦ, ОРТ и NHITS отдельно замеряются set_data, preprocess_features, train и predict,
+затем тот же запрос проходит через ASGI приложение в том же процессе: без кеша (miss)
+и из кеша (hit). Хранилище моделей и модели NHITS в памяти отключены, каждый повтор
+обучается заново. Первый прогон каждого пайплайна (импорт библиотек, прогрев) не учитывается
+
+    python -m benchmarks.stages --repeat 10 --output stages.json
+    python -m benchmarks.stages --repeat 10 --compare stages.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import time
+from datetime import datetime
+from typing import Optional
+
+# обученные модели не должны браться из хранилища и из памяти
+os.environ['MODEL_REGISTRY_DIR'] = ''
+os.environ['NHITS_WARM_MODELS'] = '0'
+# запросы к API обучают модели в том же процессе
+os.environ.setdefault('FORECAST_EXECUTOR', 'thread')
+
+import httpx  # noqa: E402
+from fastapi_cache import FastAPICache  # noqa: E402
+
+from app.main import forecast_service  # noqa: E402
+from app.schemas import BaseRequest, IPCRequestCB, IPPRequestCB, ORTRequestCB  # noqa: E402
+from app.service.forecast_models import get_model  # noqa: E402
+
+from .data import base_body, ipc_body, ipp_body, ort_body  # noqa: E402
+
+
+STAGES = ('set_data', 'preprocess_features', 'train', 'predict')
+
+# пайплайн -> модель, DTO запроса, целевой ряд, путь API
+PIPELINES = {
+    'ipp': ('IPPForecast', IPPRequestCB, 'ipp', '/v1/ipp/catboost'),
+    'ipc': ('IPCForecast', IPCRequestCB, 'ipc', '/v1/ipc/catboost'),
+    'ort': ('ORTForecast', ORTRequestCB, 'ort', '/v1/ort/catboost'),
+    'nhits': ('BaseForecastService', BaseRequest, 'target', '/v1/base'),
+}
+
+
+def _summary(timings: list[float]) -> dict:
+    return dict(
+        median_ms=statistics.median(timings) * 1000,
+        min_ms=min(timings) * 1000,
+        mean_ms=statistics.mean(timings) * 1000,
+        n=len(timings)
+    )
+
+
+def _series(request, target: str) -> dict:
+    if target == 'target':
+        return dict(target_data=request.target)
+
+    return {target: getattr(request, target), **dict(request.features)}
+
+
+def time_stages(pipeline: str, body: dict, repeat: int) -> dict[str, list[float]]:
+    name, request_cls, target, _ = PIPELINES[pipeline]
+    model_cls = get_model(name)
+    request = request_cls(**body)
+    series = _series(request, target)
+
+    timings = {stage: [] for stage in STAGES + ('total',)}
+
+    for i in range(repeat + 1):
+        model = model_cls(request.hparams)
+        calls = dict(
+            set_data=lambda: model.set_data(**series),
+            preprocess_features=model.preprocess_features,
+            train=model.train,
+            predict=model.predict
+        )
+
+        elapsed = {}
+        for stage in STAGES:
+            start = time.perf_counter()
+            calls[stage]()
+            elapsed[stage] = time.perf_counter() - start
+
+        if i == 0:
+            continue
+
+        for stage in STAGES:
+            timings[stage].append(elapsed[stage])
+        timings['total'].append(sum(timings[stage][-1] for stage in STAGES))
+
+    return timings
+
+
+async def time_api(bodies: dict[str, dict], repeat: int) -> dict[str, dict[str, list[float]]]:
+    timings = {}
+
+    async with forecast_service.router.lifespan_context(forecast_service):
+        transport = httpx.ASGITransport(app=forecast_service)
+
+        async with httpx.AsyncClient(transport=transport, base_url='http://bench', timeout=None) as client:
+            for pipeline, body in bodies.items():
+                path = PIPELINES[pipeline][3]
+                timings[pipeline] = {'api_miss': [], 'api_hit': []}
+
+                for _ in range(repeat):
+                    await FastAPICache.clear()
+
+                    for stage in ('api_miss', 'api_hit'):
+                        start = time.perf_counter()
+                        response = await client.post(path, json=body)
+                        timings[pipeline][stage].append(time.perf_counter() - start)
+                        response.raise_for_status()
+
+    return timings
+
+
+def _commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=os.path.dirname(__file__), check=True, capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(pipelines: list[str], repeat: int, nhits_epochs: int) -> dict:
+    bodies = dict(ipp=ipp_body, ipc=ipc_body, ort=ort_body, nhits=lambda: base_body(nhits_epochs))
+    bodies = {pipeline: bodies[pipeline]() for pipeline in pipelines}
+
+    timings = {pipeline: time_stages(pipeline, body, repeat) for pipeline, body in bodies.items()}
+
+    for pipeline, api in asyncio.run(time_api(bodies, repeat)).items():
+        timings[pipeline].update(api)
+
+    return dict(
+        meta=dict(
+            commit=_commit(),
+            created=datetime.now().isoformat(timespec='seconds'),
+            python=platform.python_version(),
+            machine=platform.machine(),
+            cpu_count=os.cpu_count(),
+            repeat=repeat,
+            nhits_epochs=nhits_epochs,
+            executor=os.environ['FORECAST_EXECUTOR']
+        ),
+        results=[
+            dict(pipeline=pipeline, stage=stage, **_summary(values))
+            for pipeline, stages in timings.items()
+            for stage, values in stages.items()
+        ]
+    )
+
+
+def print_results(report: dict, baseline: Optional[dict] = None) -> None:
+    old = {} if baseline is None else {(r['pipeline'], r['stage']): r for r in baseline['results']}
+
+    header = f'{"pipeline":<9}{"stage":<21}{"median, ms":>12}{"min, ms":>10}'
+    if baseline is not None:
+        header += f'{"was, ms":>10}{"ratio":>8}'
+    print(header)
+
+    for r in report['results']:
+        line = f'{r["pipeline"]:<9}{r["stage"]:<21}{r["median_ms"]:>12.1f}{r["min_ms"]:>10.1f}'
+
+        was = old.get((r['pipeline'], r['stage']))
+        if was is not None:
+            line += f'{was["median_ms"]:>10.1f}{r["median_ms"] / was["median_ms"]:>8.2f}'
+
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=10)
+    parser.add_argument('--pipelines', nargs='+', choices=list(PIPELINES), default=list(PIPELINES))
+    parser.add_argument('--nhits-epochs', type=int, default=30)
+    parser.add_argument('--output', help='Записать результаты в JSON файл')
+    parser.add_argument('--compare', help='JSON файл прошлого запуска для сравнения')
+    args = parser.parse_args()
+
+    report = run(args.pipelines, args.repeat, args.nhits_epochs)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+
+    print_results(report, baseline)
+
+
+if __name__ == '__main__':
+    main()
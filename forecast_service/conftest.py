@@ -0,0 +1 @@
+# каталог сервиса в sys.path, чтобы тесты импортировали пакет app
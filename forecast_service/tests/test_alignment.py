@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from app.service.data_preprocess import TimeSeries, align_monthly
+from benchmarks.data import ipc_body, ipp_body, ort_body
+
+
+def _monthly(body: dict, target: str) -> dict[str, TimeSeries]:
+    features = {target: body[target], **body['features']}
+
+    return {name: TimeSeries(values=f['values'], dates=f['dates']).days_to_months() for name, f in features.items()}
+
+
+def _merged(series: dict[str, TimeSeries]) -> pd.DataFrame:
+    """Прежнее выравнивание: outer merge по дате для каждого ряда"""
+
+    df = pd.DataFrame({'date': np.array([], dtype='datetime64[M]')})
+
+    for name, ts in series.items():
+        df = df.merge(pd.DataFrame({'date': ts.months(), name: ts.values}), on='date', how='outer')
+
+    return df.sort_values(by='date', ignore_index=True)
+
+
+def test_align_monthly_matches_outer_merges():
+    for body, target in ((ipp_body(), 'ipp'), (ipc_body(), 'ipc'), (ort_body(), 'ort')):
+        series = _monthly(body, target)
+        expected = _merged(series)
+
+        aligned = align_monthly(series)
+
+        assert aligned.columns == tuple(series)
+        np.testing.assert_array_equal(aligned.months, expected.date.to_numpy().astype('datetime64[M]'), err_msg=target)
+        np.testing.assert_array_equal(aligned.values, expected[list(series)].to_numpy(), err_msg=target)
+
+
+def test_align_monthly_keeps_only_occupied_months():
+    aligned = align_monthly({
+        'a': TimeSeries(values=[1.0, 2.0], dates=['31.01.2020', '31.05.2020']),
+        'b': TimeSeries(values=[3.0], dates=['15.03.2020']),
+    })
+
+    np.testing.assert_array_equal(aligned.months, np.array(['2020-01', '2020-03', '2020-05'], dtype='datetime64[M]'))
+    np.testing.assert_array_equal(aligned.column('a'), [1.0, np.nan, 2.0])
+    np.testing.assert_array_equal(aligned.column('b'), [np.nan, 3.0, np.nan])
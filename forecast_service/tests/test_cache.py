@@ -0,0 +1,129 @@
+import asyncio
+from typing import Optional
+
+import pytest
+from fastapi_cache import FastAPICache
+
+from app.api.encoding import ENCODERS, _response_media_type
+from app.cache import LRUBackend, cache, forecast_key_builder
+from app.schemas import Feature
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+def test_lru_evicts_least_recently_used_by_bytes():
+    backend = LRUBackend(max_bytes=30)
+
+    async def scenario():
+        # размер записи - длина ключа и значения: 1 + 9 байт
+        for key in 'abc':
+            await backend.set(key, b'x' * 9)
+
+        await backend.get('a')
+        await backend.set('d', b'x' * 9)
+
+        return [await backend.peek(key) is not None for key in 'abcd']
+
+    assert _run(scenario()) == [True, False, True, True]
+    assert backend.stats['evictions'] == 1
+    assert backend.stats['bytes'] == 30
+
+
+def test_lru_skips_value_larger_than_budget():
+    backend = LRUBackend(max_bytes=30)
+
+    async def scenario():
+        await backend.set('a', b'x' * 9)
+        await backend.set('b', b'x' * 100)
+
+        return await backend.get('a'), await backend.get('b')
+
+    assert _run(scenario()) == (b'x' * 9, None)
+    assert backend.stats['evictions'] == 0
+
+
+def test_lru_replaces_key_without_double_counting():
+    backend = LRUBackend(max_bytes=100)
+
+    async def scenario():
+        await backend.set('a', b'x' * 9)
+        await backend.set('a', b'y' * 19)
+
+        return await backend.get('a')
+
+    assert _run(scenario()) == b'y' * 19
+    assert backend.stats['bytes'] == 20 and backend.stats['entries'] == 1
+
+
+def test_lru_expires_entries(monkeypatch):
+    backend = LRUBackend(max_bytes=100, default_expire=10)
+    now = [1000.0]
+    monkeypatch.setattr('app.cache.lru.time.monotonic', lambda: now[0])
+
+    async def scenario():
+        await backend.set('a', b'x')
+        hit = await backend.get('a')
+        now[0] += 11
+
+        return hit, await backend.get('a')
+
+    assert _run(scenario()) == (b'x', None)
+    assert backend.stats['expirations'] == 1 and backend.stats['bytes'] == 0
+
+
+@pytest.fixture
+def backend():
+    backend = LRUBackend(max_bytes=1024 * 1024)
+    FastAPICache.init(backend, expire=60, key_builder=forecast_key_builder)
+
+    yield backend
+
+    FastAPICache.reset()
+
+
+@pytest.mark.parametrize('media_type', [None, *ENCODERS])
+def test_cached_response_bytes_match_computed(backend, media_type: Optional[str]):
+    calls = []
+
+    @cache(namespace='test')
+    async def handler(target: Feature) -> dict:
+        calls.append(target)
+        return {'predict': [v * 2 for v in target.values], 'dates': target.dates}
+
+    target = Feature(values=[1.0, 2.5], dates=['31.01.2024', '29.02.2024'])
+
+    async def scenario():
+        token = _response_media_type.set(media_type)
+        try:
+            return await handler(target=target), await handler(target=target)
+        finally:
+            _response_media_type.reset(token)
+
+    miss, hit = _run(scenario())
+
+    assert len(calls) == 1
+    assert hit.body == miss.body
+    assert hit.media_type == miss.media_type
+    assert backend.stats['hits'] == 1 and backend.stats['misses'] == 1
+
+
+def test_cache_key_depends_on_series_content(backend):
+    calls = []
+
+    @cache(namespace='test')
+    async def handler(target: Feature) -> dict:
+        calls.append(target)
+        return {'sum': sum(target.values)}
+
+    async def scenario():
+        first = await handler(target=Feature(values=[1.0, 2.0], dates=['31.01.2024', '29.02.2024']))
+        second = await handler(target=Feature(values=[1.0, 3.0], dates=['31.01.2024', '29.02.2024']))
+
+        return first, second
+
+    first, second = _run(scenario())
+
+    assert len(calls) == 2
+    assert first.body != second.body
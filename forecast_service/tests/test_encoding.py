@@ -0,0 +1,53 @@
+import numpy as np
+import pyarrow as pa
+import pytest
+
+from app.api.encoding import ARROW_STREAM, MSGPACK, _accepted, decode_arrow
+from app.schemas import Feature
+
+
+def _arrow(content: dict) -> bytes:
+    table = pa.Table.from_pylist([content])
+    sink = pa.BufferOutputStream()
+
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+
+    return sink.getvalue().to_pybytes()
+
+
+def test_arrow_values_reach_feature_as_numpy():
+    data = decode_arrow(_arrow({'ipp': {'values': [1.0, 2.5], 'dates': ['31.01.2024', '29.02.2024']}}))
+
+    assert isinstance(data['ipp']['values'], np.ndarray)
+
+    feature = Feature(**data['ipp'])
+
+    # float64 массив из Arrow не копируется
+    assert np.shares_memory(feature.values, data['ipp']['values'])
+    assert feature.dates == ['31.01.2024', '29.02.2024']
+
+
+def test_feature_values_validation():
+    np.testing.assert_array_equal(Feature(values=[1, 2.5], dates=['a', 'b']).values, [1.0, 2.5])
+    assert Feature(values=[1, 2.5], dates=['a', 'b']).model_dump(mode='json')['values'] == [1.0, 2.5]
+
+    with pytest.raises(ValueError):
+        Feature(values=[1.0, None], dates=['a', 'b'])
+
+    with pytest.raises(ValueError):
+        Feature(values=['x'], dates=['a'])
+
+
+@pytest.mark.parametrize('accept, media_type', [
+    ('', None),
+    ('application/msgpack', MSGPACK),
+    ('application/json, application/msgpack', None),
+    ('application/json;q=0.5, application/msgpack', MSGPACK),
+    (f'{ARROW_STREAM};q=0.2, application/msgpack;q=0.8, */*;q=0.1', MSGPACK),
+    ('application/msgpack;q=0, */*', None),
+    ('text/html, application/msgpack;q=0.9', MSGPACK),
+    (f'{ARROW_STREAM}; q=1.0, application/json; q=1.0', ARROW_STREAM),
+])
+def test_accept_honours_q_values(accept, media_type):
+    assert _accepted(accept) == media_type
@@ -0,0 +1,59 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.schemas import CatBoostHyperparameters, ConfidenceIntervalEnum, Feature
+from app.service.forecast_models.spec import CatBoostForecast, ForecastSpec, Horizon
+
+
+class SyntheticForecast(CatBoostForecast):
+    spec = ForecastSpec(
+        inputs=('y', 'x'),
+        horizons=(
+            Horizon(features=('x', 'y_lag_1'), target='y'),
+            Horizon(features=('x_lag_1', 'y_lag_2'), target='y_lag_1'),
+        )
+    )
+
+
+def _series(n: int, seed: int = 0) -> dict[str, Feature]:
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('1970-01-31', periods=n, freq='M').strftime('%d.%m.%Y').tolist()
+    x = rng.standard_normal(n)
+    y = 100 + 2 * x + rng.standard_normal(n)
+
+    return dict(y=Feature(values=y.tolist(), dates=dates), x=Feature(values=x.tolist(), dates=dates))
+
+
+@pytest.fixture(autouse=True)
+def no_registry(monkeypatch):
+    monkeypatch.setattr('app.service.forecast_models.spec.catboost_model.model_registry.load', lambda *a, **k: None)
+    monkeypatch.setattr('app.service.forecast_models.spec.catboost_model.model_registry.save', lambda *a, **k: None)
+
+
+def test_interval_coverage_on_held_out_months():
+    n_train, n_test = 300, 400
+    series = _series(n_train + n_test)
+    hparams = CatBoostHyperparameters(depth=6, iterations=31, learning_rate=0.5)
+
+    model = SyntheticForecast(hparams).set_data(**{
+        name: Feature(values=f.values[:n_train], dates=f.dates[:n_train]) for name, f in series.items()
+    }).preprocess_features().train()
+    response = model.predict()
+
+    # те же модели на месяцах после обучающей выборки
+    full = SyntheticForecast(hparams).set_data(**series).preprocess_features()
+    test = full._data.months > model._data.months[-1]
+
+    for step, horizon_model in enumerate(model._models):
+        actual = full._data['target'][test, step]
+        predict = horizon_model.predict(full._data[f'model_{step + 1}'][test])
+
+        for j, level in enumerate(ConfidenceIntervalEnum):
+            coverage = np.mean(np.abs(actual - predict) <= model._widths[step, j])
+            # 400 месяцев: стандартная ошибка доли покрытия не больше 1.5 п.п.
+            assert coverage >= level.level / 100 - 0.05, (step, level, coverage)
+
+    assert [interval.level for interval in response.intervals] == list(ConfidenceIntervalEnum)
+    for lower, upper in zip(response.intervals, response.intervals[1:]):
+        assert np.all(upper.lower <= lower.lower) and np.all(lower.upper <= upper.upper)
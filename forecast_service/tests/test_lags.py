@@ -0,0 +1,121 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.service.data_preprocess import LagEngine, MonthlyFrame, TimeSeries, align_monthly, parse_lag
+from app.service.data_preprocess.lags import _bfill
+from app.service.forecast_models.ipc.catboost_model import IPC_SPEC
+from app.service.forecast_models.ipp.catboost_model import IPP_SPEC
+from app.service.forecast_models.ort.catboost_model import ORT_SPEC
+from benchmarks.data import ipc_body, ipp_body, ort_body
+
+
+def _frame(spec, body: dict) -> MonthlyFrame:
+    """Помесячная матрица рядов спецификации, как в ForecastPlan.prepare, но без кеша"""
+
+    features = {spec.target: body[spec.target], **body['features']}
+    series = {name: TimeSeries(values=features[name]['values'], dates=features[name]['dates']) for name in spec.inputs}
+
+    for name in spec.monthly:
+        series[name] = series[name].days_to_months()
+
+    for name, derived in spec.derived.items():
+        series[name] = derived.compute({i: series[i] for i in derived.inputs})
+
+    return align_monthly({name: series[name] for name in (*spec.inputs, *spec.derived)})
+
+
+def _shifted(spec, frame: MonthlyFrame, designs: dict) -> tuple[pd.DataFrame, np.ndarray]:
+    """Прежнее построение: shift каждой колонки в DataFrame, отбор строк, bfill и dropna"""
+
+    df = frame.to_frame()
+    columns = list(frame.columns)
+
+    for column in dict.fromkeys(c for design in designs.values() for c in design):
+        series, lag = parse_lag(column)
+        df[column] = df[series].shift(lag)
+        if column in spec.transforms:
+            df[column] = spec.transforms[column](df[column])
+        columns.append(column)
+
+    rows = ~pd.isna(df[spec.target])
+    if spec.date_start is not None:
+        rows &= df.date >= np.datetime64(spec.date_start, 'M')
+
+    df = df[rows]
+    if spec.bfill:
+        df = df.bfill()
+
+    return df.dropna(subset=list(dict.fromkeys(columns))), rows.to_numpy()
+
+
+def _with_gaps(frame: MonthlyFrame) -> MonthlyFrame:
+    """Пропуски в признаках, чтобы bfill было что заполнять"""
+
+    values = frame.values.copy()
+    gaps = np.random.default_rng(0).random(values.shape) < 0.1
+    gaps[:, 0] = False
+    values[gaps] = np.nan
+
+    return MonthlyFrame(months=frame.months, values=values, columns=frame.columns)
+
+
+@pytest.mark.parametrize('spec, body, gaps', [
+    (IPP_SPEC, ipp_body, False), (IPC_SPEC, ipc_body, False), (ORT_SPEC, ort_body, False), (IPP_SPEC, ipp_body, True)
+])
+def test_lag_engine_matches_pandas_shift(spec, body, gaps):
+    frame = _frame(spec, body())
+    if gaps:
+        frame = _with_gaps(frame)
+    designs = {f'model_{k}': horizon.features for k, horizon in enumerate(spec.horizons, 1)}
+    designs['target'] = tuple(horizon.target for horizon in spec.horizons)
+
+    engine = LagEngine(columns=frame.columns, designs=designs, transforms=spec.transforms)
+    expected, rows = _shifted(spec, frame, designs)
+
+    lagged = engine.build(frame, rows, bfill=spec.bfill)
+
+    np.testing.assert_array_equal(lagged.months, expected.date.to_numpy().astype('datetime64[M]'))
+    for name, design in designs.items():
+        np.testing.assert_array_equal(lagged[name], expected[list(design)].to_numpy(), err_msg=name)
+
+
+def test_bfill_matches_pandas():
+    rng = np.random.default_rng(0)
+    x = rng.normal(size=(50, 4))
+    x[rng.random(x.shape) < 0.3] = np.nan
+    # в последней строке пропуски заполнить нечем
+    x[-1, 1] = np.nan
+
+    np.testing.assert_array_equal(_bfill(x), pd.DataFrame(x).bfill().to_numpy())
+
+
+def test_fold_split_does_not_see_test_months():
+    plan = IPP_SPEC.compile()
+    frame = _frame(IPP_SPEC, ipp_body())
+    rows = ~np.isnan(frame.column(IPP_SPEC.target)) & (frame.months >= np.datetime64(IPP_SPEC.date_start, 'M'))
+    months = plan._engine.build(frame, rows, bfill=True).months
+    origin, test_size = len(months) - 12, 6
+
+    # пропуск в последнем месяце перед точкой отсчета, bfill заполнит его значением из месяца теста
+    values = frame.values.copy()
+    values[frame.months == months[origin - 1], frame.columns.index('consumer_price')] = np.nan
+    frame = MonthlyFrame(months=frame.months, values=values, columns=frame.columns)
+    data = plan._engine.build(frame, rows, bfill=True)
+
+    # другие значения рядов, начиная с месяца точки отсчета
+    future = frame.values.copy()
+    future[frame.months >= data.months[origin]] += 1000
+    changed = plan._engine.build(MonthlyFrame(months=frame.months, values=future, columns=frame.columns), rows,
+                                 bfill=True)
+
+    train, test = plan.split(data, origin, test_size)
+    changed_train, _ = plan.split(changed, origin, test_size)
+
+    # срез общих матриц заполнен значениями из месяцев теста
+    assert not np.array_equal(data.take(slice(None, origin))['model_1'], changed.take(slice(None, origin))['model_1'])
+    for name in data.designs:
+        np.testing.assert_array_equal(train[name], changed_train[name], err_msg=name)
+
+    assert train.months.max() < data.months[origin]
+    assert test.months.min() == data.months[origin] and test.months.max() <= data.months[origin + test_size - 1]
@@ -0,0 +1,43 @@
+import os
+
+from app.cache import ModelRegistry
+
+
+def _blob(size: int) -> bytes:
+    return b'x' * size
+
+
+def test_registry_does_not_load_other_version(tmp_path):
+    ModelRegistry(str(tmp_path), version='v1').save('key', 1)
+
+    assert ModelRegistry(str(tmp_path), version='v1').load('key') == 1
+    assert ModelRegistry(str(tmp_path), version='v2').load('key') is None
+
+
+def test_registry_evicts_least_recently_used(tmp_path):
+    registry = ModelRegistry(str(tmp_path), version='v1', max_bytes=2500)
+
+    for i, key in enumerate(['a', 'b']):
+        registry.save(key, _blob(1000))
+        os.utime(tmp_path / 'v1' / key, (i, i))
+
+    # загрузка обновляет время каталога, поэтому вытесняется b, а не a
+    assert registry.load('a') is not None
+    registry.save('c', _blob(1000))
+
+    assert registry.load('a') is not None
+    assert registry.load('b') is None
+    assert registry.load('c') is not None
+
+
+def test_registry_evicts_previous_versions_first(tmp_path):
+    old = ModelRegistry(str(tmp_path), version='v1', max_bytes=2500)
+    old.save('key', _blob(1000))
+    os.utime(tmp_path / 'v1' / 'key', (0, 0))
+
+    registry = ModelRegistry(str(tmp_path), version='v2', max_bytes=2500)
+    registry.save('a', _blob(1000))
+    registry.save('b', _blob(1000))
+
+    assert not (tmp_path / 'v1').exists()
+    assert registry.load('a') is not None and registry.load('b') is not None
@@ -0,0 +1,50 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from app.schemas import Feature, NHiTSHyperparameters
+from app.service.forecast_models import BaseForecastService
+from app.service.forecast_models.base_forecast_model.NHITS import engine
+from benchmarks.data import ipp_body
+
+
+@pytest.fixture(scope='module')
+def service():
+    target = Feature(**ipp_body()['ipp'])
+    hparams = NHiTSHyperparameters(epochs=10)
+
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setattr('app.service.forecast_models.base_forecast_model.NHITS.model.model_registry.load', lambda *a, **k: None)
+        mp.setattr('app.service.forecast_models.base_forecast_model.NHITS.model.model_registry.save', lambda *a, **k: None)
+
+        yield BaseForecastService(hparams).set_data(target_data=target).preprocess_features().train()
+
+
+def _assert_same(a, b):
+    np.testing.assert_allclose(a.predict, b.predict, rtol=1e-6)
+    np.testing.assert_allclose(a.previous, b.previous, rtol=1e-6)
+    for x, y in zip(a.intervals, b.intervals, strict=True):
+        np.testing.assert_allclose(x.lower, y.lower, rtol=1e-6)
+        np.testing.assert_allclose(x.upper, y.upper, rtol=1e-6)
+
+
+def test_direct_inference_matches_trainer(service, monkeypatch):
+    direct = service.predict()
+
+    monkeypatch.setattr(engine, 'DIRECT_INFERENCE', False)
+
+    _assert_same(direct, service.predict())
+
+
+def test_shared_model_predicts_concurrently(service):
+    expected = service.predict()
+
+    with ThreadPoolExecutor(4) as executor:
+        responses = list(executor.map(lambda _: service.predict(), range(8)))
+
+    for response in responses:
+        _assert_same(response, expected)
+
+    # прогноз идет на копии, обученная модель не меняется
+    assert 'predict' not in vars(service._model.models[0])
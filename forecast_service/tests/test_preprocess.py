@@ -0,0 +1,57 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from app.service.data_preprocess import TimeSeries, parse_dates
+from benchmarks.data import ipc_body, ipp_body, ort_body
+
+
+METHODS = ('mean', 'sum', 'min', 'max', 'first', 'last')
+
+
+def _fixture_series() -> dict:
+    ipp, ipc, ort = ipp_body(), ipc_body(), ort_body()
+
+    return {
+        'ipp': ipp['ipp'], 'ipc': ipc['ipc'], 'ort': ort['ort'],
+        **{f'ipp.{name}': f for name, f in ipp['features'].items()},
+        **{f'ipc.{name}': f for name, f in ipc['features'].items()},
+        **{f'ort.{name}': f for name, f in ort['features'].items()},
+    }
+
+
+def _pandas_dates(dates) -> np.ndarray:
+    return pd.to_datetime(pd.Series(dates), format='%d.%m.%Y').to_numpy().astype('datetime64[D]')
+
+
+def test_parse_dates_matches_pandas_on_fixture_series():
+    for name, series in _fixture_series().items():
+        np.testing.assert_array_equal(parse_dates(series['dates']), _pandas_dates(series['dates']), err_msg=name)
+
+
+def test_parse_dates_accepts_every_calendar_day():
+    days = pd.date_range('1999-01-01', '2031-12-31', freq='D')
+    dates = days.strftime('%d.%m.%Y').tolist()
+
+    np.testing.assert_array_equal(parse_dates(dates), days.to_numpy().astype('datetime64[D]'))
+
+
+@pytest.mark.parametrize('day', ['31.02.2024', '30.02.2024', '29.02.2023', '31.04.2021', '00.01.2020', '01.13.2020'])
+def test_parse_dates_rejects_impossible_dates(day):
+    with pytest.raises(ValueError):
+        parse_dates(['31.01.2020', day])
+
+
+def test_resample_matches_pandas_groupby():
+    for name, series in _fixture_series().items():
+        df = pd.DataFrame({'date': _pandas_dates(series['dates']), 'value': series['values']}).dropna()
+        df = df.sort_values('date', kind='stable')
+        expected = df.groupby(df.date.dt.to_period('M')).value.agg(list(METHODS))
+
+        result = TimeSeries(values=series['values'], dates=series['dates']).resample(*METHODS)
+
+        for method in METHODS:
+            np.testing.assert_array_equal(
+                result[method].dates, expected.index.to_timestamp().to_numpy().astype('datetime64[M]'), err_msg=name
+            )
+            np.testing.assert_allclose(result[method].values, expected[method].to_numpy(), rtol=1e-12, err_msg=name)
@@ -0,0 +1,47 @@
+import os
+import time
+
+from app import config
+from app.cache import ModelRegistry, model_registry
+from app.profiling import profile_call, prune_profiles
+
+
+def test_prune_profiles_drops_expired_and_oldest(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setattr(config, 'PROFILE_TTL', 3600)
+    monkeypatch.setattr(config, 'PROFILE_MAX_FILES', 2)
+
+    now = time.time()
+    ages = {'expired': 7200, 'old': 30, 'new': 20, 'newest': 10}
+
+    for name, age in ages.items():
+        path = tmp_path / f'{name}.pstats'
+        path.write_bytes(b'')
+        os.utime(path, (now - age, now - age))
+
+    (tmp_path / 'other.txt').write_text('')
+
+    prune_profiles()
+
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['new.pstats', 'newest.pstats', 'other.txt']
+
+
+def test_cold_profile_bypasses_model_registry(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path))
+    registry.save('key', 1)
+    monkeypatch.setattr('app.cache.model_registry', registry)
+
+    def train():
+        return registry.enabled, registry.load('key')
+
+    assert profile_call(train)[0] == (True, 1)
+    assert profile_call(train, cold=True)[0] == (False, None)
+    assert registry.enabled and registry.load('key') == 1
+
+
+def test_bypass_does_not_touch_other_registries(tmp_path):
+    other = ModelRegistry(str(tmp_path))
+
+    with model_registry.bypass():
+        assert model_registry.bypassed
+        assert other.enabled
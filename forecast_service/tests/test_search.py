@@ -0,0 +1,31 @@
+import pytest
+
+from app import config
+from app.executor.search import _limits, _searched_params
+from app.schemas import CatBoostHyperparameters, NHiTSHyperparameters, SearchSettings
+from app.service.forecast_models import IPPForecast
+from app.service.forecast_models.base_forecast_model.NHITS.model import BaseForecastService
+
+
+def test_first_trial_has_only_searched_params():
+    hparams = CatBoostHyperparameters(depth=3, learning_rate=0.1, l2_leaf_reg=0.005, iterations=8, mode='multi_output')
+
+    assert _searched_params(IPPForecast, hparams) == dict(depth=3, learning_rate=0.1, l2_leaf_reg=0.005, iterations=8)
+
+    hparams = NHiTSHyperparameters(lookback=6, horizon=3, epochs=400, learning_rate=0.01)
+
+    # epochs вне диапазона подбора все равно пробуется первым
+    assert _searched_params(BaseForecastService, hparams) == dict(lookback=6, epochs=400, learning_rate=0.01)
+
+
+@pytest.mark.parametrize('max_trials, max_timeout, settings, expected', [
+    (200, 600, SearchSettings(n_trials=50), (50, 600)),
+    (200, 600, SearchSettings(n_trials=500, timeout=60), (200, 60)),
+    (200, 600, SearchSettings(timeout=3600), (50, 600)),
+    (0, 0, SearchSettings(n_trials=500), (500, None)),
+])
+def test_search_limits(monkeypatch, max_trials, max_timeout, settings, expected):
+    monkeypatch.setattr(config, 'SEARCH_MAX_TRIALS', max_trials)
+    monkeypatch.setattr(config, 'SEARCH_TIMEOUT', max_timeout)
+
+    assert _limits(settings) == expected
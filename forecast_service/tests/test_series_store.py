@@ -0,0 +1,62 @@
+import os
+import sys
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from app.cache import fingerprint
+from app.schemas import SeriesReference
+from app.store import SeriesStore
+from app.store.build import write_series
+
+
+def _write(root, dataset_uuid: str, values: list[float]) -> None:
+    dates = [d.date() for d in pd.date_range('2024-01-31', periods=len(values), freq='ME')]
+    write_series(str(root), dataset_uuid, pd.DataFrame({'date': dates, 'value': values}))
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    _write(tmp_path, 'a', [1.0, 2.0, 3.0])
+    store = SeriesStore().load(str(tmp_path))
+    # app.cache.fingerprint - и модуль, и функция, поэтому модуль берется из sys.modules
+    monkeypatch.setattr(sys.modules['app.cache.fingerprint'], 'series_store', store)
+
+    return store
+
+
+def test_rebuilt_series_is_read_again(store, tmp_path):
+    assert store.get('a').values.tolist() == [1.0, 2.0, 3.0]
+
+    _write(tmp_path, 'a', [1.0, 2.0, 3.0, 4.0])
+    # время изменения могло не сдвинуться, но размер файла другой
+    assert store.get('a').values.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert store.get('a', as_of=date(2024, 2, 29)).dates == ['31.01.2024', '29.02.2024']
+
+
+def test_series_added_or_removed_after_load(store, tmp_path):
+    _write(tmp_path, 'b', [5.0])
+    assert store.get('b').values.tolist() == [5.0]
+
+    os.remove(tmp_path / 'a.arrow')
+    with pytest.raises(KeyError):
+        store.get('a')
+
+
+@pytest.mark.parametrize('dataset_uuid', ['../a', '.a', 'missing'])
+def test_unknown_or_outside_uuid_is_missing(store, dataset_uuid):
+    assert dataset_uuid not in store
+    with pytest.raises(KeyError):
+        store.get(dataset_uuid)
+
+
+def test_cache_key_follows_series_file(store, tmp_path):
+    reference = SeriesReference(dataset_uuid='a')
+    before = fingerprint(reference)
+
+    assert fingerprint(reference) == before
+
+    _write(tmp_path, 'a', [1.0, 2.0, 3.0, 4.0])
+
+    assert fingerprint(reference) != before
@@ -0,0 +1,117 @@
+import copy
+import fcntl
+import multiprocessing
+import os
+import time
+
+import pytest
+
+from app.cache import ModelRegistry
+from app.executor import sessions
+from app.schemas import CatBoostHyperparameters, Feature
+from app.service.forecast_models import ORTForecast
+from benchmarks.data import ort_body
+
+
+@pytest.fixture
+def registry(tmp_path, monkeypatch):
+    registry = ModelRegistry(str(tmp_path), strict=True)
+    monkeypatch.setattr(sessions, 'session_registry', registry)
+
+    return registry
+
+
+def _series(body: dict) -> dict[str, Feature]:
+    return dict(ort=Feature(**body['ort']), **{name: Feature(**f) for name, f in body['features'].items()})
+
+
+def _month(body: dict, i: int) -> dict[str, Feature]:
+    ort = body['ort']
+
+    return dict(ort=Feature(values=[ort['values'][i]], dates=[ort['dates'][i]]))
+
+
+def test_registry_overwrites_key(registry):
+    registry.save('key', {'v': 1})
+    registry.save('key', {'v': 2})
+
+    assert registry.load('key') == {'v': 2}
+
+
+def test_registry_save_error_is_raised(tmp_path):
+    registry = ModelRegistry(str(tmp_path / 'file'), strict=True)
+    (tmp_path / 'file').write_text('')
+
+    with pytest.raises(OSError):
+        registry.save('key', {'v': 1})
+
+
+def test_session_start_append_reload(registry):
+    full = ort_body()
+    body = copy.deepcopy(full)
+    body['ort']['values'], body['ort']['dates'] = body['ort']['values'][:-2], body['ort']['dates'][:-2]
+    n = len(body['ort']['values'])
+
+    hparams = CatBoostHyperparameters(iterations=8)
+    sessions._run_start('s', ORTForecast, hparams, _series(body))
+    assert len(registry.load('s')._raw_data['ort'].values) == n
+
+    for step, i in enumerate((-2, -1), start=1):
+        response = sessions._run_append('s', False, _month(full, i))
+        model = registry.load('s')
+
+        assert len(model._raw_data['ort'].values) == n + step
+        assert model.predict().predict.tolist() == response.predict.tolist()
+
+
+def test_registry_expires_keys(tmp_path):
+    registry = ModelRegistry(str(tmp_path), strict=True, ttl=60)
+    registry.save('old', {'v': 1})
+    registry.save('fresh', {'v': 2})
+    with registry.lock('missing'):
+        pass
+
+    stale = time.time() - 120
+    os.utime(tmp_path / 'old', (stale, stale))
+    os.utime(tmp_path / '.lock-missing', (stale, stale))
+
+    assert registry.load('old') is None
+    assert not (tmp_path / 'old').exists()
+
+    registry.save('other', {'v': 3})
+    os.utime(tmp_path / 'fresh', (stale, stale))
+    registry.save('other', {'v': 4})
+
+    assert not (tmp_path / 'fresh').exists() and not (tmp_path / '.lock-missing').exists()
+    assert registry.load('other') == {'v': 4}
+
+
+def _hold_lock(root: str, acquired, release) -> None:
+    with ModelRegistry(root).lock('s'):
+        acquired.set()
+        release.wait(5)
+
+
+def test_registry_lock_is_shared_between_processes(tmp_path):
+    registry = ModelRegistry(str(tmp_path))
+    context = multiprocessing.get_context('fork')
+    acquired, release = context.Event(), context.Event()
+    holder = context.Process(target=_hold_lock, args=(str(tmp_path), acquired, release))
+    holder.start()
+
+    try:
+        assert acquired.wait(5)
+
+        with open(tmp_path / '.lock-s') as f:
+            # пока блокировку держит другой процесс, взять ее нельзя
+            with pytest.raises(BlockingIOError):
+                fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+        release.set()
+        holder.join(5)
+
+        with registry.lock('s'):
+            pass
+    finally:
+        release.set()
+        holder.join(5)
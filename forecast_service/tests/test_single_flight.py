@@ -0,0 +1,130 @@
+import asyncio
+
+import pytest
+from fastapi_cache import FastAPICache
+
+from app.cache import LRUBackend, SingleFlight, cache, forecast_key_builder
+from app.schemas import Feature
+
+
+def test_concurrent_calls_share_one_computation():
+    flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return object()
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do('key', compute) for _ in range(5)))
+        other = await flight.do('other', compute)
+
+        return results, other
+
+    results, other = asyncio.run(scenario())
+
+    assert len(calls) == 2
+    assert all(result is results[0] for result in results)
+    assert other is not results[0]
+    assert flight.coalesced == 4 and flight.inflight == 0
+
+
+def test_error_reaches_every_waiter_and_is_not_cached():
+    flight = SingleFlight()
+    calls = []
+
+    async def fail():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        raise ValueError('boom')
+
+    async def scenario():
+        results = await asyncio.gather(*(flight.do('key', fail) for _ in range(3)), return_exceptions=True)
+        retry = await asyncio.gather(flight.do('key', fail), return_exceptions=True)
+
+        return results, retry
+
+    results, retry = asyncio.run(scenario())
+
+    assert all(isinstance(result, ValueError) for result in results + retry)
+    # после ошибки ключ освобождается, следующий вызов вычисляет заново
+    assert len(calls) == 2
+
+
+def test_cancelled_waiter_does_not_cancel_computation():
+    flight = SingleFlight()
+    finished = []
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        finished.append(1)
+        return 'result'
+
+    async def scenario():
+        first = asyncio.ensure_future(flight.do('key', compute))
+        second = asyncio.ensure_future(flight.do('key', compute))
+        await asyncio.sleep(0.01)
+
+        # первый клиент отключился, второй должен получить результат
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+
+        return await second
+
+    assert asyncio.run(scenario()) == 'result'
+    assert finished == [1]
+
+
+def test_computation_finishes_when_every_waiter_is_cancelled():
+    flight = SingleFlight()
+    finished = []
+
+    async def compute():
+        await asyncio.sleep(0.02)
+        finished.append(1)
+
+    async def scenario():
+        waiter = asyncio.ensure_future(flight.do('key', compute))
+        await asyncio.sleep(0.005)
+        waiter.cancel()
+
+        await asyncio.sleep(0.05)
+
+        return flight.inflight
+
+    assert asyncio.run(scenario()) == 0
+    assert finished == [1]
+
+
+@pytest.fixture
+def backend():
+    backend = LRUBackend(max_bytes=1024 * 1024)
+    FastAPICache.init(backend, expire=60, key_builder=forecast_key_builder)
+
+    yield backend
+
+    FastAPICache.reset()
+
+
+def test_cache_decorator_coalesces_identical_requests(backend):
+    calls = []
+
+    @cache(namespace='test')
+    async def handler(target: Feature) -> dict:
+        calls.append(target)
+        await asyncio.sleep(0.01)
+        return {'sum': sum(target.values)}
+
+    target = Feature(values=[1.0, 2.0], dates=['31.01.2024', '29.02.2024'])
+
+    async def scenario():
+        return await asyncio.gather(*(handler(target=target) for _ in range(4)))
+
+    responses = asyncio.run(scenario())
+
+    assert len(calls) == 1
+    assert len({response.body for response in responses}) == 1
+    # каждый запрос обратился к кешу один раз и промахнулся
+    assert backend.stats['misses'] == 4 and backend.stats['hits'] == 0
@@ -0,0 +1,51 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from app.schemas import CatBoostHyperparameters, Feature
+from app.service.forecast_models import IPCForecast, IPPForecast, ORTForecast
+from benchmarks.data import ipp_body
+
+
+# Прогнозы классов IPP, IPC и ORT, написанных вручную до спецификаций, на тех же входных рядах
+BASELINE = os.path.join(os.path.dirname(__file__), 'data', 'catboost_baseline.json')
+
+
+def _inputs() -> dict[str, tuple]:
+    body = ipp_body()
+    f = {name: Feature(**feature) for name, feature in body['features'].items()}
+    ipp = Feature(**body['ipp'])
+    # в примере нет рядов ИПЦ и ОРТ, поэтому их модели обучаются на рядах ИПП
+    agg_m0 = Feature(dates=f['curs'].dates, values=[v * 0.3 + i * 0.001 for i, v in enumerate(f['curs'].values)])
+
+    return dict(
+        ipp=(IPPForecast, dict(ipp=ipp, **f)),
+        ipc=(IPCForecast, dict(ipc=ipp, curs=f['curs'], interest_rate=f['interest_rate'], money_supply=f['curs'],
+                               agg_m0=agg_m0)),
+        ort=(ORTForecast, dict(ort=ipp, salary=f['cb_monitor'], business_clim=f['business_clim'], news=f['news'])),
+    )
+
+
+@pytest.fixture(autouse=True)
+def no_registry(monkeypatch):
+    monkeypatch.setattr('app.service.forecast_models.spec.catboost_model.model_registry.load', lambda *a, **k: None)
+    monkeypatch.setattr('app.service.forecast_models.spec.catboost_model.model_registry.save', lambda *a, **k: None)
+
+
+@pytest.mark.parametrize('index', ['ipp', 'ipc', 'ort'])
+def test_spec_forecast_matches_hand_written_models(index):
+    with open(BASELINE) as f:
+        expected = json.load(f)[index]
+
+    model_class, series = _inputs()[index]
+    hparams = CatBoostHyperparameters(**ipp_body()['hparams'])
+
+    response = model_class(hparams).set_data(**series).preprocess_features().train().predict()
+
+    np.testing.assert_allclose(response.previous, expected['previous'], rtol=1e-9)
+    np.testing.assert_allclose(response.predict, expected['predict'], rtol=1e-9)
+    for score, expected_score in zip(response.scores, expected['scores'], strict=True):
+        assert score.mape == pytest.approx(expected_score['mape'], rel=1e-9)
+        assert score.r2_score == pytest.approx(expected_score['r2_score'], rel=1e-9)
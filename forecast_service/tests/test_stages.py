@@ -0,0 +1,43 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import pytest
+from prometheus_client import REGISTRY
+
+from app.executor import process_pool
+from app.metrics import WorkerSamples, collect_samples, observe_stage
+
+
+def _fail_after_stage() -> None:
+    observe_stage('test', 'before_error', 0.25)
+    raise ValueError('boom')
+
+
+def _stage_count() -> float:
+    return REGISTRY.get_sample_value('forecast_stage_seconds_count', {'index': 'test', 'stage': 'before_error'}) or 0
+
+
+def test_collect_samples_attaches_samples_to_error():
+    with pytest.raises(ValueError) as error:
+        collect_samples(_fail_after_stage)
+
+    samples = error.value.worker_samples
+
+    assert isinstance(samples, WorkerSamples)
+    assert samples.stages == [('test', 'before_error', 0.25)]
+    assert samples.peak_rss > 0
+
+
+def test_run_in_pool_merges_samples_of_failed_task(monkeypatch):
+    executor = ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context('fork'))
+    monkeypatch.setattr(process_pool, '_executor', executor)
+    before = _stage_count()
+
+    try:
+        with pytest.raises(ValueError):
+            asyncio.run(process_pool.run_in_pool(_fail_after_stage))
+    finally:
+        executor.shutdown()
+
+    assert _stage_count() == before + 1